@@ -0,0 +1,105 @@
+"""
+Сравнение event loop asyncio и uvloop на смеси, похожей на обработчики бота: разбор апдейта aiogram, FSM,
+шаблоны лексикона, сжатие частей сообщения и поиск по заборчику. Бот не ходит ни в Telegram, ни в MongoDB,
+поэтому меряется только стоимость цикла и обработки. Заодно для каждого цикла печатаются задержки
+из LoopLagWatchdog.
+
+Запуск из корня репозитория: python -m benchmarks.bench_loop [количество апдейтов]
+"""
+import asyncio
+import sys
+import time
+
+from aiogram import Bot, Dispatcher, F, Router
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.types import CallbackQuery, Message
+
+from src.db.codec import LazyParts, encode_parts
+from src.lexicon import lexicon
+from src.utils.loop import LoopLagWatchdog, loop_factory
+from src.utils.search import BoardIndex
+
+TEXT = "Спасибо за эту смену, было здорово работать вместе! " * 20
+BOARD = {f"alias{i}": [TEXT, f"часть {i}"] for i in range(30)}
+
+
+def make_dispatcher() -> Dispatcher:
+    router = Router()
+    index = BoardIndex(BOARD, version=len(BOARD))
+
+    @router.message()
+    async def on_message(msg: Message, state: FSMContext):
+        data = await state.get_data()
+        parts = data.get("messages", []) + [msg.text]
+        await state.update_data(messages=parts[-5:])
+        stored, codec = encode_parts(parts)
+        list(LazyParts(stored, codec))
+        lexicon.greeting(msg.from_user.first_name)
+        await asyncio.sleep(0)
+
+    @router.callback_query(F.data == "search")
+    async def on_callback(callback: CallbackQuery, state: FSMContext):
+        await state.set_state(None)
+        index.search("смен")
+        await asyncio.sleep(0)
+
+    dp = Dispatcher(storage=MemoryStorage())
+    dp.include_router(router)
+    return dp
+
+
+def make_update(update_id: int) -> dict:
+    user = {"id": 1000 + update_id % 200, "is_bot": False, "first_name": f"User{update_id % 200}"}
+    chat = {"id": user["id"], "type": "private"}
+    if update_id % 3:
+        return {"update_id": update_id,
+                "message": {"message_id": update_id, "date": 0, "chat": chat, "from": user, "text": TEXT[:200]}}
+    return {"update_id": update_id,
+            "callback_query": {"id": str(update_id), "from": user, "chat_instance": "1", "data": "search",
+                               "message": {"message_id": update_id, "date": 0, "chat": chat, "text": "menu"}}}
+
+
+async def bench(updates: int, concurrency: int = 100) -> dict:
+    watchdog = LoopLagWatchdog(interval=0.005, threshold=0.05)
+    watchdog.start()
+    bot = Bot(token="123456:TEST")
+    dp = make_dispatcher()
+    raw = [make_update(i) for i in range(updates)]
+
+    started = time.perf_counter()
+    for offset in range(0, updates, concurrency):
+        await asyncio.gather(*(dp.feed_raw_update(bot, update) for update in raw[offset:offset + concurrency]))
+    handled = time.perf_counter() - started
+
+    started = time.perf_counter()
+    await asyncio.gather(*(asyncio.sleep(0) for _ in range(updates)))
+    scheduled = time.perf_counter() - started
+
+    watchdog.stop()
+    await bot.session.close()
+    lag = watchdog.summary()
+    return {"updates/s": updates / handled, "tasks/s": updates / scheduled, "lag p99, ms": lag["p99"],
+            "lag max, ms": lag["max"]}
+
+
+def main(updates: int = 20000):
+    results = {}
+    for name in ("asyncio", "uvloop"):
+        factory = loop_factory(name)
+        if name == "uvloop" and factory is None:
+            print("uvloop is not installed, skipping")
+            continue
+        with asyncio.Runner(loop_factory=factory) as runner:
+            results[name] = runner.run(bench(updates))
+
+    print(f"updates: {updates}")
+    print(f"{'loop':<10}" + "".join(f"{metric:>16}" for metric in next(iter(results.values()))))
+    for name, result in results.items():
+        print(f"{name:<10}" + "".join(f"{value:>16.1f}" for value in result.values()))
+    if len(results) == 2:
+        print(f"uvloop speedup: {results['uvloop']['updates/s'] / results['asyncio']['updates/s']:.2f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,64 @@
+"""
+Сравнение pydantic-моделей и легковесных записей на горячих путях: разбор документа настроек,
+проверка доступа по username и сборка документа сообщения.
+
+Запуск из корня репозитория: python -m benchmarks.bench_models [количество участников]
+"""
+import sys
+import timeit
+import tracemalloc
+from datetime import datetime
+
+from src.db import models
+from src.db.records import SettingsSnapshot, message_doc
+
+
+def make_settings_doc(members: int) -> dict:
+    return {
+        "name": "settings",
+        "event": models.DEFAULT_EVENT,
+        "eol_datetime": datetime(2030, 1, 1),
+        "members": [{"username": f"user{i}", "label": f"Участник {i}", "chat_id": 100000 + i, "is_admin": i == 0}
+                    for i in range(members)],
+    }
+
+
+def measure_memory(factory) -> int:
+    tracemalloc.start()
+    obj = factory()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del obj
+    return size
+
+
+def main(members: int = 300):
+    doc = make_settings_doc(members)
+    last = f"user{members - 1}"
+    pydantic_settings = models.Settings(**doc)
+    snapshot = SettingsSnapshot.from_doc(doc)
+    now = datetime.now()
+
+    cases = [
+        ("parse settings", lambda: models.Settings(**doc), lambda: SettingsSnapshot.from_doc(doc), 200),
+        ("is_allowed (last member)",
+         lambda: any(m.username == last for m in pydantic_settings.members),
+         lambda: last in snapshot.by_username, 20000),
+        ("message entry",
+         lambda: models.MessageEntry(sender_alias="a", parts=["text"], addition_time=now).model_dump(),
+         lambda: message_doc("a", ["text"], now), 20000),
+    ]
+    print(f"members: {members}")
+    print(f"{'case':<28}{'pydantic, us':>14}{'records, us':>14}{'speedup':>10}")
+    for name, old, new, number in cases:
+        old_time = min(timeit.repeat(old, number=number, repeat=5)) / number * 1e6
+        new_time = min(timeit.repeat(new, number=number, repeat=5)) / number * 1e6
+        print(f"{name:<28}{old_time:>14.2f}{new_time:>14.2f}{old_time / new_time:>9.1f}x")
+
+    old_mem = measure_memory(lambda: models.Settings(**doc))
+    new_mem = measure_memory(lambda: SettingsSnapshot.from_doc(doc))
+    print(f"{'settings memory, KiB':<28}{old_mem / 1024:>14.1f}{new_mem / 1024:>14.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 300)
@@ -0,0 +1,176 @@
+import asyncio
+from datetime import datetime
+from functools import partial
+from typing import Callable, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.types import ErrorEvent
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from src.config import config
+from src.db.repository import FencesRepository
+from src.db.resilience import (MongoCircuitBreaker, Outbox, ResilientRepository, create_client, outbox_path,
+                               run_outbox_replay)
+from src.lexicon import load_locales
+from src.middleware.access_control import AccessControlMiddleware
+from src.middleware.dedup import create_dedup_middleware
+from src.middleware.tenant import TenantMiddleware
+from src.middleware.throttling import ThrottlingMiddleware
+from src.routers import router
+from src.tenants import TenantRegistry
+from src.utils.logger import logger
+from src.utils.loop import LoopLagWatchdog
+from src.utils.rate_limit import TokenBucket
+from src.workers.broadcast import BroadcastWorker
+from src.workers.notifications import DigestNotifier
+from src.workers.scheduler import Scheduler
+
+
+async def error_handler(event: ErrorEvent):
+    logger.exception("An error occurred: %s", event.exception)
+
+
+async def monitor_eol(registry: TenantRegistry, primary: bool = True):
+    while True:
+        for service in registry:
+            eol = await service.get_eol_datetime()
+            if eol and datetime.now() >= eol:
+                service.mark_expired()
+                if config.EOL_SNAPSHOT:
+                    await service.take_snapshot()
+                # Файлы на диске общие для процессов, поэтому их рендерит только основной
+                if config.EOL_EXPORTS and primary:
+                    await service.prerender_exports()
+                if primary:
+                    await service.archive_if_due(eol)
+            else:
+                service.mark_active()
+        await asyncio.sleep(5)
+
+
+async def migrate_db():
+    """
+    Разовые миграции БД. Запускаются в главном процессе до воркеров, чтобы они не шли параллельно
+    в каждом процессе
+    """
+    client = AsyncIOMotorClient(config.MONGO_DB_URL)
+    try:
+        success, error = await FencesRepository(client).migrate()
+    finally:
+        client.close()
+    if not success:
+        raise RuntimeError(f"Database migration failed: {error}")
+
+
+async def build_dispatcher(bot: Bot, primary: bool = True,
+                           on_change: Optional[Callable[[str, str], None]] = None,
+                           on_letter: Optional[Callable[[str, str], None]] = None, index: int = 0) -> Dispatcher:
+    """
+    Собрать Dispatcher со всеми роутерами, middleware и фоновыми задачами
+
+    :param bot:
+    :type bot:
+    :param primary: запускать ли рассылки, планировщик и дайджесты. В режиме нескольких процессов они работают
+        только в одном
+    :type primary:
+    :param on_change: колбэк (event, kind) об изменениях, которые нужно донести до других процессов
+    :type on_change:
+    :param on_letter: колбэк (event, username), которым не основной процесс передает новые сообщения в дайджесты
+        основного, чтобы получатель получал одну сводку, от какого бы процесса ни пришли сообщения
+    :type on_letter:
+    :param index: номер процесса, у каждого процесса свой журнал отложенных сообщений. Основной процесс
+        переносит в БД журналы всех процессов
+    :type index:
+    :return:
+    :rtype:
+    """
+    load_locales()
+    breaker = MongoCircuitBreaker(reset_timeout=config.MONGO_CIRCUIT_RESET)
+    outbox = Outbox(outbox_path(index)) if config.OUTBOX_DIR else None
+    client = create_client(breaker)
+    registry = TenantRegistry(client, repo_factory=partial(ResilientRepository, breaker=breaker, outbox=outbox))
+    success, error = await registry.init(config.EVENTS)
+    if not success:
+        raise RuntimeError(f"Database initialization failed: {error}")
+    logger.info("Database initialized successfully for %d events", len(registry.services))
+    registry.base.on_replayed = partial(letter_replayed, registry)
+    scheduler = Scheduler(registry)
+    scheduler.on_change = on_change
+    for service in registry:
+        service.on_change = on_change
+        service.on_letter = on_letter
+
+    dp = Dispatcher(storage=MemoryStorage())
+    dp["registry"] = registry
+    dp["scheduler"] = scheduler
+    if config.LOOP_WATCHDOG:
+        watchdog = LoopLagWatchdog(interval=config.LOOP_WATCHDOG_INTERVAL, threshold=config.LOOP_STALL_THRESHOLD)
+        watchdog.start()
+        dp["loop_watchdog"] = watchdog
+
+    dp.include_router(router)
+    dp.errors.register(error_handler)
+
+    dedup = await create_dedup_middleware(client.fences, breaker)
+    throttling = ThrottlingMiddleware()
+    # Счетчики отброшенных апдейтов видны админу в статистике
+    dp["dedup"] = dedup
+    dp["throttling"] = throttling
+    dp.update.outer_middleware(dedup)
+    dp.update.outer_middleware(throttling)
+    dp.update.outer_middleware(TenantMiddleware(registry))
+    dp.message.middleware(AccessControlMiddleware())
+    dp.callback_query.middleware(AccessControlMiddleware())
+
+    # Лимиты Bot API общие на бота, поэтому корзины делятся между мероприятиями
+    broadcast_bucket = TokenBucket(rate=config.BROADCAST_RATE)
+    notify_bucket = TokenBucket(rate=config.NOTIFY_RATE)
+    asyncio.create_task(monitor_eol(registry, primary=primary))
+    if outbox is not None:
+        asyncio.create_task(run_outbox_replay(registry.base, config.OUTBOX_REPLAY_INTERVAL, primary=primary))
+    if primary:
+        asyncio.create_task(scheduler.run())
+    for service in registry:
+        if primary:
+            asyncio.create_task(BroadcastWorker(service, bot, bucket=broadcast_bucket).run())
+        if config.NOTIFY_NEW_LETTERS and primary:
+            service.notifier = DigestNotifier(service.repo, bot, bucket=notify_bucket)
+            asyncio.create_task(service.notifier.run())
+    return dp
+
+
+def apply_change(dp: Dispatcher, event: str, kind: str):
+    """
+    Применить изменение, сделанное в другом процессе
+    """
+    registry: TenantRegistry = dp["registry"]
+    service = registry.get(event)
+    if service is None:
+        return
+    if kind == "settings":
+        service.reset_cache()
+    elif kind == "boards":
+        service.drop_board_caches()
+    elif kind == "broadcast":
+        service.broadcast_wakeup.set()
+    elif kind == "scheduled":
+        asyncio.create_task(dp["scheduler"].reload())
+
+
+def letter_replayed(registry: TenantRegistry, event: str, username: str):
+    """
+    Учесть сообщение, перенесенное из журнала отложенных сообщений в БД
+    """
+    service = registry.get(event)
+    if service is not None:
+        service.letter_saved(username)
+
+
+def record_letter(dp: Dispatcher, event: str, username: str):
+    """
+    Учесть в дайджесте новое сообщение, сохраненное в другом процессе
+    """
+    service = dp["registry"].get(event)
+    if service is not None and service.notifier is not None:
+        service.notifier.record(username)
@@ -3,5 +3,12 @@ from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 
 from src.config import config
+from src.session import create_session
 
-bot = Bot(token=config.BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+
+def create_bot() -> Bot:
+    """
+    Бот с сессией Bot API из config. Создается в main.main и в каждом процессе-обработчике
+    """
+    return Bot(token=config.BOT_TOKEN, session=create_session(),
+               default=DefaultBotProperties(parse_mode=ParseMode.HTML))
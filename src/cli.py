@@ -0,0 +1,81 @@
+"""
+Офлайн-команды для операторов, работают напрямую с БД без бота:
+
+    python -m src.cli archive [--event EVENT] [--format txt|json] [--output PATH]
+    python -m src.cli cold-archive [--event EVENT] [--compact]
+    python -m src.cli cold-restore [--event EVENT]
+"""
+import argparse
+import asyncio
+from typing import List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from src.config import config
+from src.db.repository import FencesRepository
+from src.services import FencesService
+from src.utils.logger import setup_logging
+from src.workers.archive import ARCHIVE_FORMATS, build_archive
+
+
+async def archive(args: argparse.Namespace):
+    client = AsyncIOMotorClient(config.MONGO_DB_URL)
+    try:
+        repo = FencesRepository(client, event=args.event or config.EVENTS[0])
+        print(await build_archive(repo, args.format, args.output))
+    finally:
+        client.close()
+
+
+async def cold_archive(args: argparse.Namespace):
+    client = AsyncIOMotorClient(config.MONGO_DB_URL)
+    try:
+        repo = FencesRepository(client, event=args.event or config.EVENTS[0])
+        entry, error = await FencesService(repo).archive_to_cold()
+        print(error or f"{entry['boards']} boards, {entry['messages']} messages -> {entry['path']}")
+        if entry is not None and args.compact:
+            print(await repo.compact_messages())
+    finally:
+        client.close()
+
+
+async def cold_restore(args: argparse.Namespace):
+    client = AsyncIOMotorClient(config.MONGO_DB_URL)
+    try:
+        repo = FencesRepository(client, event=args.event or config.EVENTS[0])
+        restored, error = await FencesService(repo).restore_from_cold()
+        print(error or f"{restored} boards restored")
+    finally:
+        client.close()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m src.cli", description="Fences bot offline commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    archive_parser = commands.add_parser("archive", help="dump every board of an event into a ZIP archive")
+    archive_parser.add_argument("--event", help="event to archive (default: the first of EVENTS)")
+    archive_parser.add_argument("--format", choices=ARCHIVE_FORMATS, help="file format inside the archive "
+                                                                          "(default: ARCHIVE_FORMAT)")
+    archive_parser.add_argument("--output", help="archive path or directory (default: ARCHIVE_DIR or a temp dir)")
+    archive_parser.set_defaults(handler=archive)
+
+    cold_parser = commands.add_parser("cold-archive", help="move the boards of a finished event to cold storage")
+    cold_parser.add_argument("--event", help="event to move (default: the first of EVENTS)")
+    cold_parser.add_argument("--compact", action="store_true", help="run compact on the messages collection after")
+    cold_parser.set_defaults(handler=cold_archive)
+
+    restore_parser = commands.add_parser("cold-restore", help="bring the boards of an event back from cold storage")
+    restore_parser.add_argument("--event", help="event to restore (default: the first of EVENTS)")
+    restore_parser.set_defaults(handler=cold_restore)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    setup_logging()
+    asyncio.run(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,42 +1,261 @@
 import os
+from dataclasses import dataclass
 from datetime import datetime
+from functools import lru_cache
+from typing import ClassVar, List, Optional
 
 from dotenv import load_dotenv
 
-load_dotenv()
 
+def _bool(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
 
+
+def _list(name: str, default: str) -> List[str]:
+    return [item.strip() for item in os.getenv(name, default).split(",") if item.strip()]
+
+
+@dataclass(frozen=True)
 class Config:
-    BOT_TOKEN = os.getenv("BOT_TOKEN")
-
-    # Получение учетных данных MongoDB
-    MONGO_INITDB_ROOT_USERNAME = os.getenv("MONGO_INITDB_ROOT_USERNAME")
-    MONGO_INITDB_ROOT_PASSWORD = os.getenv("MONGO_INITDB_ROOT_PASSWORD")
-    MONGO_HOST = os.getenv("MONGO_HOST", "mongodb")
-    MONGO_PORT = os.getenv("MONGO_PORT", "27017")
-    MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "fences")
-
-    # Формирование MONGO_DB_URL с учетом учетных данных
-    if MONGO_INITDB_ROOT_USERNAME and MONGO_INITDB_ROOT_PASSWORD:
-        MONGO_DB_URL = os.getenv("MONGO_DB_URL",
-                                 f"mongodb://{MONGO_INITDB_ROOT_USERNAME}:{MONGO_INITDB_ROOT_PASSWORD}"
-                                 f"@{MONGO_HOST}:{MONGO_PORT}/{MONGO_DB_NAME}?authSource=admin")
-    else:
-        error_msg = "Missing MONGO_INITDB_ROOT_USERNAME or MONGO_INITDB_ROOT_PASSWORD in .env"
-        raise IOError(error_msg)
-
-    DATETIME_PATTERN = '%d.%m.%Y %H:%M:%S'
-    EOL_DATETIME = os.getenv('EOL_DATETIME', None)
-    if EOL_DATETIME is not None:
-        EOL_DATETIME = datetime.strptime(EOL_DATETIME.replace('_', ' '), DATETIME_PATTERN)
-
-    ADMIN_USERNAME = os.getenv("ADMIN_USERNAME")
-    ADMIN_LABEL = os.getenv("ADMIN_LABEL")
-
-    ALIAS_BYTE_LIMIT = 64
-    LOG_FILE = os.getenv("LOG_FILE")
-    LOG_DIR = os.path.dirname(LOG_FILE)
-    LOG_LEVEL = os.getenv("LOG_LEVEL")
-
-
-config = Config()
+    """
+    Настройки бота из переменных окружения (.env). Загружаются при первом обращении к config, см. load_config
+    """
+    DATETIME_PATTERN: ClassVar[str] = '%d.%m.%Y %H:%M:%S'
+    ALIAS_BYTE_LIMIT: ClassVar[int] = 64
+
+    BOT_TOKEN: Optional[str]
+
+    # Учетные данные и адрес MongoDB. MONGO_URL - адрес из переменной MONGO_DB_URL, если он задан явно
+    MONGO_INITDB_ROOT_USERNAME: Optional[str]
+    MONGO_INITDB_ROOT_PASSWORD: Optional[str]
+    MONGO_HOST: str
+    MONGO_PORT: str
+    MONGO_DB_NAME: str
+    MONGO_URL: Optional[str]
+
+    # Таймауты MongoDB (мс): выбор сервера и период heartbeat-ов, по которым размыкается цепь (src/db/resilience.py)
+    MONGO_TIMEOUT_MS: int
+    MONGO_HEARTBEAT_MS: int
+    MONGO_CIRCUIT_RESET: float
+    # Журнал сообщений, записанных без БД, и период их переноса в БД (секунды)
+    OUTBOX_DIR: Optional[str]
+    OUTBOX_REPLAY_INTERVAL: float
+
+    EOL_DATETIME: Optional[datetime]
+    ADMIN_USERNAME: Optional[str]
+    ADMIN_LABEL: Optional[str]
+
+    # Bot API: адрес сервера (например, локального), пул соединений, таймауты и повторы запросов
+    BOT_API_URL: Optional[str]
+    BOT_API_POOL_SIZE: int
+    BOT_API_KEEPALIVE: float
+    BOT_API_DNS_TTL: int
+    BOT_API_TIMEOUT: float
+    BOT_API_FILE_TIMEOUT: float
+    BOT_API_RETRIES: int
+    BOT_API_RETRY_MAX_DELAY: float
+
+    # Реализация event loop (asyncio или uvloop) и сторож задержек цикла: период проверки и порог зависания, секунды
+    EVENT_LOOP: str
+    LOOP_WATCHDOG: bool
+    LOOP_WATCHDOG_INTERVAL: float
+    LOOP_STALL_THRESHOLD: float
+
+    # Количество процессов-обработчиков апдейтов (1 - все в одном процессе) и таймаут long polling
+    WORKERS: int
+    POLLING_TIMEOUT: int
+
+    # Мероприятия (заборчики), которые обслуживает бот. Первое - мероприятие по умолчанию
+    EVENTS: List[str]
+    LOCALE: str
+
+    # Рассылки: запросов к Bot API в секунду и период опроса очереди
+    BROADCAST_RATE: float
+    BROADCAST_POLL_INTERVAL: float
+
+    # Дайджесты о новых сообщениях на заборчике (по умолчанию выключены)
+    NOTIFY_NEW_LETTERS: bool
+    NOTIFY_DEBOUNCE_SECONDS: float
+    NOTIFY_MAX_DELAY_SECONDS: float
+    NOTIFY_RATE: float
+
+    # За сколько часов до EOL_DATETIME напомнить всем участникам
+    EOL_REMINDER_HOURS: List[int]
+
+    # Сжатие текста сообщений на заборчике: none, zlib или zstd (нужен пакет zstandard), и порог в байтах
+    MESSAGE_COMPRESSION: str
+    MESSAGE_COMPRESSION_THRESHOLD: int
+
+    # Антифлуд: апдейтов в секунду и размер всплеска на пользователя, отдельно для сообщений и кнопок
+    THROTTLE_MESSAGE_RATE: float
+    THROTTLE_MESSAGE_BURST: float
+    THROTTLE_CALLBACK_RATE: float
+    THROTTLE_CALLBACK_BURST: float
+    # Ограничения черновика заборчика: количество частей и суммарная длина текста
+    DRAFT_MAX_PARTS: int
+    DRAFT_MAX_CHARS: int
+
+    # Защита от повторной обработки апдейтов: сколько последних update_id помнить и хранить ли их в БД
+    DEDUP_CACHE_SIZE: int
+    DEDUP_PERSIST: bool
+
+    # Сколько секунд помнить отказ в доступе незнакомцу и как часто ему отвечать
+    ACCESS_DENY_TTL: float
+    ACCESS_DENY_REPLY_INTERVAL: float
+
+    # Сколько секунд показывать админу закэшированную статистику
+    STATS_CACHE_TTL: float
+
+    # Снимок заборчиков после EOL_DATETIME: включен ли, сколько МБ текста держать в памяти и куда писать остальное
+    EOL_SNAPSHOT: bool
+    SNAPSHOT_MEMORY_LIMIT_MB: int
+    SNAPSHOT_DIR: Optional[str]
+    # Файлы выгрузки заборчиков после EOL_DATETIME: рендерить ли заранее, куда и сколькими процессами
+    EOL_EXPORTS: bool
+    EXPORT_DIR: str
+    EXPORT_WORKERS: int
+    # Архив всех заборчиков для админа и CLI: формат файлов внутри (txt или json) и каталог, где его хранить
+    ARCHIVE_FORMAT: str
+    ARCHIVE_DIR: Optional[str]
+    # Холодный архив: каталог файлов и через сколько дней после EOL_DATETIME переносить туда заборчики (0 - вручную)
+    COLD_STORAGE_DIR: str
+    COLD_ARCHIVE_AFTER_DAYS: int
+    # Отказываться ли архивировать в каталог не на постоянном диске (слой контейнера, tmpfs)
+    COLD_STORAGE_REQUIRE_PERSISTENT: bool
+
+    LOG_FILE: str
+    LOG_DIR: str
+    LOG_LEVEL: str
+
+    @property
+    def MONGO_DB_URL(self) -> str:
+        """
+        Адрес MongoDB. Учетные данные проверяются только здесь, поэтому скрипты без БД (бенчмарки, тесты)
+        не требуют их в окружении
+        """
+        if self.MONGO_URL:
+            return self.MONGO_URL
+        if not (self.MONGO_INITDB_ROOT_USERNAME and self.MONGO_INITDB_ROOT_PASSWORD):
+            raise IOError("Missing MONGO_INITDB_ROOT_USERNAME or MONGO_INITDB_ROOT_PASSWORD in .env")
+        return f"mongodb://{self.MONGO_INITDB_ROOT_USERNAME}:{self.MONGO_INITDB_ROOT_PASSWORD}" \
+               f"@{self.MONGO_HOST}:{self.MONGO_PORT}/{self.MONGO_DB_NAME}?authSource=admin"
+
+    @classmethod
+    def from_env(cls) -> "Config":
+        """
+        Прочитать и проверить настройки из окружения
+
+        :return:
+        :rtype:
+        """
+        load_dotenv()
+
+        eol_datetime = os.getenv('EOL_DATETIME')
+        if eol_datetime is not None:
+            eol_datetime = datetime.strptime(eol_datetime.replace('_', ' '), cls.DATETIME_PATTERN)
+
+        compression = os.getenv("MESSAGE_COMPRESSION", "none").lower()
+        if compression not in ("none", "zlib", "zstd"):
+            raise ValueError(f"MESSAGE_COMPRESSION must be none, zlib or zstd, got '{compression}'")
+        archive_format = os.getenv("ARCHIVE_FORMAT", "txt").lower()
+        if archive_format not in ("txt", "json"):
+            raise ValueError(f"ARCHIVE_FORMAT must be txt or json, got '{archive_format}'")
+        event_loop = os.getenv("EVENT_LOOP", "asyncio").lower()
+        if event_loop not in ("asyncio", "uvloop"):
+            raise ValueError(f"EVENT_LOOP must be asyncio or uvloop, got '{event_loop}'")
+        workers = int(os.getenv("WORKERS", "1"))
+        if workers < 1:
+            raise ValueError("WORKERS must be at least 1")
+
+        log_file = os.getenv("LOG_FILE", "./logs/bot.log")
+        return cls(
+            BOT_TOKEN=os.getenv("BOT_TOKEN"),
+            MONGO_INITDB_ROOT_USERNAME=os.getenv("MONGO_INITDB_ROOT_USERNAME"),
+            MONGO_INITDB_ROOT_PASSWORD=os.getenv("MONGO_INITDB_ROOT_PASSWORD"),
+            MONGO_HOST=os.getenv("MONGO_HOST", "mongodb"),
+            MONGO_PORT=os.getenv("MONGO_PORT", "27017"),
+            MONGO_DB_NAME=os.getenv("MONGO_DB_NAME", "fences"),
+            MONGO_URL=os.getenv("MONGO_DB_URL"),
+            MONGO_TIMEOUT_MS=int(os.getenv("MONGO_TIMEOUT_MS", "5000")),
+            MONGO_HEARTBEAT_MS=int(os.getenv("MONGO_HEARTBEAT_MS", "5000")),
+            MONGO_CIRCUIT_RESET=float(os.getenv("MONGO_CIRCUIT_RESET", "30")),
+            OUTBOX_DIR=os.getenv("OUTBOX_DIR", "./outbox") or None,
+            OUTBOX_REPLAY_INTERVAL=float(os.getenv("OUTBOX_REPLAY_INTERVAL", "5")),
+            EOL_DATETIME=eol_datetime,
+            ADMIN_USERNAME=os.getenv("ADMIN_USERNAME"),
+            ADMIN_LABEL=os.getenv("ADMIN_LABEL"),
+            BOT_API_URL=os.getenv("BOT_API_URL"),
+            BOT_API_POOL_SIZE=int(os.getenv("BOT_API_POOL_SIZE", "100")),
+            BOT_API_KEEPALIVE=float(os.getenv("BOT_API_KEEPALIVE", "30")),
+            BOT_API_DNS_TTL=int(os.getenv("BOT_API_DNS_TTL", "300")),
+            BOT_API_TIMEOUT=float(os.getenv("BOT_API_TIMEOUT", "30")),
+            BOT_API_FILE_TIMEOUT=float(os.getenv("BOT_API_FILE_TIMEOUT", "120")),
+            BOT_API_RETRIES=int(os.getenv("BOT_API_RETRIES", "3")),
+            BOT_API_RETRY_MAX_DELAY=float(os.getenv("BOT_API_RETRY_MAX_DELAY", "30")),
+            EVENT_LOOP=event_loop,
+            LOOP_WATCHDOG=_bool("LOOP_WATCHDOG", "true"),
+            LOOP_WATCHDOG_INTERVAL=float(os.getenv("LOOP_WATCHDOG_INTERVAL", "0.05")),
+            LOOP_STALL_THRESHOLD=float(os.getenv("LOOP_STALL_THRESHOLD", "0.25")),
+            WORKERS=workers,
+            POLLING_TIMEOUT=int(os.getenv("POLLING_TIMEOUT", "10")),
+            EVENTS=_list("EVENTS", "default") or ["default"],
+            LOCALE=os.getenv("LOCALE", "ru"),
+            BROADCAST_RATE=float(os.getenv("BROADCAST_RATE", "25")),
+            BROADCAST_POLL_INTERVAL=float(os.getenv("BROADCAST_POLL_INTERVAL", "30")),
+            NOTIFY_NEW_LETTERS=_bool("NOTIFY_NEW_LETTERS", "false"),
+            NOTIFY_DEBOUNCE_SECONDS=float(os.getenv("NOTIFY_DEBOUNCE_SECONDS", "300")),
+            NOTIFY_MAX_DELAY_SECONDS=float(os.getenv("NOTIFY_MAX_DELAY_SECONDS", "1800")),
+            NOTIFY_RATE=float(os.getenv("NOTIFY_RATE", "10")),
+            EOL_REMINDER_HOURS=[int(hours) for hours in _list("EOL_REMINDER_HOURS", "24,3")],
+            MESSAGE_COMPRESSION=compression,
+            MESSAGE_COMPRESSION_THRESHOLD=int(os.getenv("MESSAGE_COMPRESSION_THRESHOLD", "1024")),
+            THROTTLE_MESSAGE_RATE=float(os.getenv("THROTTLE_MESSAGE_RATE", "1")),
+            THROTTLE_MESSAGE_BURST=float(os.getenv("THROTTLE_MESSAGE_BURST", "20")),
+            THROTTLE_CALLBACK_RATE=float(os.getenv("THROTTLE_CALLBACK_RATE", "2")),
+            THROTTLE_CALLBACK_BURST=float(os.getenv("THROTTLE_CALLBACK_BURST", "10")),
+            DRAFT_MAX_PARTS=int(os.getenv("DRAFT_MAX_PARTS", "50")),
+            DRAFT_MAX_CHARS=int(os.getenv("DRAFT_MAX_CHARS", "40000")),
+            DEDUP_CACHE_SIZE=int(os.getenv("DEDUP_CACHE_SIZE", "10000")),
+            DEDUP_PERSIST=_bool("DEDUP_PERSIST", "false"),
+            ACCESS_DENY_TTL=float(os.getenv("ACCESS_DENY_TTL", "300")),
+            ACCESS_DENY_REPLY_INTERVAL=float(os.getenv("ACCESS_DENY_REPLY_INTERVAL", "60")),
+            STATS_CACHE_TTL=float(os.getenv("STATS_CACHE_TTL", "60")),
+            EOL_SNAPSHOT=_bool("EOL_SNAPSHOT", "true"),
+            SNAPSHOT_MEMORY_LIMIT_MB=int(os.getenv("SNAPSHOT_MEMORY_LIMIT_MB", "64")),
+            SNAPSHOT_DIR=os.getenv("SNAPSHOT_DIR"),
+            EOL_EXPORTS=_bool("EOL_EXPORTS", "true"),
+            EXPORT_DIR=os.getenv("EXPORT_DIR", "./exports"),
+            EXPORT_WORKERS=int(os.getenv("EXPORT_WORKERS", "2")),
+            ARCHIVE_FORMAT=archive_format,
+            ARCHIVE_DIR=os.getenv("ARCHIVE_DIR"),
+            COLD_STORAGE_DIR=os.getenv("COLD_STORAGE_DIR", "./cold"),
+            COLD_ARCHIVE_AFTER_DAYS=int(os.getenv("COLD_ARCHIVE_AFTER_DAYS", "0")),
+            COLD_STORAGE_REQUIRE_PERSISTENT=_bool("COLD_STORAGE_REQUIRE_PERSISTENT", "true"),
+            LOG_FILE=log_file,
+            LOG_DIR=os.path.dirname(log_file),
+            LOG_LEVEL=os.getenv("LOG_LEVEL", "INFO"),
+        )
+
+
+@lru_cache(maxsize=1)
+def load_config() -> Config:
+    """
+    Настройки процесса. Читаются из окружения один раз, load_config.cache_clear() перечитает их
+    """
+    return Config.from_env()
+
+
+class _LazyConfig:
+    """
+    Точка доступа к настройкам: config.BOT_TOKEN и т.д. Импорт модулей не читает окружение,
+    это происходит при первом обращении к настройке. Константы доступны без загрузки
+    """
+
+    def __getattr__(self, name: str):
+        constant = Config.__dict__.get(name)
+        if constant is not None and name.isupper() and not isinstance(constant, property):
+            return constant
+        return getattr(load_config(), name)
+
+
+config = _LazyConfig()
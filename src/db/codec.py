@@ -0,0 +1,112 @@
+"""
+Сжатие текста сообщений на заборчике.
+
+Части сообщения длиннее MESSAGE_COMPRESSION_THRESHOLD байт хранятся одним сжатым блоком в поле parts,
+а алгоритм записан в поле codec. Документы без codec (старые или короткие сообщения) хранят parts как есть.
+"""
+import json
+import zlib
+from collections.abc import Sequence
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from bson import Binary
+
+from src.config import config
+from src.utils.logger import logger
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ZLIB = "zlib"
+ZSTD = "zstd"
+
+
+@lru_cache(maxsize=1)
+def _compressor() -> Optional[str]:
+    codec = config.MESSAGE_COMPRESSION
+    if codec == ZSTD and zstandard is None:
+        logger.warning("zstandard is not installed, falling back to zlib")
+        return ZLIB
+    return codec if codec in (ZLIB, ZSTD) else None
+
+
+def encode_parts(parts: List[str]) -> tuple[List[str] | Binary, Optional[str]]:
+    """
+    Подготовить части сообщения к записи в БД
+
+    :param parts:
+    :type parts:
+    :return: значение для поля parts и алгоритм сжатия (None - без сжатия)
+    :rtype:
+    """
+    codec = _compressor()
+    if codec is None:
+        return parts, None
+    raw = json.dumps(parts, ensure_ascii=False).encode("utf-8")
+    if len(raw) < config.MESSAGE_COMPRESSION_THRESHOLD:
+        return parts, None
+    if codec == ZSTD:
+        data = zstandard.ZstdCompressor(level=10).compress(raw)
+    else:
+        data = zlib.compress(raw, 9)
+    if len(data) >= len(raw):
+        return parts, None
+    return Binary(data), codec
+
+
+def decode_parts(parts: Any, codec: Optional[str]) -> List[str]:
+    """
+    Распаковать поле parts, записанное encode_parts
+    """
+    if codec is None:
+        return parts
+    if codec == ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Message is compressed with zstd, but zstandard is not installed")
+        raw = zstandard.ZstdDecompressor().decompress(bytes(parts))
+    elif codec == ZLIB:
+        raw = zlib.decompress(bytes(parts))
+    else:
+        raise ValueError(f"Unknown message codec {codec}")
+    return json.loads(raw)
+
+
+class LazyParts(Sequence):
+    """
+    Части сообщения, которые распаковываются при первом обращении. Списки отправителей их не читают,
+    поэтому платят за распаковку только при просмотре конкретного сообщения
+    """
+    __slots__ = ("_stored", "_codec", "_parts")
+
+    def __init__(self, stored: Any, codec: Optional[str]):
+        self._stored = stored
+        self._codec = codec
+        self._parts: Optional[List[str]] = stored if codec is None else None
+
+    @classmethod
+    def from_doc(cls, doc: Dict[str, Any]) -> "LazyParts":
+        return cls(doc.get("parts", []), doc.get("codec"))
+
+    def _load(self) -> List[str]:
+        if self._parts is None:
+            self._parts = decode_parts(self._stored, self._codec)
+            self._stored = None
+        return self._parts
+
+    def __getitem__(self, index):
+        return self._load()[index]
+
+    def __len__(self) -> int:
+        return len(self._load())
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __eq__(self, other) -> bool:
+        return list(self) == list(other)
+
+    def __repr__(self) -> str:
+        return f"LazyParts({self._codec or 'plain'})"
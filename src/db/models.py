@@ -1,8 +1,10 @@
 from datetime import datetime
-from typing import List
+from typing import Any, List
 
 from pydantic import BaseModel
 
+DEFAULT_EVENT = "default"
+
 
 class UserEntry(BaseModel):
     username: str  # Telegram username (без @)
@@ -13,6 +15,7 @@ class UserEntry(BaseModel):
 
 class Settings(BaseModel):
     name: str = "settings"
+    event: str = DEFAULT_EVENT
     members: List[UserEntry] = []
     eol_datetime: datetime | None = None
 
@@ -22,8 +25,44 @@ class MessageEntry(BaseModel):
     sender_alias: str
     parts: List[str]
     addition_time: datetime
+    parts_count: int = 0
+    size: int = 0
+    codec: str | None = None  # см. src/db/codec.py
+    draft_id: str | None = None  # id черновика, из которого сохранено сообщение
 
 
 class MessageBoard(BaseModel):
     username: str
+    event: str = DEFAULT_EVENT
     messages: List[MessageEntry] = []
+    message_count: int = 0
+    read_cursor: datetime | None = None  # addition_time последнего прочитанного в «🆕 Новые» сообщения
+
+
+class BroadcastJob(BaseModel):
+    event: str = DEFAULT_EVENT
+    recipient_label: str | None = None  # None - рассылка всем пользователям
+    messages: List[dict]
+    created_by: str | None = None
+    created_at: datetime
+    status: str = "pending"  # pending -> running -> done
+    total: int = 0
+
+
+class Delivery(BaseModel):
+    job_id: Any
+    label: str
+    username: str
+    chat_id: int | None = None
+    status: str = "pending"  # pending/sent/failed
+    error: str | None = None
+    updated_at: datetime | None = None
+
+
+class ScheduledJob(BaseModel):
+    event: str = DEFAULT_EVENT
+    kind: str  # broadcast - отложенная рассылка, eol_reminder - напоминание о дедлайне
+    fire_at: datetime
+    payload: dict = {}
+    status: str = "pending"  # pending -> fired/cancelled
+    created_by: str | None = None
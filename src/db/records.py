@@ -0,0 +1,67 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from src.db.models import DEFAULT_EVENT
+
+
+@dataclass(slots=True)
+class MemberRecord:
+    """
+    Участник мероприятия. Легковесная замена models.UserEntry для кэша настроек и записи в БД
+    """
+    username: str
+    label: str
+    is_admin: bool = False
+    chat_id: Optional[int] = None
+
+    @classmethod
+    def from_doc(cls, doc: Dict[str, Any]) -> "MemberRecord":
+        return cls(doc["username"], doc["label"], doc.get("is_admin", False), doc.get("chat_id"))
+
+    def to_doc(self) -> Dict[str, Any]:
+        return {"username": self.username, "label": self.label, "chat_id": self.chat_id, "is_admin": self.is_admin}
+
+
+@dataclass(slots=True)
+class SettingsSnapshot:
+    """
+    Кэш документа настроек мероприятия с индексами участников по username и label
+    """
+    event: str = DEFAULT_EVENT
+    eol_datetime: Optional[datetime] = None
+    members: List[MemberRecord] = field(default_factory=list)
+    by_username: Dict[str, MemberRecord] = field(default_factory=dict)
+    by_label: Dict[str, MemberRecord] = field(default_factory=dict)
+
+    @classmethod
+    def from_doc(cls, doc: Optional[Dict[str, Any]], event: str = DEFAULT_EVENT) -> "SettingsSnapshot":
+        if not doc:
+            return cls(event=event)
+        members = [MemberRecord.from_doc(member) for member in doc.get("members", [])]
+        return cls(event=doc.get("event", event), eol_datetime=doc.get("eol_datetime"), members=members,
+                   by_username={m.username: m for m in members}, by_label={m.label: m for m in members})
+
+
+def message_doc(sender_alias: str, parts: Any, addition_time: datetime, sender_username: Optional[str] = None,
+                codec: Optional[str] = None, parts_count: int = 0, size: int = 0,
+                draft_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Документ сообщения на заборчике в формате models.MessageEntry. Сжатые parts (см. src/db/codec.py)
+    помечаются полем codec. parts_count и size (байт текста) нужны для списка отправителей без чтения parts,
+    draft_id - для защиты от повторного сохранения того же черновика
+    """
+    doc = {"sender_username": sender_username, "sender_alias": sender_alias, "parts": parts,
+           "addition_time": addition_time, "parts_count": parts_count, "size": size}
+    if codec is not None:
+        doc["codec"] = codec
+    if draft_id is not None:
+        doc["draft_id"] = draft_id
+    return doc
+
+
+def board_doc(username: str, event: str = DEFAULT_EVENT) -> Dict[str, Any]:
+    """
+    Пустой заборчик в формате models.MessageBoard
+    """
+    return {"username": username, "event": event, "messages": [], "message_count": 0}
@@ -1,25 +1,58 @@
+import copy
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, AsyncIterator
 
+from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorDatabase, AsyncIOMotorClient
 from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError, PyMongoError
 
 from src.config import config
 from src.db import models
-from src.db.models import UserEntry
+from src.db.codec import LazyParts, encode_parts
+from src.db.records import MemberRecord, board_doc, message_doc
+from src.lexicon import lexicon
 from src.utils.logger import logger
 
 
 class FencesRepository:
-    def __init__(self, client: AsyncIOMotorClient):
+    def __init__(self, client: AsyncIOMotorClient, event: str = models.DEFAULT_EVENT):
+        """
+        Репозиторий одного мероприятия (заборчика). Все мероприятия живут в одной БД и различаются полем event,
+        поэтому репозитории разных мероприятий делят один клиент и пул соединений
+        """
         self.db: AsyncIOMotorDatabase = client.fences
+        self.event = event
+        self._settings_query = {"name": "settings", "event": event}
+
+    def for_event(self, event: str) -> "FencesRepository":
+        """
+        Репозиторий другого мероприятия поверх того же клиента
+        """
+        repo = copy.copy(self)
+        repo.event = event
+        repo._settings_query = {"name": "settings", "event": event}
+        return repo
+
+    async def list_events(self) -> List[str]:
+        """
+        Получить все мероприятия, для которых в БД есть настройки
+        """
+        try:
+            return await self.db.fences_bot_settings.distinct("event", {"name": "settings"})
+        except (ConnectionFailure, ServerSelectionTimeoutError) as e:
+            logger.error("Database connection error in list_events: %s", str(e))
+            return []
+        except PyMongoError as e:
+            logger.error("Database error in list_events: %s", str(e))
+            return []
 
     async def init_db(self) -> tuple[bool, Optional[str]]:
         """
-        Инициализация БД:
+        Инициализация БД для мероприятия self.event:
             1. Проверка наличия необходимых коллекций
-            2. Добавление индексации
-            3. Добавление админа при необходимости
+            2. Перенос документов без поля event (до появления мероприятий) в мероприятие по умолчанию
+            3. Добавление индексации
+            4. Создание настроек мероприятия и добавление админа при необходимости
 
         :return: кортеж со статусом инициализации и трейсбеком ошибки при необходимости
         :rtype:
@@ -30,25 +63,50 @@ class FencesRepository:
 
             if "fences_bot_settings" not in collections:
                 logger.info("Creating 'fences_bot_settings' collection...")
-                settings = models.Settings().dict()
-                settings["eol_datetime"] = config.EOL_DATETIME
-                await self.db.fences_bot_settings.insert_one(settings)
-                await self.db.fences_bot_settings.create_index("name")
+                await self.db.create_collection("fences_bot_settings")
 
             if "fences_bot_messages" not in collections:
                 logger.info("Creating 'fences_bot_messages' collection...")
                 await self.db.create_collection("fences_bot_messages")
-                await self.db.fences_bot_messages.create_index("username")
+
+            for collection in ("fences_bot_settings", "fences_bot_messages", "fences_bot_broadcasts",
+                               "fences_bot_scheduled"):
+                result = await self.db[collection].update_many({"event": {"$exists": False}},
+                                                               {"$set": {"event": models.DEFAULT_EVENT}})
+                if result.modified_count:
+                    logger.info("Moved %d documents of '%s' to event '%s'", result.modified_count, collection,
+                                models.DEFAULT_EVENT)
+
+            await self.db.fences_bot_settings.create_index([("name", 1), ("event", 1)], unique=True)
+            await self.db.fences_bot_messages.create_index([("event", 1), ("username", 1)])
+            await self.db.fences_bot_cold.create_index("event", unique=True)
+
+            if not await self.db.fences_bot_settings.find_one(self._settings_query):
+                logger.info("Creating settings for event '%s'...", self.event)
+                settings = models.Settings(event=self.event).dict()
+                settings["eol_datetime"] = config.EOL_DATETIME
+                await self.db.fences_bot_settings.insert_one(settings)
+
+            if "fences_bot_deliveries" not in collections:
+                logger.info("Creating 'fences_bot_deliveries' collection...")
+                await self.db.create_collection("fences_bot_deliveries")
+                await self.db.fences_bot_deliveries.create_index([("job_id", 1), ("status", 1)])
+                await self.db.fences_bot_broadcasts.create_index([("event", 1), ("status", 1), ("created_at", 1)])
+
+            if "fences_bot_scheduled" not in collections:
+                logger.info("Creating 'fences_bot_scheduled' collection...")
+                await self.db.create_collection("fences_bot_scheduled")
+                await self.db.fences_bot_scheduled.create_index([("event", 1), ("status", 1), ("fire_at", 1)])
 
             if config.ADMIN_USERNAME is not None:
-                existing_user = await self.db.fences_bot_settings.find_one({"name": "settings",
+                existing_user = await self.db.fences_bot_settings.find_one({**self._settings_query,
                                                                             "members.username": config.ADMIN_USERNAME})
                 if not existing_user:
                     logger.info("Adding admin user %s", config.ADMIN_USERNAME)
-                    success, error = await self.add_member(user=UserEntry(username=config.ADMIN_USERNAME,
-                                                                          label=config.ADMIN_LABEL,
-                                                                          is_admin=True,
-                                                                          chat_id=0))
+                    success, error = await self.add_member(user=MemberRecord(username=config.ADMIN_USERNAME,
+                                                                             label=config.ADMIN_LABEL,
+                                                                             is_admin=True,
+                                                                             chat_id=0))
                     if not success:
                         return False, error
                 else:
@@ -56,10 +114,66 @@ class FencesRepository:
             return True, None
         except (ConnectionFailure, ServerSelectionTimeoutError) as e:
             logger.error("Database connection error: %s", str(e))
-            return False, config.MSG_UNKNOWING_ERROR
+            return False, lexicon.MSG_UNKNOWING_ERROR
         except PyMongoError as e:
             logger.error("Database error during init_db: %s", str(e))
-            return False, config.MSG_UNKNOWING_ERROR
+            return False, lexicon.MSG_UNKNOWING_ERROR
+
+    async def migrate(self) -> tuple[bool, Optional[str]]:
+        """
+        Разовые миграции данных всех мероприятий. Запускаются один раз главным процессом до старта воркеров
+        (см. src/app.py: migrate_db), а не в init_db каждого мероприятия в каждом процессе
+
+        :return: кортеж со статусом миграции и трейсбеком ошибки при необходимости
+        :rtype:
+        """
+        try:
+            await self._backfill_message_summary()
+            return True, None
+        except (ConnectionFailure, ServerSelectionTimeoutError) as e:
+            logger.error("Database connection error in migrate: %s", str(e))
+            return False, lexicon.MSG_UNKNOWING_ERROR
+        except PyMongoError as e:
+            logger.error("Database error in migrate: %s", str(e))
+            return False, lexicon.MSG_UNKNOWING_ERROR
+
+    async def _backfill_message_summary(self):
+        """
+        Проставить message_count, parts_count и size заборчикам, записанным до их появления.
+
+        Обновление делается на стороне сервера и только для заборчиков без message_count, поэтому сообщения,
+        добавленные во время миграции, не перезаписываются. Сжатые сообщения (codec) на сервере не распаковать:
+        им parts_count и size проставляются отдельно, точечно по каждому сообщению
+        """
+        plain = {"$and": [{"$eq": [{"$ifNull": ["$$m.parts_count", None]}, None]},
+                          {"$eq": [{"$ifNull": ["$$m.codec", None]}, None]}]}
+        summary = {"parts_count": {"$size": {"$ifNull": ["$$m.parts", []]}},
+                   "size": {"$sum": {"$map": {"input": {"$ifNull": ["$$m.parts", []]}, "as": "p",
+                                              "in": {"$strLenBytes": "$$p"}}}}}
+        result = await self.db.fences_bot_messages.update_many({"message_count": {"$exists": False}}, [
+            {"$set": {"messages": {"$map": {"input": {"$ifNull": ["$messages", []]}, "as": "m",
+                                            "in": {"$cond": [plain, {"$mergeObjects": ["$$m", summary]}, "$$m"]}}},
+                      "message_count": {"$size": {"$ifNull": ["$messages", []]}}}},
+        ])
+        if result.modified_count:
+            logger.info("Backfilled message summary for %d boards", result.modified_count)
+
+        compressed = {"codec": {"$exists": True}, "parts_count": {"$exists": False}}
+        async for board in self.db.fences_bot_messages.find({"messages": {"$elemMatch": compressed}},
+                                                            {"messages.parts": 1, "messages.codec": 1,
+                                                             "messages.parts_count": 1, "messages.addition_time": 1,
+                                                             "messages.sender_alias": 1}):
+            for message in board["messages"]:
+                if "codec" not in message or "parts_count" in message:
+                    continue
+                parts = LazyParts.from_doc(message)
+                await self.db.fences_bot_messages.update_one(
+                    {"_id": board["_id"], "messages": {"$elemMatch": {"addition_time": message["addition_time"],
+                                                                      "sender_alias": message["sender_alias"],
+                                                                      **compressed}}},
+                    {"$set": {"messages.$.parts_count": len(parts),
+                              "messages.$.size": sum(len(part.encode("utf-8")) for part in parts)}})
+            logger.info("Backfilled compressed message summary for board %s", board["_id"])
 
     async def get_settings(self) -> Optional[Dict[str, Any]]:
         """
@@ -70,7 +184,7 @@ class FencesRepository:
 
         try:
             logger.debug("Fetching settings from DB")
-            return await self.db.fences_bot_settings.find_one({"name": "settings"})
+            return await self.db.fences_bot_settings.find_one(self._settings_query)
         except (ConnectionFailure, ServerSelectionTimeoutError) as e:
             logger.error("Database connection error in get_settings: %s", str(e))
             return None
@@ -88,16 +202,16 @@ class FencesRepository:
         :rtype:
         """
         try:
-            await self.db.fences_bot_settings.update_one({"name": "settings"}, {"$set": updates})
+            await self.db.fences_bot_settings.update_one(self._settings_query, {"$set": updates})
             return True, None
         except (ConnectionFailure, ServerSelectionTimeoutError) as e:
             logger.error("Database connection error in update_settings: %s", str(e))
-            return False, config.MSG_UNKNOWING_ERROR
+            return False, lexicon.MSG_UNKNOWING_ERROR
         except PyMongoError as e:
             logger.error("Database error in update_settings: %s", str(e))
-            return False, config.MSG_UNKNOWING_ERROR
+            return False, lexicon.MSG_UNKNOWING_ERROR
 
-    async def add_member(self, user: models.UserEntry) -> tuple[bool, Optional[str]]:
+    async def add_member(self, user: MemberRecord) -> tuple[bool, Optional[str]]:
         """
         Добавить пользователя в БД
 
@@ -108,25 +222,25 @@ class FencesRepository:
         """
         try:
             existing_user = await self.db.fences_bot_settings.find_one(
-                {"name": "settings", "members.username": user.username}
+                {**self._settings_query, "members.username": user.username}
             )
             if existing_user:
                 logger.warning("User with username %s already exists, skipping add_member", user.username)
                 return False, "❌ Такой username уже есть"
 
             await self.db.fences_bot_settings.update_one(
-                {"name": "settings"},
-                {"$addToSet": {"members": user.dict()}}
+                self._settings_query,
+                {"$addToSet": {"members": user.to_doc()}}
             )
-            await self.db.fences_bot_messages.insert_one(models.MessageBoard(username=user.username).dict())
+            await self.db.fences_bot_messages.insert_one(board_doc(user.username, self.event))
             logger.info("Added user %s to members", user.username)
             return True, None
         except (ConnectionFailure, ServerSelectionTimeoutError) as e:
             logger.error("Database connection error in add_member: %s", str(e))
-            return False, config.MSG_UNKNOWING_ERROR
+            return False, lexicon.MSG_UNKNOWING_ERROR
         except PyMongoError as e:
             logger.error("Database error in add_member: %s", str(e))
-            return False, config.MSG_UNKNOWING_ERROR
+            return False, lexicon.MSG_UNKNOWING_ERROR
 
     async def remove_member(self, username: str) -> tuple[bool, Optional[str]]:
         """
@@ -139,18 +253,18 @@ class FencesRepository:
         """
         try:
             await self.db.fences_bot_settings.update_one(
-                {"name": "settings"},
+                self._settings_query,
                 {"$pull": {"members": {"username": username}}}
             )
-            await self.db.fences_bot_messages.delete_one({"username": username})
+            await self.db.fences_bot_messages.delete_one({"event": self.event, "username": username})
             logger.info("Removed user %s", username)
             return True, None
         except (ConnectionFailure, ServerSelectionTimeoutError) as e:
             logger.error("Database connection error in remove_member: %s", str(e))
-            return False, config.MSG_UNKNOWING_ERROR
+            return False, lexicon.MSG_UNKNOWING_ERROR
         except PyMongoError as e:
             logger.error("Database error in remove_member: %s", str(e))
-            return False, config.MSG_UNKNOWING_ERROR
+            return False, lexicon.MSG_UNKNOWING_ERROR
 
     async def set_admin_flag(self, username: str, is_admin: bool) -> tuple[bool, Optional[str]]:
         """
@@ -165,17 +279,17 @@ class FencesRepository:
         """
         try:
             await self.db.fences_bot_settings.update_one(
-                {"name": "settings", "members.username": username},
+                {**self._settings_query, "members.username": username},
                 {"$set": {"members.$.is_admin": is_admin}}
             )
             logger.info("Set admin flag to %s for user %s", is_admin, username)
             return True, None
         except (ConnectionFailure, ServerSelectionTimeoutError) as e:
             logger.error("Database connection error in set_admin_flag: %s", str(e))
-            return False, config.MSG_UNKNOWING_ERROR
+            return False, lexicon.MSG_UNKNOWING_ERROR
         except PyMongoError as e:
             logger.error("Database error in set_admin_flag: %s", str(e))
-            return False, config.MSG_UNKNOWING_ERROR
+            return False, lexicon.MSG_UNKNOWING_ERROR
 
     async def set_eol_datetime(self, eol_datetime: datetime) -> tuple[bool, Optional[str]]:
         """
@@ -192,10 +306,10 @@ class FencesRepository:
             return True, None
         except (ConnectionFailure, ServerSelectionTimeoutError) as e:
             logger.error("Database connection error in set_eol_datetime: %s", str(e))
-            return False, config.MSG_UNKNOWING_ERROR
+            return False, lexicon.MSG_UNKNOWING_ERROR
         except PyMongoError as e:
             logger.error("Database error in set_eol_datetime: %s", str(e))
-            return False, config.MSG_UNKNOWING_ERROR
+            return False, lexicon.MSG_UNKNOWING_ERROR
 
     async def get_eol_datetime(self) -> Optional[datetime]:
         """
@@ -232,30 +346,54 @@ class FencesRepository:
             return []
 
     async def save_message(self, recipient_username: str, sender_alias: str, parts: List[str],
-                           sender_username: str | None = None) -> tuple[bool, Optional[str]]:
+                           sender_username: str | None = None,
+                           draft_id: str | None = None) -> tuple[bool, Optional[str]]:
         """
-        Сохранить сообщение на заборчике recipient_username
+        Сохранить сообщение на заборчике recipient_username. Сообщение с уже сохраненным draft_id
+        не добавляется повторно: проверка и запись - одна атомарная операция над документом заборчика
         """
         try:
-            entry = models.MessageEntry(sender_username=sender_username, sender_alias=sender_alias,
-                                        parts=parts, addition_time=datetime.now())
-            await self.db.fences_bot_messages.update_one(
-                {"username": recipient_username},
-                {"$addToSet": {"messages": entry.dict()}}
-            )
-            logger.info("Saved message for recipient %s from sender %s (alias: %s)", recipient_username,
-                        sender_username or "unknown", sender_alias)
-            return True, None
+            return await self._push_message(recipient_username, sender_alias, parts, sender_username, draft_id,
+                                            addition_time=datetime.now())
         except (ConnectionFailure, ServerSelectionTimeoutError) as e:
             logger.error("Database connection error in save_message: %s", str(e))
-            return False, config.MSG_UNKNOWING_ERROR
+            return False, lexicon.MSG_UNKNOWING_ERROR
         except PyMongoError as e:
             logger.error("Database error in save_message: %s", str(e))
-            return False, config.MSG_UNKNOWING_ERROR
+            return False, lexicon.MSG_UNKNOWING_ERROR
+
+    async def _push_message(self, recipient_username: str, sender_alias: str, parts: List[str],
+                            sender_username: Optional[str], draft_id: Optional[str],
+                            addition_time: datetime) -> tuple[bool, Optional[str]]:
+        """
+        Запись сообщения для save_message. Ошибки БД пробрасываются вызывающему
+        """
+        stored, codec = encode_parts(parts)
+        entry = message_doc(sender_alias, stored, addition_time, sender_username=sender_username, codec=codec,
+                            parts_count=len(parts), size=sum(len(part.encode("utf-8")) for part in parts),
+                            draft_id=draft_id)
+        query = {"event": self.event, "username": recipient_username}
+        if draft_id is not None:
+            query["messages.draft_id"] = {"$ne": draft_id}
+        result = await self.db.fences_bot_messages.update_one(
+            query, {"$push": {"messages": entry}, "$inc": {"message_count": 1}}
+        )
+        if not result.matched_count:
+            # Условие $ne не дало записать повтор черновика либо заборчика нет: различаем только в этом редком случае
+            if draft_id is not None and await self.db.fences_bot_messages.find_one(
+                    {"event": self.event, "username": recipient_username, "messages.draft_id": draft_id},
+                    {"_id": 1}) is not None:
+                logger.info("Draft %s from %s is already saved", draft_id, sender_username or "unknown")
+                return True, None
+            logger.error("Board of %s not found in save_message", recipient_username)
+            return False, lexicon.MSG_UNKNOWING_ERROR
+        logger.info("Saved message for recipient %s from sender %s (alias: %s)", recipient_username,
+                    sender_username or "unknown", sender_alias)
+        return True, None
 
-    async def get_messages(self, username: str) -> Dict[str, List[str]]:
+    async def get_messages(self, username: str) -> Dict[str, LazyParts]:
         """
-        Получить все сообщения для пользователя username
+        Получить все сообщения для пользователя username. Сжатые сообщения распаковываются при первом чтении
 
         :param username:
         :type username:
@@ -263,10 +401,10 @@ class FencesRepository:
         :rtype:
         """
         try:
-            doc = await self.db.fences_bot_messages.find_one({"username": username})
+            doc = await self.db.fences_bot_messages.find_one({"event": self.event, "username": username})
             if not doc or "messages" not in doc:
                 return {}
-            return {msg["sender_alias"]: msg["parts"] for msg in doc["messages"]}
+            return {msg["sender_alias"]: LazyParts.from_doc(msg) for msg in doc["messages"]}
         except (ConnectionFailure, ServerSelectionTimeoutError) as e:
             logger.error("Database connection error in get_messages: %s", str(e))
             return {}
@@ -274,6 +412,292 @@ class FencesRepository:
             logger.error("Database error in get_messages: %s", str(e))
             return {}
 
+    async def iter_boards(self) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Все заборчики мероприятия (для снимка после EOL). Ошибки БД пробрасываются вызывающему
+        """
+        async for board in self.db.fences_bot_messages.find({"event": self.event}):
+            yield board
+
+    async def clear_boards(self, archived: Dict[Any, int]) -> int:
+        """
+        Очистить заборчики мероприятия после переноса в холодный архив. Удаляются только заархивированные
+        сообщения: сообщения дописываются в конец, поэтому это первые archived[_id] сообщений заборчика,
+        а добавленные после чтения заборчика остаются. Документы заборчиков остаются с пометкой cold,
+        чтобы запись на них продолжала работать. Ошибки БД пробрасываются вызывающему
+
+        :param archived: количество заархивированных сообщений по _id заборчика
+        :type archived:
+        :return: количество очищенных заборчиков
+        :rtype:
+        """
+        cleared = 0
+        for board_id, count in archived.items():
+            result = await self.db.fences_bot_messages.update_one(
+                {"_id": board_id, "cold": {"$ne": True}, "message_count": {"$gte": count}}, [
+                    {"$set": {"messages": {"$slice": ["$messages", count, {"$max": [{"$size": "$messages"}, 1]}]},
+                              "message_count": {"$subtract": ["$message_count", count]}, "cold": True}},
+                    {"$unset": ["read_cursor", "export_file_id", "export_version"]},
+                ])
+            cleared += result.modified_count
+        return cleared
+
+    async def restore_board(self, board: Dict[str, Any]) -> bool:
+        """
+        Вернуть заборчик из холодного архива. Сообщения из архива встают перед записанными после архивации,
+        уже восстановленный заборчик пропускается. Ошибки БД пробрасываются вызывающему
+
+        :param board: документ заборчика в том виде, в каком он был в БД при архивации
+        :type board:
+        :return: восстановлен ли заборчик
+        :rtype:
+        """
+        messages = board.get("messages", [])
+        update = {"$push": {"messages": {"$each": messages, "$position": 0}},
+                  "$inc": {"message_count": len(messages)}, "$unset": {"cold": ""}}
+        if board.get("read_cursor") is not None:
+            update["$max"] = {"read_cursor": board["read_cursor"]}
+        result = await self.db.fences_bot_messages.update_one({"_id": board["_id"], "cold": True}, update)
+        if result.matched_count:
+            return True
+        if await self.db.fences_bot_messages.count_documents({"_id": board["_id"]}, limit=1):
+            return False
+        # Участника удалили вместе с заборчиком, пока мероприятие было в архиве
+        await self.db.fences_bot_messages.insert_one(board)
+        return True
+
+    async def compact_messages(self) -> Dict[str, Any]:
+        """
+        Вернуть ОС место, освободившееся в коллекции заборчиков (команда compact, нужны права dbAdmin).
+        Ошибки БД пробрасываются вызывающему
+        """
+        return await self.db.command("compact", "fences_bot_messages")
+
+    async def get_cold_entry(self) -> Optional[Dict[str, Any]]:
+        """
+        Запись о холодном архиве мероприятия: путь к файлу, количество заборчиков и сообщений, статус
+        """
+        try:
+            return await self.db.fences_bot_cold.find_one({"event": self.event}, {"_id": 0})
+        except (ConnectionFailure, ServerSelectionTimeoutError) as e:
+            logger.error("Database connection error in get_cold_entry: %s", str(e))
+            return None
+        except PyMongoError as e:
+            logger.error("Database error in get_cold_entry: %s", str(e))
+            return None
+
+    async def set_cold_entry(self, entry: Dict[str, Any]):
+        """
+        Сохранить запись о холодном архиве мероприятия. Ошибки БД пробрасываются вызывающему
+        """
+        await self.db.fences_bot_cold.update_one({"event": self.event}, {"$set": {**entry, "event": self.event}},
+                                                 upsert=True)
+
+    async def get_export_file_id(self, username: str) -> Optional[tuple[str, int]]:
+        """
+        file_id выгрузки заборчика username в Telegram и количество сообщений, для которого она сделана
+        """
+        try:
+            doc = await self.db.fences_bot_messages.find_one({"event": self.event, "username": username},
+                                                            {"_id": 0, "export_file_id": 1, "export_version": 1})
+            if not doc or not doc.get("export_file_id"):
+                return None
+            return doc["export_file_id"], doc.get("export_version", 0)
+        except (ConnectionFailure, ServerSelectionTimeoutError) as e:
+            logger.error("Database connection error in get_export_file_id: %s", str(e))
+            return None
+        except PyMongoError as e:
+            logger.error("Database error in get_export_file_id: %s", str(e))
+            return None
+
+    async def set_export_file_id(self, username: str, file_id: str, version: int) -> tuple[bool, Optional[str]]:
+        """
+        Сохранить file_id выгрузки заборчика username
+        """
+        try:
+            await self.db.fences_bot_messages.update_one(
+                {"event": self.event, "username": username},
+                {"$set": {"export_file_id": file_id, "export_version": version}}
+            )
+            return True, None
+        except (ConnectionFailure, ServerSelectionTimeoutError) as e:
+            logger.error("Database connection error in set_export_file_id: %s", str(e))
+            return False, lexicon.MSG_UNKNOWING_ERROR
+        except PyMongoError as e:
+            logger.error("Database error in set_export_file_id: %s", str(e))
+            return False, lexicon.MSG_UNKNOWING_ERROR
+
+    async def get_board_summary(self, username: str) -> List[Dict[str, Any]]:
+        """
+        Получить список сообщений на заборчике username без текста: sender_alias, addition_time, parts_count и size
+
+        :param username:
+        :type username:
+        :return:
+        :rtype:
+        """
+        try:
+            cursor = self.db.fences_bot_messages.aggregate([
+                {"$match": {"event": self.event, "username": username}},
+                {"$project": {"_id": 0, "messages": {"$map": {"input": "$messages", "as": "m", "in": {
+                    "sender_alias": "$$m.sender_alias",
+                    "addition_time": "$$m.addition_time",
+                    "parts_count": "$$m.parts_count",
+                    "size": "$$m.size",
+                }}}}},
+            ])
+            docs = await cursor.to_list(length=1)
+            return docs[0].get("messages") or [] if docs else []
+        except (ConnectionFailure, ServerSelectionTimeoutError) as e:
+            logger.error("Database connection error in get_board_summary: %s", str(e))
+            return []
+        except PyMongoError as e:
+            logger.error("Database error in get_board_summary: %s", str(e))
+            return []
+
+    async def get_message(self, username: str, alias: str) -> Optional[LazyParts]:
+        """
+        Получить одно сообщение от alias на заборчике username, не загружая остальные
+
+        :param username:
+        :type username:
+        :param alias:
+        :type alias:
+        :return:
+        :rtype:
+        """
+        try:
+            doc = await self.db.fences_bot_messages.find_one(
+                {"event": self.event, "username": username},
+                {"_id": 0, "messages": {"$elemMatch": {"sender_alias": alias}}}
+            )
+            if not doc or not doc.get("messages"):
+                return None
+            return LazyParts.from_doc(doc["messages"][0])
+        except (ConnectionFailure, ServerSelectionTimeoutError) as e:
+            logger.error("Database connection error in get_message: %s", str(e))
+            return None
+        except PyMongoError as e:
+            logger.error("Database error in get_message: %s", str(e))
+            return None
+
+    async def get_new_messages(self, username: str) -> List[Dict[str, Any]]:
+        """
+        Получить сообщения на заборчике username, добавленные после read_cursor, в порядке добавления
+
+        :param username:
+        :type username:
+        :return: sender_alias, addition_time и parts (LazyParts)
+        :rtype:
+        """
+        try:
+            cursor = self.db.fences_bot_messages.aggregate([
+                {"$match": {"event": self.event, "username": username}},
+                {"$project": {"_id": 0, "messages": {"$filter": {
+                    "input": "$messages", "as": "m",
+                    "cond": {"$gt": ["$$m.addition_time", {"$ifNull": ["$read_cursor", datetime.min]}]},
+                }}}},
+            ])
+            docs = await cursor.to_list(length=1)
+            messages = docs[0].get("messages") or [] if docs else []
+            return [{"sender_alias": msg["sender_alias"], "addition_time": msg["addition_time"],
+                     "parts": LazyParts.from_doc(msg)} for msg in messages]
+        except (ConnectionFailure, ServerSelectionTimeoutError) as e:
+            logger.error("Database connection error in get_new_messages: %s", str(e))
+            return []
+        except PyMongoError as e:
+            logger.error("Database error in get_new_messages: %s", str(e))
+            return []
+
+    async def advance_read_cursor(self, username: str, read_at: datetime) -> tuple[bool, Optional[str]]:
+        """
+        Сдвинуть read_cursor заборчика username вперед до read_at (назад курсор не двигается)
+        """
+        try:
+            await self.db.fences_bot_messages.update_one({"event": self.event, "username": username},
+                                                         {"$max": {"read_cursor": read_at}})
+            return True, None
+        except (ConnectionFailure, ServerSelectionTimeoutError) as e:
+            logger.error("Database connection error in advance_read_cursor: %s", str(e))
+            return False, lexicon.MSG_UNKNOWING_ERROR
+        except PyMongoError as e:
+            logger.error("Database error in advance_read_cursor: %s", str(e))
+            return False, lexicon.MSG_UNKNOWING_ERROR
+
+    async def get_board_stats(self, since: datetime) -> Dict[str, List[dict]]:
+        """
+        Статистика заборчиков мероприятия одним агрегирующим запросом: сообщений на каждом заборчике,
+        сообщений от каждого отправителя и сообщений по часам начиная с since
+
+        :param since:
+        :type since:
+        :return: recipients ({username, count}), senders ({_id: username, count}), hourly ({_id: час, count})
+        :rtype:
+        """
+        try:
+            cursor = self.db.fences_bot_messages.aggregate([
+                {"$match": {"event": self.event}},
+                {"$facet": {
+                    "recipients": [
+                        {"$project": {"_id": 0, "username": 1, "count": {"$size": {"$ifNull": ["$messages", []]}}}},
+                        {"$sort": {"count": -1}},
+                    ],
+                    "senders": [
+                        {"$unwind": "$messages"},
+                        {"$group": {"_id": "$messages.sender_username", "count": {"$sum": 1}}},
+                        {"$sort": {"count": -1}},
+                    ],
+                    "hourly": [
+                        {"$unwind": "$messages"},
+                        {"$match": {"messages.addition_time": {"$gte": since}}},
+                        {"$group": {"_id": {"$dateToString": {"format": "%d.%m %H:00",
+                                                              "date": "$messages.addition_time"}},
+                                    "count": {"$sum": 1}, "first": {"$min": "$messages.addition_time"}}},
+                        {"$sort": {"first": 1}},
+                    ],
+                }},
+            ])
+            docs = await cursor.to_list(length=1)
+            return docs[0] if docs else {"recipients": [], "senders": [], "hourly": []}
+        except (ConnectionFailure, ServerSelectionTimeoutError) as e:
+            logger.error("Database connection error in get_board_stats: %s", str(e))
+            return {}
+        except PyMongoError as e:
+            logger.error("Database error in get_board_stats: %s", str(e))
+            return {}
+
+    async def get_board_version(self, username: str) -> Optional[int]:
+        """
+        Количество сообщений на заборчике username (меняется при каждом новом сообщении)
+        """
+        try:
+            doc = await self.db.fences_bot_messages.find_one({"event": self.event, "username": username},
+                                                            {"_id": 0, "message_count": 1})
+            return doc.get("message_count", 0) if doc else None
+        except (ConnectionFailure, ServerSelectionTimeoutError) as e:
+            logger.error("Database connection error in get_board_version: %s", str(e))
+            return None
+        except PyMongoError as e:
+            logger.error("Database error in get_board_version: %s", str(e))
+            return None
+
+    async def has_message(self, username: str, alias: str) -> Optional[bool]:
+        """
+        Есть ли на заборчике username сообщение от alias
+
+        :return: None, если проверить не удалось
+        :rtype:
+        """
+        try:
+            return await self.db.fences_bot_messages.count_documents(
+                {"event": self.event, "username": username, "messages.sender_alias": alias}, limit=1) > 0
+        except (ConnectionFailure, ServerSelectionTimeoutError) as e:
+            logger.error("Database connection error in has_message: %s", str(e))
+            return None
+        except PyMongoError as e:
+            logger.error("Database error in has_message: %s", str(e))
+            return None
+
     async def get_username_by_alias(self, alias: str) -> Optional[str]:
         """
         Получить username по alias
@@ -309,7 +733,7 @@ class FencesRepository:
         """
         try:
             result = await self.db.fences_bot_settings.update_one(
-                {"name": "settings", "members.username": username},
+                {**self._settings_query, "members.username": username},
                 {"$set": {"members.$.chat_id": chat_id}}
             )
             if result.matched_count == 0:
@@ -319,10 +743,10 @@ class FencesRepository:
             return True, None
         except (ConnectionFailure, ServerSelectionTimeoutError) as e:
             logger.error("Database connection error in update_user_chat_id: %s", str(e))
-            return False, config.MSG_UNKNOWING_ERROR
+            return False, lexicon.MSG_UNKNOWING_ERROR
         except PyMongoError as e:
             logger.error("Database error in update_user_chat_id: %s", str(e))
-            return False, config.MSG_UNKNOWING_ERROR
+            return False, lexicon.MSG_UNKNOWING_ERROR
 
     async def get_user_chat_id(self, label: str) -> Optional[int]:
         """
@@ -357,3 +781,247 @@ class FencesRepository:
         except PyMongoError as e:
             logger.error("Database error in get_all_chat_ids: %s", str(e))
             return []
+
+    async def create_broadcast(self, job: models.BroadcastJob,
+                               recipients: List[Dict[str, Any]]) -> tuple[Optional[str], Optional[str]]:
+        """
+        Поставить рассылку в очередь: документ задания и по записи в журнале доставки на каждого получателя
+
+        :param job:
+        :type job:
+        :param recipients: список словарей с ключами label и username
+        :type recipients:
+        :return: кортеж с id задания и трейсбеком ошибки при необходимости
+        :rtype:
+        """
+        try:
+            job.total = len(recipients)
+            job.event = self.event
+            job_id = ObjectId()
+            # Сначала журнал доставки, потом задание: задание без журнала воркер завершил бы, ничего не отправив,
+            # а журнал без задания (сбой между вставками) никто не обрабатывает
+            deliveries = [models.Delivery(job_id=job_id, label=r["label"], username=r["username"]).dict()
+                          for r in recipients]
+            if deliveries:
+                await self.db.fences_bot_deliveries.insert_many(deliveries)
+            await self.db.fences_bot_broadcasts.insert_one({"_id": job_id, **job.dict()})
+            logger.info("Queued broadcast %s for %d recipients", job_id, len(deliveries))
+            return str(job_id), None
+        except (ConnectionFailure, ServerSelectionTimeoutError) as e:
+            logger.error("Database connection error in create_broadcast: %s", str(e))
+            return None, lexicon.MSG_UNKNOWING_ERROR
+        except PyMongoError as e:
+            logger.error("Database error in create_broadcast: %s", str(e))
+            return None, lexicon.MSG_UNKNOWING_ERROR
+
+    async def get_active_broadcasts(self) -> List[dict]:
+        """
+        Получить незавершенные рассылки в порядке постановки в очередь (в т.ч. прерванные рестартом)
+        """
+        try:
+            cursor = self.db.fences_bot_broadcasts.find({"event": self.event, "status": {"$in": ["pending", "running"]}}) \
+                .sort("created_at", 1)
+            return await cursor.to_list(length=None)
+        except (ConnectionFailure, ServerSelectionTimeoutError) as e:
+            logger.error("Database connection error in get_active_broadcasts: %s", str(e))
+            return []
+        except PyMongoError as e:
+            logger.error("Database error in get_active_broadcasts: %s", str(e))
+            return []
+
+    async def set_broadcast_status(self, job_id: Any, status: str) -> tuple[bool, Optional[str]]:
+        """
+        Изменить статус рассылки
+        """
+        try:
+            await self.db.fences_bot_broadcasts.update_one({"_id": ObjectId(job_id)}, {"$set": {"status": status}})
+            return True, None
+        except (ConnectionFailure, ServerSelectionTimeoutError) as e:
+            logger.error("Database connection error in set_broadcast_status: %s", str(e))
+            return False, lexicon.MSG_UNKNOWING_ERROR
+        except PyMongoError as e:
+            logger.error("Database error in set_broadcast_status: %s", str(e))
+            return False, lexicon.MSG_UNKNOWING_ERROR
+
+    async def finish_broadcast(self, job_id: Any) -> tuple[bool, Optional[str]]:
+        """
+        Завершить рассылку, если в журнале не осталось получателей в очереди и ее не вернули в очередь
+        повтором недоставленных (retry_failed_deliveries переводит задание в pending)
+
+        :return: кортеж с признаком завершения и трейсбеком ошибки при необходимости
+        :rtype:
+        """
+        try:
+            if await self.db.fences_bot_deliveries.count_documents({"job_id": ObjectId(job_id), "status": "pending"},
+                                                                   limit=1):
+                return False, None
+            result = await self.db.fences_bot_broadcasts.update_one({"_id": ObjectId(job_id), "status": "running"},
+                                                                    {"$set": {"status": "done"}})
+            return bool(result.modified_count), None
+        except (ConnectionFailure, ServerSelectionTimeoutError) as e:
+            logger.error("Database connection error in finish_broadcast: %s", str(e))
+            return False, lexicon.MSG_UNKNOWING_ERROR
+        except PyMongoError as e:
+            logger.error("Database error in finish_broadcast: %s", str(e))
+            return False, lexicon.MSG_UNKNOWING_ERROR
+
+    async def get_deliveries(self, job_id: Any, status: Optional[str] = None) -> List[dict]:
+        """
+        Получить записи журнала доставки рассылки job_id, опционально только со статусом status
+        """
+        try:
+            query: Dict[str, Any] = {"job_id": ObjectId(job_id)}
+            if status:
+                query["status"] = status
+            return await self.db.fences_bot_deliveries.find(query).to_list(length=None)
+        except (ConnectionFailure, ServerSelectionTimeoutError) as e:
+            logger.error("Database connection error in get_deliveries: %s", str(e))
+            return []
+        except PyMongoError as e:
+            logger.error("Database error in get_deliveries: %s", str(e))
+            return []
+
+    async def mark_delivery(self, delivery_id: Any, status: str, chat_id: Optional[int] = None,
+                            error: Optional[str] = None) -> tuple[bool, Optional[str]]:
+        """
+        Отметить результат доставки одному получателю
+        """
+        try:
+            await self.db.fences_bot_deliveries.update_one(
+                {"_id": delivery_id},
+                {"$set": {"status": status, "chat_id": chat_id, "error": error, "updated_at": datetime.now()}}
+            )
+            return True, None
+        except (ConnectionFailure, ServerSelectionTimeoutError) as e:
+            logger.error("Database connection error in mark_delivery: %s", str(e))
+            return False, lexicon.MSG_UNKNOWING_ERROR
+        except PyMongoError as e:
+            logger.error("Database error in mark_delivery: %s", str(e))
+            return False, lexicon.MSG_UNKNOWING_ERROR
+
+    async def get_broadcasts_progress(self, limit: int = 5) -> List[dict]:
+        """
+        Получить последние рассылки со счетчиками журнала доставки по статусам
+
+        :return: список документов рассылок с дополнительным полем counts вида {status: count}
+        :rtype:
+        """
+        try:
+            jobs = await self.db.fences_bot_broadcasts.find({"event": self.event}, {"messages": 0}) \
+                .sort("created_at", -1).limit(limit).to_list(length=limit)
+            if not jobs:
+                return []
+            pipeline = [
+                {"$match": {"job_id": {"$in": [job["_id"] for job in jobs]}}},
+                {"$group": {"_id": {"job_id": "$job_id", "status": "$status"}, "count": {"$sum": 1}}},
+            ]
+            counts: Dict[Any, Dict[str, int]] = {}
+            async for row in self.db.fences_bot_deliveries.aggregate(pipeline):
+                counts.setdefault(row["_id"]["job_id"], {})[row["_id"]["status"]] = row["count"]
+            for job in jobs:
+                job["counts"] = counts.get(job["_id"], {})
+            return jobs
+        except (ConnectionFailure, ServerSelectionTimeoutError) as e:
+            logger.error("Database connection error in get_broadcasts_progress: %s", str(e))
+            return []
+        except PyMongoError as e:
+            logger.error("Database error in get_broadcasts_progress: %s", str(e))
+            return []
+
+    async def retry_failed_deliveries(self, job_id: Any) -> tuple[int, Optional[str]]:
+        """
+        Вернуть в очередь только недоставленные сообщения рассылки job_id
+
+        :return: кортеж с количеством возвращенных в очередь получателей и трейсбеком ошибки при необходимости
+        :rtype:
+        """
+        try:
+            result = await self.db.fences_bot_deliveries.update_many(
+                {"job_id": ObjectId(job_id), "status": "failed"},
+                {"$set": {"status": "pending", "error": None}}
+            )
+            if result.modified_count:
+                await self.set_broadcast_status(job_id, "pending")
+            logger.info("Requeued %d failed deliveries of broadcast %s", result.modified_count, job_id)
+            return result.modified_count, None
+        except (ConnectionFailure, ServerSelectionTimeoutError) as e:
+            logger.error("Database connection error in retry_failed_deliveries: %s", str(e))
+            return 0, lexicon.MSG_UNKNOWING_ERROR
+        except PyMongoError as e:
+            logger.error("Database error in retry_failed_deliveries: %s", str(e))
+            return 0, lexicon.MSG_UNKNOWING_ERROR
+
+    async def add_scheduled_job(self, job: models.ScheduledJob) -> tuple[Optional[dict], Optional[str]]:
+        """
+        Сохранить отложенное задание
+
+        :return: кортеж с сохраненным документом (вместе с _id) и трейсбеком ошибки при необходимости
+        :rtype:
+        """
+        try:
+            job.event = self.event
+            doc = job.dict()
+            result = await self.db.fences_bot_scheduled.insert_one(doc)
+            doc["_id"] = result.inserted_id
+            logger.info("Scheduled %s job %s at %s", job.kind, result.inserted_id, job.fire_at)
+            return doc, None
+        except (ConnectionFailure, ServerSelectionTimeoutError) as e:
+            logger.error("Database connection error in add_scheduled_job: %s", str(e))
+            return None, lexicon.MSG_UNKNOWING_ERROR
+        except PyMongoError as e:
+            logger.error("Database error in add_scheduled_job: %s", str(e))
+            return None, lexicon.MSG_UNKNOWING_ERROR
+
+    async def get_pending_scheduled_jobs(self) -> List[dict]:
+        """
+        Получить все еще не сработавшие отложенные задания
+        """
+        try:
+            return await self.db.fences_bot_scheduled.find({"event": self.event, "status": "pending"}).to_list(length=None)
+        except (ConnectionFailure, ServerSelectionTimeoutError) as e:
+            logger.error("Database connection error in get_pending_scheduled_jobs: %s", str(e))
+            return []
+        except PyMongoError as e:
+            logger.error("Database error in get_pending_scheduled_jobs: %s", str(e))
+            return []
+
+    async def set_scheduled_job_status(self, job_id: Any, status: str) -> tuple[bool, Optional[str]]:
+        """
+        Изменить статус отложенного задания
+        """
+        try:
+            await self.db.fences_bot_scheduled.update_one({"_id": job_id}, {"$set": {"status": status}})
+            return True, None
+        except (ConnectionFailure, ServerSelectionTimeoutError) as e:
+            logger.error("Database connection error in set_scheduled_job_status: %s", str(e))
+            return False, lexicon.MSG_UNKNOWING_ERROR
+        except PyMongoError as e:
+            logger.error("Database error in set_scheduled_job_status: %s", str(e))
+            return False, lexicon.MSG_UNKNOWING_ERROR
+
+    async def replace_eol_reminders(self, reminders: List[models.ScheduledJob]) -> tuple[List[dict], Optional[str]]:
+        """
+        Отменить несработавшие напоминания о дедлайне и запланировать новые
+
+        :return: кортеж со списком новых документов и трейсбеком ошибки при необходимости
+        :rtype:
+        """
+        try:
+            await self.db.fences_bot_scheduled.update_many({"event": self.event, "kind": "eol_reminder",
+                                                            "status": "pending"},
+                                                           {"$set": {"status": "cancelled"}})
+            for reminder in reminders:
+                reminder.event = self.event
+            docs = [reminder.dict() for reminder in reminders]
+            if docs:
+                result = await self.db.fences_bot_scheduled.insert_many(docs)
+                for doc, inserted_id in zip(docs, result.inserted_ids):
+                    doc["_id"] = inserted_id
+            logger.info("Scheduled %d EOL reminders", len(docs))
+            return docs, None
+        except (ConnectionFailure, ServerSelectionTimeoutError) as e:
+            logger.error("Database connection error in replace_eol_reminders: %s", str(e))
+            return [], lexicon.MSG_UNKNOWING_ERROR
+        except PyMongoError as e:
+            logger.error("Database error in replace_eol_reminders: %s", str(e))
+            return [], lexicon.MSG_UNKNOWING_ERROR
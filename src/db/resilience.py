@@ -0,0 +1,319 @@
+"""
+Работа бота при недоступной MongoDB.
+
+MongoCircuitBreaker слушает heartbeat-ы драйвера: когда ни один сервер не отвечает (или любая операция
+любого репозитория только что упала по соединению, см. CommandFailureListener), цепь размыкается, и ResilientRepository перестает ждать serverSelectionTimeoutMS -
+запросы к БД сразу завершаются ошибкой по обычным веткам except репозитория. Настройки мероприятия (список
+участников) в это время отдаются из последней успешно прочитанной копии, а новые сообщения на заборчиках
+дописываются в локальный журнал (Outbox) и переносятся в БД по порядку, когда соединение восстановится.
+Перенесенное сообщение получает время переноса: получатель видит его как новое, а дайджест и снимок
+заборчиков узнают о нем через ResilientRepository.on_replayed.
+
+У каждого процесса свой журнал outbox-<номер>.jsonl, а основной процесс переносит все журналы каталога:
+после уменьшения WORKERS журналы процессов, которых больше нет, иначе никто бы не перенес. Процессы
+согласуют доступ к журналу блокировкой файла <журнал>.lock
+"""
+import asyncio
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import IO, Any, AsyncIterator, Callable, Dict, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import errors, monitoring
+from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError, PyMongoError
+
+from src.config import config
+from src.db import models
+from src.db.repository import FencesRepository
+from src.lexicon import lexicon
+from src.utils.logger import logger
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class MongoCircuitBreaker(monitoring.ServerHeartbeatListener):
+    """
+    Состояние соединения с MongoDB по heartbeat-ам драйвера (вызываются из его потоков мониторинга).
+    Цепь разомкнута, если последний heartbeat каждого известного сервера неудачный, либо в течение reset_timeout
+    секунд после ошибки соединения в операции - если heartbeat-ы еще не заметили сбой
+    """
+
+    def __init__(self, reset_timeout: float = 30):
+        self.reset_timeout = reset_timeout
+        self._servers: Dict[Any, bool] = {}
+        self._failed_until = 0.0
+        self._lock = threading.Lock()
+        self.opened = 0
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            servers_down = bool(self._servers) and not any(self._servers.values())
+        return servers_down or time.monotonic() < self._failed_until
+
+    def record_failure(self):
+        if not self.is_open:
+            self.opened += 1
+            logger.warning("MongoDB circuit is open")
+        self._failed_until = time.monotonic() + self.reset_timeout
+
+    def _set(self, address: Any, alive: bool):
+        was_open = self.is_open
+        with self._lock:
+            self._servers[address] = alive
+        if alive:
+            self._failed_until = 0.0
+        if was_open and not self.is_open:
+            logger.info("MongoDB circuit is closed")
+        elif not was_open and self.is_open:
+            self.opened += 1
+            logger.warning("MongoDB circuit is open: no server answers heartbeats")
+
+    def started(self, event: monitoring.ServerHeartbeatStartedEvent):
+        pass
+
+    def succeeded(self, event: monitoring.ServerHeartbeatSucceededEvent):
+        self._set(event.connection_id, True)
+
+    def failed(self, event: monitoring.ServerHeartbeatFailedEvent):
+        self._set(event.connection_id, False)
+
+
+class CommandFailureListener(monitoring.CommandListener):
+    """
+    Размыкает цепь после сетевой ошибки в любой команде клиента. Методы репозитория сами перехватывают
+    ошибки БД, поэтому общая для всех вызовов точка, где видна ошибка соединения, - события команд драйвера
+    """
+
+    def __init__(self, breaker: MongoCircuitBreaker):
+        self.breaker = breaker
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        pass
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        pass
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        error = getattr(errors, str(event.failure.get("errtype")), None)
+        if isinstance(error, type) and issubclass(error, ConnectionFailure):
+            self.breaker.record_failure()
+
+
+# Ответ save_message, когда сообщение записано в журнал, а не в БД: в дайджест и снимок оно попадет при переносе
+DEFERRED = "deferred"
+
+
+class Outbox:
+    """
+    Журнал сообщений, которые не удалось записать в БД: JSON Lines, каждая запись сбрасывается на диск
+    до ответа пользователю. Записи переносятся в БД в порядке добавления
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = asyncio.Lock()
+
+    def _acquire(self) -> IO:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        handle = open(f"{self.path}.lock", "a")
+        if fcntl is not None:
+            # Без fcntl (не Linux) журнал защищен только от задач своего процесса
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        return handle
+
+    @asynccontextmanager
+    async def locked(self) -> AsyncIterator[None]:
+        """
+        Исключительный доступ к журналу: и внутри процесса, и между процессами
+        """
+        async with self.lock:
+            handle = await asyncio.to_thread(self._acquire)
+            try:
+                yield
+            finally:
+                # Закрытие файла снимает flock
+                handle.close()
+
+    def _append(self, record: Dict[str, Any]):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    async def append(self, record: Dict[str, Any]):
+        async with self.locked():
+            await asyncio.to_thread(self._append, record)
+
+    def read(self) -> List[Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def rewrite(self, records: List[Dict[str, Any]]):
+        """
+        Оставить в журнале только records (атомарно, через временный файл)
+        """
+        if not records:
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+
+class ResilientRepository(FencesRepository):
+    """
+    FencesRepository, который при разомкнутой цепи не обращается к БД, отдает последние настройки
+    и откладывает сообщения на заборчики в Outbox
+    """
+
+    def __init__(self, client: AsyncIOMotorClient, event: str = models.DEFAULT_EVENT,
+                 breaker: Optional[MongoCircuitBreaker] = None, outbox: Optional[Outbox] = None):
+        self.breaker = breaker or MongoCircuitBreaker()
+        self.outbox = outbox
+        self._last_settings: Optional[Dict[str, Any]] = None
+        # Колбэк (event, username) о сообщении, перенесенном из журнала в БД
+        self.on_replayed: Optional[Callable[[str, str], None]] = None
+        super().__init__(client, event)
+
+    @property
+    def db(self):
+        # Все методы репозитория обращаются к self.db внутри try, поэтому при разомкнутой цепи
+        # они сразу уходят в свою ветку except ServerSelectionTimeoutError
+        if self.breaker.is_open:
+            raise ServerSelectionTimeoutError("MongoDB circuit is open")
+        return self._db
+
+    @db.setter
+    def db(self, value):
+        self._db = value
+
+    def for_event(self, event: str) -> "ResilientRepository":
+        repo = super().for_event(event)
+        repo._last_settings = None
+        return repo
+
+    async def get_settings(self) -> Optional[Dict[str, Any]]:
+        settings = await super().get_settings()
+        if settings is not None:
+            self._last_settings = settings
+        elif self.breaker.is_open and self._last_settings is not None:
+            logger.warning("MongoDB is unavailable, using last known settings of event '%s'", self.event)
+            return self._last_settings
+        return settings
+
+    async def save_message(self, recipient_username: str, sender_alias: str, parts: List[str],
+                           sender_username: str | None = None,
+                           draft_id: str | None = None) -> tuple[bool, Optional[str]]:
+        if self.outbox is None:
+            return await super().save_message(recipient_username, sender_alias, parts, sender_username, draft_id)
+        addition_time = datetime.now()
+        try:
+            return await self._push_message(recipient_username, sender_alias, parts, sender_username, draft_id,
+                                            addition_time=addition_time)
+        except (ConnectionFailure, ServerSelectionTimeoutError) as e:
+            self.breaker.record_failure()
+            logger.warning("MongoDB is unavailable (%s), message for %s goes to outbox", str(e), recipient_username)
+        except PyMongoError as e:
+            logger.error("Database error in save_message: %s", str(e))
+            return False, lexicon.MSG_UNKNOWING_ERROR
+
+        # draft_id делает перенос из журнала идемпотентным, даже если бот упадет посреди него
+        record = {"event": self.event, "recipient_username": recipient_username, "sender_alias": sender_alias,
+                  "parts": parts, "sender_username": sender_username, "draft_id": draft_id or uuid.uuid4().hex,
+                  "addition_time": addition_time.isoformat()}
+        try:
+            await self.outbox.append(record)
+        except OSError as e:
+            logger.error("Failed to write message for %s to outbox: %s", recipient_username, str(e))
+            return False, lexicon.MSG_UNKNOWING_ERROR
+        return True, DEFERRED
+
+    async def replay_outbox(self, outbox: Optional[Outbox] = None) -> int:
+        """
+        Перенести отложенные сообщения в БД по порядку. На первой ошибке соединения перенос останавливается,
+        оставшиеся записи ждут следующего раза
+
+        :param outbox: журнал, по умолчанию свой журнал процесса
+        :type outbox:
+        :return: количество перенесенных сообщений
+        :rtype:
+        """
+        outbox = outbox or self.outbox
+        if outbox is None or self.breaker.is_open:
+            return 0
+        async with outbox.locked():
+            records = await asyncio.to_thread(outbox.read)
+            done = 0
+            try:
+                for record in records:
+                    repo = self if record["event"] == self.event else self.for_event(record["event"])
+                    # Время записи в журнал может быть раньше read_cursor получателя, и сообщение не показалось бы
+                    # ему новым, поэтому сообщение получает время переноса
+                    success, _ = await repo._push_message(
+                        record["recipient_username"], record["sender_alias"], record["parts"],
+                        record["sender_username"], record["draft_id"], addition_time=datetime.now())
+                    if not success:
+                        logger.error("Dropping outbox message for %s of event '%s': board not found",
+                                     record["recipient_username"], record["event"])
+                    elif self.on_replayed is not None:
+                        self.on_replayed(record["event"], record["recipient_username"])
+                    done += 1
+            except (ConnectionFailure, ServerSelectionTimeoutError) as e:
+                self.breaker.record_failure()
+                logger.warning("Outbox replay stopped after %d of %d messages: %s", done, len(records), str(e))
+            except PyMongoError as e:
+                logger.error("Outbox replay stopped after %d of %d messages: %s", done, len(records), str(e))
+            if done:
+                await asyncio.to_thread(outbox.rewrite, records[done:])
+                logger.info("Replayed %d messages from outbox %s", done, outbox.path)
+            return done
+
+
+def create_client(breaker: MongoCircuitBreaker) -> AsyncIOMotorClient:
+    """
+    Клиент MongoDB с таймаутами из config и прослушиванием heartbeat-ов и ошибок команд
+    """
+    return AsyncIOMotorClient(config.MONGO_DB_URL, event_listeners=[breaker, CommandFailureListener(breaker)],
+                              serverSelectionTimeoutMS=config.MONGO_TIMEOUT_MS,
+                              heartbeatFrequencyMS=config.MONGO_HEARTBEAT_MS)
+
+
+def outbox_path(index: int) -> str:
+    return os.path.join(config.OUTBOX_DIR, f"outbox-{index}.jsonl")
+
+
+async def run_outbox_replay(repo: ResilientRepository, interval: float, primary: bool = False):
+    """
+    Фоновый перенос отложенных сообщений: сразу при старте (журнал мог остаться после падения) и далее
+    каждые interval секунд, пока журнал не пуст. Основной процесс переносит все журналы каталога OUTBOX_DIR,
+    в т.ч. оставшиеся от процессов, которых после перезапуска уже нет
+    """
+    outboxes: Dict[str, Outbox] = {repo.outbox.path: repo.outbox}
+    while True:
+        if primary:
+            for path in glob.glob(os.path.join(os.path.dirname(repo.outbox.path), "outbox-*.jsonl")):
+                outboxes.setdefault(path, Outbox(path))
+        for outbox in outboxes.values():
+            try:
+                if os.path.exists(outbox.path):
+                    await repo.replay_outbox(outbox)
+            except Exception as e:
+                logger.error("Error in replay of outbox %s: %s", outbox.path, str(e))
+        await asyncio.sleep(interval)
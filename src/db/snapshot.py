@@ -0,0 +1,188 @@
+"""
+Снимок всех заборчиков мероприятия для режима только чтения после EOL_DATETIME.
+
+Тексты сообщений лежат одним буфером (JSON частей подряд), а индекс по получателям хранит только смещения,
+поэтому просмотр и выгрузка заборчика не обращаются к БД. Если снимок не помещается в бюджет памяти,
+буфер переносится в файл и читается через mmap.
+Каждый процесс (см. src/sharding.py) снимает свою копию, поэтому бюджет памяти и файл снимка - на процесс
+"""
+import asyncio
+import json
+import mmap
+import os
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from src.db.codec import LazyParts
+from src.db.repository import FencesRepository
+from src.utils.logger import logger
+
+
+# Сколько заборчиков кодировать в потоке за один раз
+BUILD_BATCH = 100
+
+
+class SnapshotEntry(NamedTuple):
+    sender_alias: str
+    addition_time: datetime
+    parts_count: int
+    size: int
+    offset: int
+    length: int
+
+
+class _SnapshotWriter:
+    """
+    Буфер текста строящегося снимка: в памяти до memory_limit байт, дальше - во временном файле
+    """
+
+    def __init__(self, event: str, memory_limit: int, directory: Optional[str]):
+        self.event = event
+        self.memory_limit = memory_limit
+        self.directory = directory
+        self.buffer: Optional[bytearray] = bytearray()
+        self.spill = None
+        self.position = 0
+
+    def write(self, raw: bytes) -> int:
+        """
+        Дописать raw и вернуть его смещение
+        """
+        if self.spill is None and len(self.buffer) + len(raw) > self.memory_limit:
+            self.spill = tempfile.NamedTemporaryFile(dir=self.directory, prefix=f"fences-{self.event}-",
+                                                     suffix=".snapshot", delete=False)
+            self.spill.write(self.buffer)
+            self.buffer = None
+        if self.spill is None:
+            self.buffer += raw
+        else:
+            self.spill.write(raw)
+        offset = self.position
+        self.position += len(raw)
+        return offset
+
+    def finish(self) -> tuple[bytes | mmap.mmap, Optional[str]]:
+        """
+        Завершить запись: вернуть данные снимка и путь к его файлу, если буфер не поместился в память
+        """
+        if self.spill is None:
+            return bytes(self.buffer), None
+        self.spill.close()
+        if not self.position:
+            return b"", self.spill.name
+        with open(self.spill.name, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), self.spill.name
+
+    def discard(self):
+        if self.spill is not None:
+            self.spill.close()
+            os.unlink(self.spill.name)
+
+
+class BoardSnapshot:
+    """
+    Снимок заборчиков только для чтения. Создается через BoardSnapshot.build
+    """
+
+    def __init__(self, event: str):
+        self.event = event
+        self.created_at = datetime.now()
+        self._boards: Dict[str, List[SnapshotEntry]] = {}
+        self._cursors: Dict[str, Optional[datetime]] = {}
+        self._data: bytes | mmap.mmap = b""
+        self._path: Optional[str] = None
+
+    @classmethod
+    async def build(cls, repo: FencesRepository, memory_limit: int,
+                    directory: Optional[str] = None) -> "BoardSnapshot":
+        """
+        Снять все заборчики мероприятия одним проходом по коллекции. Распаковка и кодирование текста идут
+        в отдельном потоке пачками по BUILD_BATCH заборчиков, чтобы не останавливать event loop
+
+        :param repo:
+        :type repo:
+        :param memory_limit: сколько байт текста держать в памяти, прежде чем перенести буфер в файл
+        :type memory_limit:
+        :param directory: каталог для файла снимка (по умолчанию временный каталог системы)
+        :type directory:
+        :return:
+        :rtype:
+        """
+        snapshot = cls(repo.event)
+        writer = _SnapshotWriter(repo.event, memory_limit, directory)
+        try:
+            batch = []
+            async for board in repo.iter_boards():
+                batch.append(board)
+                if len(batch) >= BUILD_BATCH:
+                    await asyncio.to_thread(snapshot._add_boards, writer, batch)
+                    batch = []
+            if batch:
+                await asyncio.to_thread(snapshot._add_boards, writer, batch)
+            snapshot._data, snapshot._path = await asyncio.to_thread(writer.finish)
+        except BaseException:
+            writer.discard()
+            raise
+        logger.info("Snapshot of event '%s': %d boards, %d bytes %s", repo.event, len(snapshot._boards),
+                    writer.position, f"in {snapshot._path}" if snapshot._path else "in memory")
+        return snapshot
+
+    def _add_boards(self, writer: "_SnapshotWriter", boards: List[Dict[str, Any]]):
+        for board in boards:
+            entries = []
+            for message in board.get("messages", []):
+                parts = list(LazyParts.from_doc(message))
+                raw = json.dumps(parts, ensure_ascii=False).encode("utf-8")
+                entries.append(SnapshotEntry(message["sender_alias"], message.get("addition_time"), len(parts),
+                                             message.get("size") or sum(len(p.encode("utf-8")) for p in parts),
+                                             writer.write(raw), len(raw)))
+            self._boards[board["username"]] = entries
+            self._cursors[board["username"]] = board.get("read_cursor")
+
+    def close(self):
+        """
+        Освободить буфер и удалить файл снимка
+        """
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._data = b""
+        if self._path is not None:
+            try:
+                os.unlink(self._path)
+            except OSError as e:
+                logger.warning("Failed to remove snapshot file %s: %s", self._path, str(e))
+            self._path = None
+
+    def _parts(self, entry: SnapshotEntry) -> List[str]:
+        return json.loads(self._data[entry.offset:entry.offset + entry.length])
+
+    def has_board(self, username: str) -> bool:
+        return username in self._boards
+
+    def version(self, username: str) -> Optional[int]:
+        entries = self._boards.get(username)
+        return None if entries is None else len(entries)
+
+    def summary(self, username: str) -> List[Dict[str, Any]]:
+        return [{"sender_alias": e.sender_alias, "addition_time": e.addition_time, "parts_count": e.parts_count,
+                 "size": e.size} for e in self._boards.get(username, [])]
+
+    def get_message(self, username: str, alias: str) -> Optional[List[str]]:
+        for entry in self._boards.get(username, []):
+            if entry.sender_alias == alias:
+                return self._parts(entry)
+        return None
+
+    def get_messages(self, username: str) -> Dict[str, List[str]]:
+        return {entry.sender_alias: self._parts(entry) for entry in self._boards.get(username, [])}
+
+    def get_new_messages(self, username: str) -> List[Dict[str, Any]]:
+        cursor = self._cursors.get(username) or datetime.min
+        return [{"sender_alias": e.sender_alias, "addition_time": e.addition_time, "parts": self._parts(e)}
+                for e in self._boards.get(username, []) if e.addition_time and e.addition_time > cursor]
+
+    def advance_cursor(self, username: str, read_at: datetime):
+        cursor = self._cursors.get(username)
+        if cursor is None or read_at > cursor:
+            self._cursors[username] = read_at
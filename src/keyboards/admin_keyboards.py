@@ -1,4 +1,4 @@
-from typing import Literal
+from typing import List, Literal
 
 from aiogram.types import InlineKeyboardMarkup
 
@@ -12,6 +12,8 @@ def admin_panel_keyboard():
         [btn('👨‍🚀 Выдать права администратора', 'add_root'), btn("🤐 Отозвать права администратора", "delete_root")],
         [btn('⏱️Изменить время действия бота', 'set_datetime'),
          btn('📢 Отправить сообщение от бота', 'send_bot_message')],
+        [btn('📈 Статус рассылок', 'broadcast_status'), btn('📊 Статистика', 'stats')],
+        [btn('🗄 Архив заборчиков', 'archive'), btn('🧊 Холодный архив', 'cold')],
         [btn("🔙 Назад", "back")]])
 
 
@@ -25,6 +27,7 @@ async def choose_user_to_remove_keyboard(service: FencesService, role: Literal['
 def bot_message_type_keyboard():
     return InlineKeyboardMarkup(inline_keyboard=[[btn("Всем пользователям", "bot_message_all")],
                                                  [btn("Конкретному пользователю", "bot_message_single")],
+                                                 [btn("⏰ Запланировать всем", "bot_message_schedule")],
                                                  [btn("🔙 Назад", "admin")]])
 
 
@@ -32,3 +35,25 @@ async def bot_message_recipient_keyboard(service: FencesService):
     contacts, _ = await service.get_users(return_field='dict')
     return InlineKeyboardMarkup(
         inline_keyboard=[[btn(name, f"bot_recipient:{name}")] for name in contacts] + [[btn("🔙 Назад", "admin")]])
+
+
+def broadcast_status_keyboard(jobs: List[dict]):
+    rows = [[btn(f"🔍 #{str(job['_id'])[-6:]}", f"broadcast_job:{job['_id']}")] for job in jobs
+            if job.get("counts", {}).get("failed")]
+    rows.append([btn("🔄 Обновить", "broadcast_status"), btn("🔙 Назад", "admin")])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
+
+
+def stats_keyboard():
+    return InlineKeyboardMarkup(inline_keyboard=[[btn("🔄 Обновить", "stats"), btn("🔙 Назад", "admin")]])
+
+
+def cold_storage_keyboard(archived: bool):
+    action = btn("♨️ Восстановить заборчики", "cold_restore") if archived else \
+        btn("🧊 Перенести заборчики в архив", "cold_archive")
+    return InlineKeyboardMarkup(inline_keyboard=[[action], [btn("🔙 Назад", "admin")]])
+
+
+def broadcast_job_keyboard(job_id: str):
+    return InlineKeyboardMarkup(inline_keyboard=[[btn("🔁 Повторить для недоставленных", f"broadcast_retry:{job_id}")],
+                                                 [btn("🔙 Назад", "broadcast_status")]])
@@ -1,3 +1,5 @@
+from typing import List
+
 from aiogram.types import InlineKeyboardMarkup, ReplyKeyboardMarkup, KeyboardButton
 
 from src.keyboards import btn
@@ -25,6 +27,10 @@ async def main_menu(username: str, service: FencesService):
     return InlineKeyboardMarkup(inline_keyboard=base)
 
 
+def events_keyboard(events: List[str]):
+    return InlineKeyboardMarkup(inline_keyboard=[[btn(event, f"event:{event}")] for event in events])
+
+
 def message_keyboard():
     return InlineKeyboardMarkup(inline_keyboard=[[btn("💾 Сохранить", "save"), btn("🔙 Отменить всё", "cancel")]])
 
@@ -1,13 +1,29 @@
+from typing import Iterable
+
 from aiogram.types import InlineKeyboardMarkup
 
 from src.keyboards import btn
 
 
-async def user_messages_keyboard(board: dict):
-    buttons = [[btn(f"{k}", f"view:{k}")] for k in board.keys()]
+async def user_messages_keyboard(aliases: Iterable[str]):
+    buttons = [[btn("🆕 Новые", "view_new"), btn("🔎 Поиск", "view_search")]]
+    buttons.extend([btn(f"{alias}", f"view:{alias}")] for alias in aliases)
     buttons.append([btn("📄 Получить файл", "download_messages"), btn("🔙 Главное меню", "back")])
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 
 def back_to_board_keyboard():
     return InlineKeyboardMarkup(inline_keyboard=[[btn("🔙 Вернуться к списку", "view")]])
+
+
+def search_results_keyboard(aliases: Iterable[str], page: int, pages: int):
+    buttons = [[btn(f"{alias}", f"view:{alias}")] for alias in aliases]
+    navigation = []
+    if page > 0:
+        navigation.append(btn("◀️", f"search_page:{page - 1}"))
+    if page < pages - 1:
+        navigation.append(btn("▶️", f"search_page:{page + 1}"))
+    if navigation:
+        buttons.append(navigation)
+    buttons.append([btn("🔎 Искать ещё", "view_search"), btn("🔙 Вернуться к списку", "view")])
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
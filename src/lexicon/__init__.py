@@ -0,0 +1,104 @@
+from functools import lru_cache
+from html import escape
+from string import Formatter
+from typing import Any, Dict, Optional
+
+from src.config import config
+from src.lexicon.en import EnLexicon
+from src.lexicon.ru import Lexicon
+
+LOCALES = {"ru": Lexicon, "en": EnLexicon}
+DEFAULT_LOCALE = "ru"
+GREETING_CACHE_SIZE = 1024
+
+
+class Template:
+    """
+    Строка лексикона, разобранная на литералы и подстановки один раз.
+    Подставляемые значения экранируются под ParseMode.HTML, с которым работает бот
+    """
+    __slots__ = ("source", "_parts")
+
+    def __init__(self, source: str):
+        self.source = source
+        self._parts = [(literal, field, spec) for literal, field, spec, _ in Formatter().parse(source)]
+
+    def render(self, **kwargs: Any) -> str:
+        chunks = []
+        for literal, field, spec in self._parts:
+            chunks.append(literal)
+            if field is not None:
+                chunks.append(escape(format(kwargs[field], spec or "")))
+        return "".join(chunks)
+
+    # Совместимость со str.format для мест, где шаблон используется как строка
+    format = render
+
+    def __str__(self) -> str:
+        return self.source
+
+
+class TemplateCatalog:
+    """
+    Скомпилированный лексикон одной локали. Строки без подстановок отдаются как есть,
+    строки с подстановками - как Template. Приветствия кэшируются по label
+    """
+
+    def __init__(self, lexicon_cls: type):
+        self.locale_cls = lexicon_cls
+        self._entries: Dict[str, Any] = {}
+        for name in dir(lexicon_cls):
+            if not name.isupper():
+                continue
+            value = getattr(lexicon_cls, name)
+            if isinstance(value, str) and any(field for _, field, _, _ in Formatter().parse(value)):
+                value = Template(value)
+            self._entries[name] = value
+        greeting, start_greeting = self._entries["GREETING"], self._entries["GREETING_START"]
+        self.greeting = lru_cache(maxsize=GREETING_CACHE_SIZE)(lambda label: greeting.render(label=label))
+        self.start_greeting = lru_cache(maxsize=GREETING_CACHE_SIZE)(lambda label: start_greeting.render(label=label))
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self._entries[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def error(self, error: Optional[str]) -> str:
+        return self._entries["MSG_ERROR"].render(error=error)
+
+
+_catalogs: Dict[str, TemplateCatalog] = {}
+_active: Optional[TemplateCatalog] = None
+
+
+def load_locales() -> TemplateCatalog:
+    """
+    Скомпилировать все локали и выбрать активную по config.LOCALE. Вызывается один раз при старте,
+    при обращении к lexicon до вызова выполняется автоматически
+    """
+    global _active
+    for locale, lexicon_cls in LOCALES.items():
+        _catalogs[locale] = TemplateCatalog(lexicon_cls)
+    _active = _catalogs.get(config.LOCALE) or _catalogs[DEFAULT_LOCALE]
+    return _active
+
+
+def get_templates(locale: Optional[str] = None) -> TemplateCatalog:
+    if _active is None:
+        load_locales()
+    if locale is None:
+        return _active
+    return _catalogs.get(locale, _active)
+
+
+class _ActiveLexicon:
+    """
+    Точка доступа к лексикону активной локали: lexicon.MSG_START, lexicon.greeting(label) и т.д.
+    """
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(get_templates(), name)
+
+
+lexicon = _ActiveLexicon()
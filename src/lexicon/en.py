@@ -0,0 +1,74 @@
+from src.lexicon.ru import Lexicon
+
+
+class EnLexicon(Lexicon):
+    # Messages
+    START_CMD = 'what would you like to do?'
+    MSG_START = 'at your service ✨'
+    GREETING = '{label}, what would you like to do?'
+    GREETING_START = '{label}, at your service ✨'
+    MSG_SELECT_RECIPIENT = 'Whose fence are we writing on?'
+    MSG_WRITE_ALIAS = "How would you like to introduce yourself?\n\n" \
+                      "Type your own alias or use the one assigned by the admin"
+    MSG_ENTER_MESSAGE = 'Type your message:'
+    MSG_MESSAGE_SENT = '💾 Fence saved!'
+    MSG_ADDED_CHUNK = '✏️ Message added. Keep writing or press «💾 Сохранить».'
+    MSG_WARNING_LEAVE = '⚠️Really cancel? All unsaved messages will be lost'
+    MSG_APPLY = 'Applying...'
+    MSG_SELECT_REMOVED_USER = "Choose a user to remove:"
+
+    MSG_WHY_SEND_MESSAGE = "Who should receive the bot message?"
+    MSG_ENTRY_MESSAGE_FROM_BOT = "Type a message (text, photo, video, sticker, etc.):"
+
+    MSG_EMPTY_BOARD = 'Your fence is empty so far'
+    MSG_EMPTY_MSG = '❌ The message is empty. Write something.'
+    MSG_NO_EMPTY_BOARD = 'There is something on your fence'
+    MSG_NEW_LETTERS = '📬 New messages on your fence: {count}. Take a look in «📬 Посмотреть свой заборчик»'
+    MSG_EOL_BOARD = 'Those were all messages from: {alias}'
+    MSG_NO_NEW_LETTERS = 'No new messages, you have read everything 🙌'
+    MSG_SEARCH_ENTER = '🔎 What are we looking for? Type a word or a phrase from the message'
+    MSG_SEARCH_EMPTY = 'Nothing found for «{query}»'
+    MSG_SEARCH_RESULTS = '🔎 «{query}»: messages found - {count}'
+    MSG_SEARCH_HIT = '<b>{alias}</b>: {snippet}'
+    MSG_EOL_DATETIME_MSG = "⏳ The bot's writing period is over."
+    MSG_SELECT_FUTURE_ADMIN = "Choose the future admin"
+    MSG_SELECT_EVENT = "Which fence are we working with?"
+    MSG_EVENT_SELECTED = "✅ Current fence: {event}"
+    MSG_SINGLE_EVENT = "You take part in only one fence"
+
+    # Errors
+    MSG_ERROR = '⚠️ {error}'
+    ACCESS_DENIED = '🚫 Access denied! Looks like you got into the wrong squad'
+    MSG_UNKNOWING_ERROR = "🧐  Either I didn't understand you or something went wrong. Consider telling the admin\n"
+    MSG_ERROR_EMPTY_TEXT = '⚠️ Only text messages are allowed here. Stickers, audio and other content are not'
+    MSG_THROTTLED = '🐢 Slow down! Too many messages, wait a bit'
+    MSG_DRAFT_TOO_LONG = '✋ The message is too long, no more parts can be added. Press «💾 Сохранить»'
+    NO_ADMIN_RIGHT = "❌ You don't have admin rights."
+    MSG_NO_REMOVE_MEMBER = "❌ No members to remove"
+    MSG_ALL_ADMIN = "❌ All users are already admins"
+    MSG_NO_ADMIN = "Choose the former admin"
+    MSG_NO_MEMBER_TO_SEND = "❌ No users to send the message to."
+
+    # Administration
+    MSG_MAIN_CONTROL_PANEL = "🔧 Bot control panel:"
+    MSG_ADD_USER_ROLE = 'Who do you want to add?'
+    MSG_ENTER_ADD_USERNAME = "Enter the username (without @):"
+    MSG_ENTER_ADD_ALIAS = "Enter the display name:"
+    MSG_ADDING_USER = 'Adding the member...'
+    MSG_SET_DATETIME = 'Enter the date and time as DD.MM.YYYY HH:MM:SS'
+    MSG_BROADCAST_STATUS = '📈 Recent broadcasts:'
+    MSG_BROADCAST_CHECK_STATUS = 'Progress is available in «📈 Статус рассылок».'
+    MSG_NO_BROADCASTS = 'No broadcasts yet'
+    MSG_SET_SCHEDULE_DATETIME = 'When should the broadcast go out? Enter the date and time as DD.MM.YYYY HH:MM:SS'
+    MSG_SCHEDULED = '🗓 Scheduled:'
+    MSG_STATS = '📊 Fence statistics'
+    MSG_STATS_LOOP = '⏱ Loop lag: p50 ≤ {p50} ms, p99 ≤ {p99} ms, max {max} ms, stalls: {stalls}'
+    MSG_STATS_DROPPED = '🛡 Dropped updates: {duplicates} duplicates, {throttled} throttled'
+    MSG_ARCHIVE_BUILDING = '🗄 Building the archive, this may take a while...'
+    MSG_ARCHIVE_READY = '🗄 Archive of all fences'
+    MSG_ARCHIVE_SAVED = '🗄 The archive is saved on the server: {path}'
+    MSG_COLD_NONE = '🧊 The fences of this event are in the database. Once it is over, they can go to cold storage'
+    MSG_COLD_ARCHIVED = ('🧊 The fences are in cold storage since {date}: {boards} fences, {messages} messages. '
+                         'Members cannot see them until they are restored')
+    MSG_COLD_RESTORED = '♨️ Fences restored: {boards}'
+    MSG_EOL_REMINDER = '⏳ {hours} h left to write on the fences. Make sure you write to everyone you wanted to!'
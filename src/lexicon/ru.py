@@ -5,6 +5,8 @@ class Lexicon:
     # Сообщения
     START_CMD = 'что хочешь сделать?'
     MSG_START = 'к твоим услугам ✨'
+    GREETING = '{label}, что хочешь сделать?'
+    GREETING_START = '{label}, к твоим услугам ✨'
     MSG_SELECT_RECIPIENT = 'На чьем заборчике будем писать?'
     MSG_WRITE_ALIAS = "Как ты хочешь представиться?\n\n" \
                       "Можно ввести свой псевдоним либо воспользоваться тем, который присвоил админ"
@@ -21,15 +23,27 @@ class Lexicon:
     MSG_EMPTY_BOARD = 'Пока ваш заборчик пуст'
     MSG_EMPTY_MSG = '❌ Сообщение пустое. Напиши что-нибудь.'
     MSG_NO_EMPTY_BOARD = 'На твоём заборчике кое-что есть'
-    MSG_EOL_BOARD = 'Это были все сообщения от пользователя:'
+    MSG_NEW_LETTERS = '📬 Новых сообщений на твоём заборчике: {count}. Загляни в «📬 Посмотреть свой заборчик»'
+    MSG_EOL_BOARD = 'Это были все сообщения от пользователя: {alias}'
+    MSG_NO_NEW_LETTERS = 'Новых сообщений нет, ты уже всё прочитал 🙌'
+    MSG_SEARCH_ENTER = '🔎 Что ищем? Введи слово или фразу из сообщения'
+    MSG_SEARCH_EMPTY = 'Ничего не нашлось по запросу «{query}»'
+    MSG_SEARCH_RESULTS = '🔎 «{query}»: найдено сообщений - {count}'
+    MSG_SEARCH_HIT = '<b>{alias}</b>: {snippet}'
     MSG_EOL_DATETIME_MSG = "⏳ Время действия бота истекло."
     MSG_SELECT_FUTURE_ADMIN = "Выберите будущего админа"
+    MSG_SELECT_EVENT = "В каком заборчике работаем?"
+    MSG_EVENT_SELECTED = "✅ Текущий заборчик: {event}"
+    MSG_SINGLE_EVENT = "Ты участвуешь только в одном заборчике"
 
     # Нештатное поведение
+    MSG_ERROR = '⚠️ {error}'
     ACCESS_DENIED = '🚫 Доступ запрещен! Кажется ты залез не в свой отряд'
     MSG_UNKNOWING_ERROR = "🧐  Либо я тебя не понял, либо что-то пошло не так. Имеет смысл сообщить админу\n"
     MSG_ERROR_EMPTY_TEXT = '⚠️ Йоу, здесь допускается только текстовое сообщение. ' \
                            'Стикеры, аудио и иной контент недопустим'
+    MSG_THROTTLED = '🐢 Помедленнее! Слишком много сообщений, подожди немного'
+    MSG_DRAFT_TOO_LONG = '✋ Заборчик получился слишком длинным, больше частей добавить нельзя. Нажми «💾 Сохранить»'
     NO_ADMIN_RIGHT = "❌ У вас нет прав администратора."
     MSG_NO_REMOVE_MEMBER = "❌ Нет участников для удаления"
     MSG_ALL_ADMIN = "❌ Все пользователи уже админы"
@@ -43,6 +57,20 @@ class Lexicon:
     MSG_ENTER_ADD_ALIAS = "Введи отображаемое имя:"
     MSG_ADDING_USER = 'Добавление участника...'
     MSG_SET_DATETIME = 'Введи дату и время в формате ДД.ММ.ГГГГ ЧЧ:ММ:СС'
+    MSG_BROADCAST_STATUS = '📈 Последние рассылки:'
+    MSG_BROADCAST_CHECK_STATUS = 'Прогресс можно посмотреть в «📈 Статус рассылок».'
+    MSG_NO_BROADCASTS = 'Рассылок пока не было'
+    MSG_SET_SCHEDULE_DATETIME = 'Когда отправить рассылку? Введи дату и время в формате ДД.ММ.ГГГГ ЧЧ:ММ:СС'
+    MSG_SCHEDULED = '🗓 Запланировано:'
+    MSG_STATS = '📊 Статистика заборчиков'
+    MSG_STATS_LOOP = '⏱ Задержка цикла: p50 ≤ {p50} мс, p99 ≤ {p99} мс, макс. {max} мс, зависаний: {stalls}'
+    MSG_STATS_DROPPED = '🛡 Отброшено апдейтов: повторных {duplicates}, флуда {throttled}'
+    MSG_ARCHIVE_BUILDING = '🗄 Собираю архив, это может занять время...'
+    MSG_ARCHIVE_READY = '🗄 Архив всех заборчиков'
+    MSG_ARCHIVE_SAVED = '🗄 Архив сохранен на сервере: {path}'
+    MSG_COLD_NONE = '🧊 Заборчики мероприятия в БД. После завершения их можно перенести в холодный архив'
+    MSG_COLD_ARCHIVED = ('🧊 Заборчики в холодном архиве с {date}: {boards} заборчиков, {messages} сообщений. '
+                         'Участники не видят их, пока заборчики не восстановлены')
+    MSG_COLD_RESTORED = '♨️ Восстановлено заборчиков: {boards}'
+    MSG_EOL_REMINDER = '⏳ До конца написания заборчиков осталось {hours} ч. Успей написать всем, кому хотел!'
 
-
-lexicon = Lexicon()
@@ -3,7 +3,7 @@ from typing import Callable, Awaitable, Any, Dict, Union
 from aiogram import BaseMiddleware
 from aiogram.types import Message, CallbackQuery
 
-from src.config import config
+from src.lexicon import lexicon
 from src.services import FencesService
 from src.utils.logger import logger
 
@@ -15,12 +15,14 @@ class AccessControlMiddleware(BaseMiddleware):
         if isinstance(event, CallbackQuery) and event.data.startswith(('admin', 'add_user_', 'rm_')):
             return await handler(event, data)
 
-        username = event.from_user.username
+        user = event.from_user
         service: FencesService = data["service"]
 
-        if not await service.is_allowed(username):
-            logger.warning("[ACCESS DENIED] @%s", username)
-            text = config.ACCESS_DENIED
+        if not await service.is_allowed_user(user.id, user.username):
+            if not service.should_reply_denied(user.id):
+                return
+            logger.warning("[ACCESS DENIED] @%s (%s)", user.username, user.id)
+            text = lexicon.ACCESS_DENIED
             if isinstance(event, Message):
                 await event.answer(text)
             elif isinstance(event, CallbackQuery):
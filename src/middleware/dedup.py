@@ -0,0 +1,102 @@
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Awaitable, Any, Dict, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import Update
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo.errors import CollectionInvalid, DuplicateKeyError, PyMongoError
+
+from src.config import config
+from src.db.resilience import MongoCircuitBreaker
+from src.utils.logger import logger
+
+
+async def init_updates_collection(db: AsyncIOMotorDatabase, size: int) -> AsyncIOMotorCollection:
+    """
+    Capped-коллекция обработанных update_id: хранит последние size апдейтов, старые вытесняются сами
+    """
+    try:
+        await db.create_collection("fences_bot_updates", capped=True, size=size * 64, max=size)
+        logger.info("Created capped collection 'fences_bot_updates' for %d updates", size)
+    except CollectionInvalid:
+        pass
+    return db.fences_bot_updates
+
+
+class UpdateDeduplicationMiddleware(BaseMiddleware):
+    """
+    Отбрасывание повторно доставленных апдейтов (перезапуск после сбоя, повтор Telegram) по update_id.
+    Регистрируется на dp.update первой, поэтому дубликат не доходит ни до антифлуда, ни до проверки доступа.
+    Последние size успешно обработанных update_id помнятся в памяти, а с коллекцией - и между перезапусками.
+    Апдейт, который еще обрабатывается, тоже считается дубликатом
+    """
+
+    def __init__(self, size: int = 10000, collection: Optional[AsyncIOMotorCollection] = None,
+                 breaker: Optional[MongoCircuitBreaker] = None):
+        self.size = size
+        self.collection = collection
+        self.breaker = breaker
+        self._seen: OrderedDict[int, None] = OrderedDict()
+        self._in_flight: set[int] = set()
+        self.duplicates = 0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+    def _remember(self, update_id: int):
+        self._seen[update_id] = None
+        self._seen.move_to_end(update_id)
+        if len(self._seen) > self.size:
+            self._seen.popitem(last=False)
+
+    def _drop(self, update_id: int, reason: str):
+        self.duplicates += 1
+        logger.info("[DUPLICATE] update %s dropped (%s)", update_id, reason)
+
+    async def __call__(self, handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+                       event: Update, data: Dict[str, Any]) -> Any:
+        update_id = event.update_id
+        if update_id in self._in_flight:
+            self._drop(update_id, "in flight")
+            return None
+        if update_id in self._seen:
+            self._drop(update_id, "recently processed")
+            return None
+
+        persist = self.collection is not None and not (self.breaker is not None and self.breaker.is_open)
+        self._in_flight.add(update_id)
+        try:
+            if persist:
+                try:
+                    if await self.collection.find_one({"_id": update_id}, {"_id": 1}) is not None:
+                        self._drop(update_id, "processed before restart")
+                        return None
+                except PyMongoError as e:
+                    # Без БД апдейт все равно обрабатывается: лучше редкий дубль, чем потерянный апдейт
+                    logger.warning("Failed to check update %s: %s", update_id, str(e))
+                    persist = False
+            result = await handler(event, data)
+        finally:
+            self._in_flight.discard(update_id)
+        # update_id запоминается только после обработки: апдейт, обработка которого оборвалась падением
+        # процесса или исключением, при повторной доставке будет обработан снова
+        self._remember(update_id)
+        if persist:
+            try:
+                await self.collection.insert_one({"_id": update_id, "received_at": datetime.now()})
+            except DuplicateKeyError:
+                pass
+            except PyMongoError as e:
+                logger.warning("Failed to persist update %s: %s", update_id, str(e))
+        return result
+
+
+async def create_dedup_middleware(db: AsyncIOMotorDatabase,
+                                  breaker: Optional[MongoCircuitBreaker] = None) -> UpdateDeduplicationMiddleware:
+    """
+    Middleware с параметрами из config. Пока цепь MongoDB разомкнута, update_id помнятся только в памяти
+    """
+    collection = await init_updates_collection(db, config.DEDUP_CACHE_SIZE) if config.DEDUP_PERSIST else None
+    return UpdateDeduplicationMiddleware(size=config.DEDUP_CACHE_SIZE, collection=collection, breaker=breaker)
@@ -0,0 +1,23 @@
+from typing import Callable, Awaitable, Any, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, User
+
+from src.tenants import TenantRegistry
+
+
+class TenantMiddleware(BaseMiddleware):
+    """
+    Подставляет в хендлеры service и repo мероприятия, к которому относится пользователь
+    """
+
+    def __init__(self, registry: TenantRegistry):
+        self.registry = registry
+
+    async def __call__(self, handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+                       event: TelegramObject, data: Dict[str, Any]) -> Any:
+        user: User | None = data.get("event_from_user")
+        service = await self.registry.resolve(user) if user is not None else self.registry.default
+        data["service"] = service
+        data["repo"] = service.repo
+        return await handler(event, data)
@@ -0,0 +1,74 @@
+from typing import Callable, Awaitable, Any, Dict, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import Update, User
+
+from src.config import config
+from src.lexicon import lexicon
+from src.utils.logger import logger
+from src.utils.rate_limit import TokenBucket
+
+# Сколько корзин держать, прежде чем выкинуть полные (неактивных пользователей)
+PRUNE_THRESHOLD = 10000
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """
+    Ограничение частоты апдейтов от одного пользователя: своя корзина на каждую группу (сообщения и колбэки).
+    Регистрируется на dp.update до TenantMiddleware, поэтому лишние апдейты отбрасываются
+    до обращений к БД и FSM. О превышении лимита пользователь узнает один раз, пока не перестанет спамить
+    """
+
+    def __init__(self, limits: Optional[Dict[str, tuple[float, float]]] = None):
+        self.limits = limits or {
+            "message": (config.THROTTLE_MESSAGE_RATE, config.THROTTLE_MESSAGE_BURST),
+            "callback_query": (config.THROTTLE_CALLBACK_RATE, config.THROTTLE_CALLBACK_BURST),
+        }
+        self._buckets: Dict[tuple[str, int], TokenBucket] = {}
+        self._warned: set[tuple[str, int]] = set()
+        self.rejected = 0
+
+    def _bucket(self, key: tuple[str, int]) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= PRUNE_THRESHOLD:
+                self._prune()
+            rate, burst = self.limits[key[0]]
+            bucket = self._buckets[key] = TokenBucket(rate=rate, capacity=burst)
+        return bucket
+
+    def _prune(self):
+        for key in [key for key, bucket in self._buckets.items() if bucket.is_full()]:
+            del self._buckets[key]
+            self._warned.discard(key)
+
+    async def __call__(self, handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+                       event: Update, data: Dict[str, Any]) -> Any:
+        user: User | None = data.get("event_from_user")
+        group = event.event_type
+        if user is None or group not in self.limits:
+            return await handler(event, data)
+
+        key = (group, user.id)
+        if self._bucket(key).try_acquire():
+            self._warned.discard(key)
+            return await handler(event, data)
+
+        self.rejected += 1
+        if key not in self._warned:
+            self._warned.add(key)
+            logger.warning("[THROTTLED] @%s (%s)", user.username, group)
+            try:
+                if event.callback_query is not None:
+                    await event.callback_query.answer(lexicon.MSG_THROTTLED)
+                elif event.message is not None:
+                    await event.message.answer(lexicon.MSG_THROTTLED)
+            except Exception as e:
+                logger.debug("Failed to warn throttled user %s: %s", user.id, str(e))
+        elif event.callback_query is not None:
+            # Без ответа на колбэк у пользователя крутится индикатор загрузки
+            try:
+                await event.callback_query.answer()
+            except Exception:
+                pass
+        return None
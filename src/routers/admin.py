@@ -1,15 +1,28 @@
-from aiogram import Router, F, Bot
+import os
+from datetime import datetime
+from html import escape
+from typing import Optional
+
+from aiogram import Router, F
+from aiogram.exceptions import TelegramBadRequest, TelegramEntityTooLarge
 from aiogram.fsm.context import FSMContext
-from aiogram.types import CallbackQuery, Message
+from aiogram.types import CallbackQuery, FSInputFile, Message
 
 from src.keyboards.admin_keyboards import choose_user_to_remove_keyboard, bot_message_type_keyboard, \
-    bot_message_recipient_keyboard, admin_panel_keyboard
+    bot_message_recipient_keyboard, admin_panel_keyboard, broadcast_status_keyboard, broadcast_job_keyboard, \
+    stats_keyboard, cold_storage_keyboard
+from src.config import config
 from src.keyboards.general_keyboards import main_menu, message_keyboard, cancel_sending_keyboard
 from src.lexicon import lexicon
+from src.middleware.dedup import UpdateDeduplicationMiddleware
+from src.middleware.throttling import ThrottlingMiddleware
 from src.services import FencesService
 from src.states import AdminState
 from src.utils.logger import logger
+from src.utils.loop import LoopLagWatchdog
 from src.utils.static import validate_alias
+from src.workers.cold_storage import ARCHIVED
+from src.workers.scheduler import Scheduler
 
 router = Router()
 
@@ -71,13 +84,13 @@ async def save_new_user(msg: Message, state: FSMContext, service: FencesService)
 
         valid, error = validate_alias(label)
         if not valid:
-            await msg.answer(f"⚠️ {error}")
+            await msg.answer(lexicon.error(error))
             await msg.answer(lexicon.MSG_ENTER_ADD_ALIAS)
             return
 
         success, err = await service.add_user(username, label, role='member')
         if not success:
-            await msg.answer(f"⚠️ {err}")
+            await msg.answer(lexicon.error(err))
             await msg.answer(lexicon.MSG_ENTER_ADD_ALIAS)
             return
 
@@ -96,7 +109,7 @@ async def list_users_to_remove(callback: CallbackQuery, state: FSMContext, servi
         users, error = await service.get_users(role='all')
         if error:
             logger.error("Error retrieving users for removal: %s", error)
-            await callback.message.edit_text(f"⚠️ {error}", reply_markup=admin_panel_keyboard())
+            await callback.message.edit_text(lexicon.error(error), reply_markup=admin_panel_keyboard())
             await state.set_state(AdminState.choosing_action)
             return
 
@@ -124,7 +137,7 @@ async def confirm_user_removal(callback: CallbackQuery, state: FSMContext, servi
         success, error = await service.remove_user(label)
         if not success:
             logger.error("Error removing user %s: %s", label, error)
-            await callback.message.edit_text(f"⚠️ {error}", reply_markup=admin_panel_keyboard())
+            await callback.message.edit_text(lexicon.error(error), reply_markup=admin_panel_keyboard())
             await state.set_state(AdminState.choosing_action)
             return
 
@@ -145,7 +158,7 @@ async def list_users_to_add_root(callback: CallbackQuery, state: FSMContext, ser
         users, error = await service.get_users(role='member')
         if error:
             logger.error("Error retrieving users for add_root: %s", error)
-            await callback.message.edit_text(f"⚠️ {error}", reply_markup=admin_panel_keyboard())
+            await callback.message.edit_text(lexicon.error(error), reply_markup=admin_panel_keyboard())
             await state.set_state(AdminState.choosing_action)
             return
 
@@ -172,7 +185,7 @@ async def list_users_to_remove_root(callback: CallbackQuery, state: FSMContext,
         users, error = await service.get_users(role='admin')
         if error:
             logger.error("Error retrieving admins for delete_root: %s", error)
-            await callback.message.edit_text(f"⚠️ {error}", reply_markup=admin_panel_keyboard())
+            await callback.message.edit_text(lexicon.error(error), reply_markup=admin_panel_keyboard())
             await state.set_state(AdminState.choosing_action)
             return
 
@@ -200,7 +213,7 @@ async def confirm_user_root(callback: CallbackQuery, state: FSMContext, service:
         success, error = await service.set_admin_flag(alias=alias, admin_flag=True)
         if not success:
             logger.error("Error setting admin flag for %s: %s", alias, error)
-            await callback.message.edit_text(f"⚠️ {error}", reply_markup=admin_panel_keyboard())
+            await callback.message.edit_text(lexicon.error(error), reply_markup=admin_panel_keyboard())
             await state.set_state(AdminState.choosing_action)
             return
 
@@ -222,7 +235,7 @@ async def delete_user_root(callback: CallbackQuery, state: FSMContext, service:
         success, error = await service.set_admin_flag(alias=alias, admin_flag=False)
         if not success:
             logger.error("Error unsetting admin flag for %s: %s", alias, error)
-            await callback.message.edit_text(f"⚠️ {error}", reply_markup=admin_panel_keyboard())
+            await callback.message.edit_text(lexicon.error(error), reply_markup=admin_panel_keyboard())
             await state.set_state(AdminState.choosing_action)
             return
 
@@ -252,15 +265,17 @@ async def set_datetime_handler(callback: CallbackQuery, state: FSMContext, servi
 
 
 @router.message(AdminState.set_datetime)
-async def success_set_datetime(msg: Message, state: FSMContext, service: FencesService):
+async def success_set_datetime(msg: Message, state: FSMContext, service: FencesService, scheduler: Scheduler):
     try:
         await msg.answer(lexicon.MSG_APPLY)
         success, error = await service.set_datetime(msg.text)
         if not success:
-            await msg.answer(f"⚠️ {error}")
+            await msg.answer(lexicon.error(error))
             await msg.answer(lexicon.MSG_SET_DATETIME)
             return
 
+        await scheduler.sync_eol_reminders(service)
+
         await msg.answer(f'Время действия бота изменено на: {msg.text}', reply_markup=admin_panel_keyboard())
         await state.set_state(AdminState.choosing_action)
     except Exception as e:
@@ -296,7 +311,7 @@ async def bot_message_all(callback: CallbackQuery, state: FSMContext, service: F
         await callback.message.edit_text(lexicon.MSG_ENTRY_MESSAGE_FROM_BOT,
                                          reply_markup=message_keyboard())
         await state.set_state(AdminState.bot_message_typing)
-        await state.update_data(bot_recipient=None, bot_messages=[])
+        await state.update_data(bot_recipient=None, bot_messages=[], bot_schedule_at=None)
         await callback.answer()
     except Exception as e:
         logger.error("Error in bot_message_all for user %s: %s", callback.from_user.username, str(e))
@@ -312,7 +327,7 @@ async def choose_bot_message_recipient(callback: CallbackQuery, state: FSMContex
         contacts, error = await service.get_users(return_field='dict')
         if error:
             logger.error("Error retrieving contacts for bot message: %s", error)
-            await callback.message.edit_text(f"⚠️ {error}", reply_markup=admin_panel_keyboard())
+            await callback.message.edit_text(lexicon.error(error), reply_markup=admin_panel_keyboard())
             await state.set_state(AdminState.choosing_action)
             return
 
@@ -341,7 +356,7 @@ async def bot_message_single(callback: CallbackQuery, state: FSMContext, service
         contacts, error = await service.get_users(return_field='dict')
         if error:
             logger.error("Error retrieving contacts for bot message: %s", error)
-            await callback.message.edit_text(f"⚠️ {error}", reply_markup=admin_panel_keyboard())
+            await callback.message.edit_text(lexicon.error(error), reply_markup=admin_panel_keyboard())
             await state.set_state(AdminState.choosing_action)
             return
 
@@ -352,7 +367,7 @@ async def bot_message_single(callback: CallbackQuery, state: FSMContext, service
             await state.set_state(AdminState.choosing_action)
             return
 
-        await state.update_data(bot_recipient=recipient_label, bot_messages=[])
+        await state.update_data(bot_recipient=recipient_label, bot_messages=[], bot_schedule_at=None)
         await callback.message.edit_text(
             f"Введите сообщение (текст, фото, видео, стикер и т.д.) для {recipient_label}:",
             reply_markup=message_keyboard())
@@ -366,6 +381,42 @@ async def bot_message_single(callback: CallbackQuery, state: FSMContext, service
         await callback.answer()
 
 
+@router.callback_query(AdminState.bot_message_type, F.data == "bot_message_schedule")
+async def ask_bot_message_schedule(callback: CallbackQuery, state: FSMContext, service: FencesService):
+    try:
+        await callback.message.edit_text(lexicon.MSG_SET_SCHEDULE_DATETIME)
+        await state.set_state(AdminState.bot_message_schedule)
+        await callback.answer()
+    except Exception as e:
+        logger.error("Error in ask_bot_message_schedule for user %s: %s", callback.from_user.username, str(e))
+        await state.clear()
+        await callback.message.edit_text(lexicon.MSG_UNKNOWING_ERROR,
+                                         reply_markup=await main_menu(callback.from_user.username, service=service))
+        await callback.answer()
+
+
+@router.message(AdminState.bot_message_schedule)
+async def set_bot_message_schedule(msg: Message, state: FSMContext, service: FencesService):
+    try:
+        fire_at, error = service.parse_datetime(msg.text or "")
+        if not error and fire_at <= datetime.now():
+            error = "❌ Это время уже прошло"
+        if error:
+            await msg.answer(lexicon.error(error))
+            await msg.answer(lexicon.MSG_SET_SCHEDULE_DATETIME)
+            return
+
+        await state.update_data(bot_recipient=None, bot_messages=[],
+                                bot_schedule_at=fire_at.strftime(config.DATETIME_PATTERN))
+        await msg.answer(lexicon.MSG_ENTRY_MESSAGE_FROM_BOT, reply_markup=message_keyboard())
+        await state.set_state(AdminState.bot_message_typing)
+    except Exception as e:
+        logger.error("Error in set_bot_message_schedule for user %s: %s", msg.from_user.username, str(e))
+        await state.clear()
+        await msg.answer(lexicon.MSG_UNKNOWING_ERROR,
+                         reply_markup=await main_menu(msg.from_user.username, service=service))
+
+
 @router.message(AdminState.bot_message_typing)
 async def collect_bot_message(msg: Message, state: FSMContext, service: FencesService):
     try:
@@ -407,7 +458,8 @@ async def collect_bot_message(msg: Message, state: FSMContext, service: FencesSe
 
 
 @router.callback_query(AdminState.bot_message_typing, F.data == "save")
-async def send_bot_direct_message(callback: CallbackQuery, state: FSMContext, service: FencesService, bot: Bot):
+async def send_bot_direct_message(callback: CallbackQuery, state: FSMContext, service: FencesService,
+                                  scheduler: Scheduler):
     try:
         data = await state.get_data()
         messages = data.get("bot_messages", [])
@@ -419,16 +471,33 @@ async def send_bot_direct_message(callback: CallbackQuery, state: FSMContext, se
             return
 
         recipient_label = data.get("bot_recipient")
-        success, error = await service.send_bot_direct_message(bot, recipient_label, messages)
+        if data.get("bot_schedule_at"):
+            fire_at, _ = service.parse_datetime(data["bot_schedule_at"])
+            success, error = await scheduler.schedule_broadcast(service, fire_at, recipient_label, messages,
+                                                                created_by=callback.from_user.username)
+            if not success:
+                await callback.message.answer(lexicon.error(error), reply_markup=admin_panel_keyboard())
+            else:
+                await callback.message.answer(f"🗓 Рассылка запланирована на {data['bot_schedule_at']}.",
+                                              reply_markup=admin_panel_keyboard())
+                logger.info("Scheduled bot message at %s from %s", fire_at, callback.from_user.username)
+            await state.set_state(AdminState.choosing_action)
+            await callback.answer()
+            return
+
+        job_id, error = await service.enqueue_broadcast(recipient_label, messages,
+                                                        created_by=callback.from_user.username)
         target = "всем пользователям" if recipient_label is None else f"пользователю {recipient_label}"
-        if not success:
-            logger.error("Error sending bot message to %s: %s", target, error)
-            await callback.message.answer(f"⚠️ {error}", reply_markup=admin_panel_keyboard())
+        if error:
+            logger.error("Error queueing bot message to %s: %s", target, error)
+            await callback.message.answer(lexicon.error(error), reply_markup=admin_panel_keyboard())
             await state.set_state(AdminState.choosing_action)
             return
 
-        await callback.message.answer(f"✅ Сообщение от бота отправлено {target}.", reply_markup=admin_panel_keyboard())
-        logger.info("Sent bot message to %s from %s", target, callback.from_user.username)
+        await callback.message.answer(f"✅ Сообщение от бота поставлено в очередь на отправку {target} "
+                                      f"(#{job_id[-6:]}).\n{lexicon.MSG_BROADCAST_CHECK_STATUS}",
+                                      reply_markup=admin_panel_keyboard())
+        logger.info("Queued bot message %s to %s from %s", job_id, target, callback.from_user.username)
         await state.set_state(AdminState.choosing_action)
         await callback.answer()
     except Exception as e:
@@ -439,6 +508,248 @@ async def send_bot_direct_message(callback: CallbackQuery, state: FSMContext, se
         await callback.answer()
 
 
+def _format_broadcast(job: dict) -> str:
+    counts = job.get("counts", {})
+    target = "всем" if job.get("recipient_label") is None else job["recipient_label"]
+    return f"#{str(job['_id'])[-6:]} · {target} · {job['created_at']:%d.%m %H:%M}\n" \
+           f"    ✅ {counts.get('sent', 0)}/{job.get('total', 0)}  ❌ {counts.get('failed', 0)}  " \
+           f"⏳ {counts.get('pending', 0)}"
+
+
+@router.callback_query(F.data == "broadcast_status")
+async def broadcast_status(callback: CallbackQuery, state: FSMContext, service: FencesService,
+                           scheduler: Scheduler):
+    try:
+        if not await service.is_admin(callback.from_user.username):
+            logger.warning("User %s attempted to view broadcasts without permission", callback.from_user.username)
+            await callback.message.answer(lexicon.NO_ADMIN_RIGHT)
+            await callback.answer()
+            return
+
+        jobs = await service.get_broadcasts_progress()
+        text = "\n\n".join(_format_broadcast(job) for job in jobs) if jobs else lexicon.MSG_NO_BROADCASTS
+        upcoming = await scheduler.upcoming_for(service)
+        if upcoming:
+            text += f"\n\n{lexicon.MSG_SCHEDULED}\n" + "\n".join(
+                f"• {doc['fire_at']:%d.%m %H:%M} · "
+                f"{'напоминание о дедлайне' if doc['kind'] == 'eol_reminder' else 'рассылка'}" for doc in upcoming)
+        await callback.message.edit_text(f"{lexicon.MSG_BROADCAST_STATUS}\n\n{text}",
+                                         reply_markup=broadcast_status_keyboard(jobs))
+        await state.set_state(AdminState.choosing_action)
+        await callback.answer()
+    except Exception as e:
+        logger.error("Error in broadcast_status for user %s: %s", callback.from_user.username, str(e))
+        await state.clear()
+        await callback.message.edit_text(lexicon.MSG_UNKNOWING_ERROR,
+                                         reply_markup=await main_menu(callback.from_user.username, service=service))
+        await callback.answer()
+
+
+STATS_TOP = 10
+
+
+def _format_names(labels: list) -> str:
+    shown = ", ".join(escape(label) for label in labels[:STATS_TOP * 3])
+    rest = len(labels) - STATS_TOP * 3
+    return shown + (f" и ещё {rest}" if rest > 0 else "")
+
+
+def _format_stats(stats: dict) -> str:
+    lines = [lexicon.MSG_STATS, "", f"✉️ Всего сообщений: {stats['total']}"]
+    if stats["recipients"]:
+        lines.append("\n📬 Больше всего получили:")
+        lines.extend(f"• {escape(label)}: {count}" for label, count in stats["recipients"][:STATS_TOP] if count)
+    if stats["senders"]:
+        lines.append("\n✍️ Больше всего написали:")
+        lines.extend(f"• {escape(label)}: {count}" for label, count in stats["senders"][:STATS_TOP])
+    if stats["empty"]:
+        lines.append(f"\n🕳 Пустые заборчики ({len(stats['empty'])}): {_format_names(stats['empty'])}")
+    if stats["silent"]:
+        lines.append(f"\n🤐 Еще никому не написали ({len(stats['silent'])}): {_format_names(stats['silent'])}")
+    if stats["hourly"]:
+        lines.append("\n⏱ Сообщений по часам за сутки:")
+        lines.extend(f"• {hour}: {count}" for hour, count in stats["hourly"])
+    return "\n".join(lines)
+
+
+@router.callback_query(F.data == "stats")
+async def show_stats(callback: CallbackQuery, state: FSMContext, service: FencesService,
+                     dedup: UpdateDeduplicationMiddleware, throttling: ThrottlingMiddleware,
+                     loop_watchdog: Optional[LoopLagWatchdog] = None):
+    try:
+        if not await service.is_admin(callback.from_user.username):
+            logger.warning("User %s attempted to view stats without permission", callback.from_user.username)
+            await callback.message.answer(lexicon.NO_ADMIN_RIGHT)
+            await callback.answer()
+            return
+
+        stats, error = await service.get_stats()
+        if error:
+            await callback.message.edit_text(lexicon.error(error), reply_markup=admin_panel_keyboard())
+            await callback.answer()
+            return
+        try:
+            dropped = lexicon.MSG_STATS_DROPPED.render(duplicates=dedup.duplicates, throttled=throttling.rejected)
+            text = f"{_format_stats(stats)}\n\n{dropped}"
+            if loop_watchdog is not None:
+                lag = loop_watchdog.summary()
+                text += "\n" + lexicon.MSG_STATS_LOOP.render(p50=f"{lag['p50']:g}", p99=f"{lag['p99']:g}",
+                                                             max=f"{lag['max']:.0f}", stalls=lag["stalls"])
+            await callback.message.edit_text(text, reply_markup=stats_keyboard())
+        except TelegramBadRequest as e:
+            # «Обновить» в пределах STATS_CACHE_TTL возвращает тот же текст
+            if "message is not modified" not in str(e):
+                raise
+        await state.set_state(AdminState.choosing_action)
+        await callback.answer()
+    except Exception as e:
+        logger.error("Error in show_stats for user %s: %s", callback.from_user.username, str(e))
+        await state.clear()
+        await callback.message.edit_text(lexicon.MSG_UNKNOWING_ERROR,
+                                         reply_markup=await main_menu(callback.from_user.username, service=service))
+        await callback.answer()
+
+
+@router.callback_query(F.data == "archive")
+async def send_archive(callback: CallbackQuery, state: FSMContext, service: FencesService):
+    try:
+        if not await service.is_admin(callback.from_user.username):
+            logger.warning("User %s attempted to download archive without permission", callback.from_user.username)
+            await callback.message.answer(lexicon.NO_ADMIN_RIGHT)
+            await callback.answer()
+            return
+
+        await callback.answer(lexicon.MSG_ARCHIVE_BUILDING)
+        path, error = await service.build_archive()
+        if error:
+            await callback.message.answer(lexicon.error(error), reply_markup=admin_panel_keyboard())
+            return
+        try:
+            await callback.message.answer_document(FSInputFile(path), caption=lexicon.MSG_ARCHIVE_READY)
+            logger.info("User %s downloaded archive %s", callback.from_user.username, path)
+            if config.ARCHIVE_DIR:
+                await callback.message.answer(lexicon.MSG_ARCHIVE_SAVED.render(path=path))
+            else:
+                os.unlink(path)
+        except TelegramEntityTooLarge:
+            # Больше лимита Bot API на загрузку: архив остается на сервере
+            logger.warning("Archive %s is too large to send", path)
+            await callback.message.answer(lexicon.MSG_ARCHIVE_SAVED.render(path=path))
+        except Exception:
+            if not config.ARCHIVE_DIR:
+                os.unlink(path)
+            raise
+        await callback.message.answer(lexicon.MSG_MAIN_CONTROL_PANEL, reply_markup=admin_panel_keyboard())
+        await state.set_state(AdminState.choosing_action)
+    except Exception as e:
+        logger.error("Error in send_archive for user %s: %s", callback.from_user.username, str(e))
+        await state.clear()
+        await callback.message.answer(lexicon.MSG_UNKNOWING_ERROR,
+                                      reply_markup=await main_menu(callback.from_user.username, service=service))
+
+
+async def _cold_status(service: FencesService) -> tuple[str, bool]:
+    entry = await service.repo.get_cold_entry()
+    if entry is None or entry.get("status") != ARCHIVED:
+        return lexicon.MSG_COLD_NONE, False
+    return lexicon.MSG_COLD_ARCHIVED.render(date=f"{entry['archived_at']:%d.%m.%Y}", boards=entry["boards"],
+                                            messages=entry["messages"]), True
+
+
+@router.callback_query(F.data == "cold")
+async def cold_storage(callback: CallbackQuery, state: FSMContext, service: FencesService):
+    try:
+        if not await service.is_admin(callback.from_user.username):
+            logger.warning("User %s attempted to open cold storage without permission", callback.from_user.username)
+            await callback.message.answer(lexicon.NO_ADMIN_RIGHT)
+            await callback.answer()
+            return
+
+        text, archived = await _cold_status(service)
+        await callback.message.edit_text(text, reply_markup=cold_storage_keyboard(archived))
+        await state.set_state(AdminState.choosing_action)
+        await callback.answer()
+    except Exception as e:
+        logger.error("Error in cold_storage for user %s: %s", callback.from_user.username, str(e))
+        await state.clear()
+        await callback.message.edit_text(lexicon.MSG_UNKNOWING_ERROR,
+                                         reply_markup=await main_menu(callback.from_user.username, service=service))
+        await callback.answer()
+
+
+@router.callback_query(AdminState.choosing_action, F.data.in_({"cold_archive", "cold_restore"}))
+async def cold_storage_action(callback: CallbackQuery, state: FSMContext, service: FencesService):
+    try:
+        if callback.data == "cold_archive":
+            _, error = await service.archive_to_cold()
+            text = None
+        else:
+            restored, error = await service.restore_from_cold()
+            text = None if error else lexicon.MSG_COLD_RESTORED.render(boards=restored)
+        if error:
+            await callback.message.edit_text(lexicon.error(error), reply_markup=admin_panel_keyboard())
+            await callback.answer()
+            return
+        logger.info("User %s ran %s for event '%s'", callback.from_user.username, callback.data, service.event)
+        status, archived = await _cold_status(service)
+        await callback.message.edit_text(f"{text}\n\n{status}" if text else status,
+                                         reply_markup=cold_storage_keyboard(archived))
+        await callback.answer()
+    except Exception as e:
+        logger.error("Error in cold_storage_action for user %s: %s", callback.from_user.username, str(e))
+        await state.clear()
+        await callback.message.edit_text(lexicon.MSG_UNKNOWING_ERROR,
+                                         reply_markup=await main_menu(callback.from_user.username, service=service))
+        await callback.answer()
+
+
+@router.callback_query(F.data.startswith("broadcast_job:"))
+async def broadcast_job_details(callback: CallbackQuery, state: FSMContext, service: FencesService):
+    try:
+        if not await service.is_admin(callback.from_user.username):
+            await callback.message.answer(lexicon.NO_ADMIN_RIGHT)
+            await callback.answer()
+            return
+
+        job_id = callback.data.split(":", 1)[1]
+        failed = await service.get_failed_recipients(job_id)
+        lines = [f"• {d['label']}: {d.get('error') or '—'}" for d in failed]
+        await callback.message.edit_text(f"❌ Не доставлено (#{job_id[-6:]}):\n" + "\n".join(lines),
+                                         reply_markup=broadcast_job_keyboard(job_id))
+        await callback.answer()
+    except Exception as e:
+        logger.error("Error in broadcast_job_details for user %s: %s", callback.from_user.username, str(e))
+        await state.clear()
+        await callback.message.edit_text(lexicon.MSG_UNKNOWING_ERROR,
+                                         reply_markup=await main_menu(callback.from_user.username, service=service))
+        await callback.answer()
+
+
+@router.callback_query(F.data.startswith("broadcast_retry:"))
+async def retry_broadcast(callback: CallbackQuery, state: FSMContext, service: FencesService):
+    try:
+        if not await service.is_admin(callback.from_user.username):
+            await callback.message.answer(lexicon.NO_ADMIN_RIGHT)
+            await callback.answer()
+            return
+
+        job_id = callback.data.split(":", 1)[1]
+        count, error = await service.retry_broadcast(job_id)
+        if error:
+            await callback.message.edit_text(lexicon.error(error), reply_markup=admin_panel_keyboard())
+        else:
+            await callback.message.edit_text(f"🔁 Повторная отправка поставлена в очередь для {count} получателей.",
+                                             reply_markup=admin_panel_keyboard())
+        await state.set_state(AdminState.choosing_action)
+        await callback.answer()
+    except Exception as e:
+        logger.error("Error in retry_broadcast for user %s: %s", callback.from_user.username, str(e))
+        await state.clear()
+        await callback.message.edit_text(lexicon.MSG_UNKNOWING_ERROR,
+                                         reply_markup=await main_menu(callback.from_user.username, service=service))
+        await callback.answer()
+
+
 @router.callback_query(AdminState.bot_message_typing, F.data == "cancel")
 async def cancel_sending_messages(callback: CallbackQuery):
     await callback.message.answer(lexicon.MSG_WARNING_LEAVE, reply_markup=cancel_sending_keyboard())
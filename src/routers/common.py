@@ -1,10 +1,12 @@
 from aiogram import Router, F
+from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.types import Message, CallbackQuery
 
 from src.lexicon import lexicon
-from src.keyboards.general_keyboards import main_menu, main_menu_reply_keyboard
+from src.keyboards.general_keyboards import main_menu, main_menu_reply_keyboard, events_keyboard
 from src.services import FencesService
+from src.tenants import TenantRegistry
 from src.utils.logger import logger
 
 router = Router()
@@ -26,7 +28,7 @@ async def start_cmd(msg: Message, service: FencesService, state: FSMContext):
     await state.clear()
     logger.info("User %s accessed main menu, chat_id %s", username, chat_id)
     await msg.answer("Привет!", reply_markup=main_menu_reply_keyboard())
-    await msg.answer(f"{label}, {lexicon.START_CMD}", reply_markup=await main_menu(username, service=service))
+    await msg.answer(lexicon.greeting(label), reply_markup=await main_menu(username, service=service))
 
 
 @router.callback_query(F.data == "back")
@@ -34,6 +36,32 @@ async def back_main_menu(callback: CallbackQuery, state: FSMContext, service: Fe
     await state.clear()
     username = callback.from_user.username
     label, _ = await service.get_user_label(username=username)
-    await callback.message.edit_text(f"{label}, {lexicon.START_CMD}",
+    await callback.message.edit_text(lexicon.greeting(label),
+                                     reply_markup=await main_menu(callback.from_user.username, service=service))
+    await callback.answer()
+
+
+@router.message(Command("event"))
+async def choose_event(msg: Message, registry: TenantRegistry):
+    events = await registry.events_of(msg.from_user.username)
+    if len(events) < 2:
+        await msg.answer(lexicon.MSG_SINGLE_EVENT)
+        return
+    await msg.answer(lexicon.MSG_SELECT_EVENT, reply_markup=events_keyboard(events))
+
+
+@router.callback_query(F.data.startswith("event:"))
+async def select_event(callback: CallbackQuery, state: FSMContext, registry: TenantRegistry):
+    event = callback.data.split(":", 1)[1]
+    service = registry.get(event)
+    if service is None or not await service.is_allowed(callback.from_user.username):
+        await callback.answer(lexicon.ACCESS_DENIED, show_alert=True)
+        return
+
+    registry.select(callback.from_user.id, event)
+    await state.clear()
+    logger.info("User %s switched to event %s", callback.from_user.username, event)
+    label, _ = await service.get_user_label(username=callback.from_user.username)
+    await callback.message.edit_text(f"{lexicon.MSG_EVENT_SELECTED.render(event=event)}\n\n{lexicon.greeting(label)}",
                                      reply_markup=await main_menu(callback.from_user.username, service=service))
     await callback.answer()
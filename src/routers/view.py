@@ -1,33 +1,37 @@
 from aiogram import Router, F
 from aiogram.fsm.context import FSMContext
-from aiogram.types import CallbackQuery, BufferedInputFile
+from aiogram.types import CallbackQuery, BufferedInputFile, FSInputFile, InlineKeyboardMarkup, Message
 
 from src.keyboards.general_keyboards import main_menu
-from src.keyboards.view_keyboards import user_messages_keyboard, back_to_board_keyboard
+from src.keyboards.view_keyboards import user_messages_keyboard, back_to_board_keyboard, search_results_keyboard
 from src.lexicon import lexicon
 from src.services import FencesService
+from src.states import ViewState
 from src.utils.logger import logger
 from src.utils.static import prepared_msg_file
 
 router = Router()
 
+SEARCH_PAGE_SIZE = 5
+
 
 @router.callback_query(F.data == "view")
 async def view_messages(callback: CallbackQuery, state: FSMContext, service: FencesService):
     try:
         username = callback.from_user.username
         label, _ = await service.get_user_label(username=username)
-        board = await service.get_messages_by_username(username)
-        if not board:
+        summary = await service.get_board_summary(username)
+        if not summary:
             logger.info("User %s has no messages on their board", username)
             await callback.message.answer(lexicon.MSG_EMPTY_BOARD)
-            await callback.message.answer(f"{label}, {lexicon.START_CMD}",
+            await callback.message.answer(lexicon.greeting(label),
                                           reply_markup=await main_menu(username, service=service))
             await state.clear()
             return
 
         logger.info("User %s viewed their message board", username)
-        await callback.message.edit_text(lexicon.MSG_NO_EMPTY_BOARD, reply_markup=await user_messages_keyboard(board))
+        aliases = [message["sender_alias"] for message in summary]
+        await callback.message.edit_text(lexicon.MSG_NO_EMPTY_BOARD, reply_markup=await user_messages_keyboard(aliases))
         await callback.answer()
     except Exception as e:
         logger.error("Error in view_messages for user %s: %s", callback.from_user.username, str(e))
@@ -41,20 +45,20 @@ async def view_messages(callback: CallbackQuery, state: FSMContext, service: Fen
 async def show_board_message(callback: CallbackQuery, state: FSMContext, service: FencesService):
     try:
         username = callback.from_user.username
-        board = await service.get_messages_by_username(username)
         alias = callback.data.split("view:", 1)[1]
+        parts = await service.get_message(username, alias)
 
-        if alias not in board:
+        if parts is None:
             logger.warning("Message not found for alias %s by user %s", alias, username)
             await callback.message.answer("❌ Сообщение не найдено.")
             await state.clear()
             await callback.message.answer(lexicon.MSG_START, reply_markup=await main_menu(username, service=service))
             return
 
-        for chunk in board[alias]:
-            await callback.message.answer(chunk)
+        for chunk in parts:
+            await callback.message.answer(chunk, parse_mode=None)
 
-        await callback.message.answer(f"{lexicon.MSG_EOL_BOARD} {alias}", reply_markup=back_to_board_keyboard())
+        await callback.message.answer(lexicon.MSG_EOL_BOARD.render(alias=alias), reply_markup=back_to_board_keyboard())
         await callback.answer()
     except Exception as e:
         logger.error("Error in show_board_message for user %s: %s", callback.from_user.username, str(e))
@@ -64,31 +68,141 @@ async def show_board_message(callback: CallbackQuery, state: FSMContext, service
         await callback.answer()
 
 
+@router.callback_query(F.data == "view_new")
+async def show_new_messages(callback: CallbackQuery, state: FSMContext, service: FencesService):
+    try:
+        username = callback.from_user.username
+        new_messages = await service.get_new_messages(username)
+        if not new_messages:
+            await callback.message.answer(lexicon.MSG_NO_NEW_LETTERS, reply_markup=back_to_board_keyboard())
+            await callback.answer()
+            return
+
+        for message in new_messages:
+            for chunk in message["parts"]:
+                await callback.message.answer(chunk, parse_mode=None)
+            await callback.message.answer(lexicon.MSG_EOL_BOARD.render(alias=message["sender_alias"]))
+
+        await service.mark_board_read(username, max(message["addition_time"] for message in new_messages))
+        logger.info("User %s read %d new messages", username, len(new_messages))
+        await callback.message.answer(lexicon.MSG_NO_EMPTY_BOARD, reply_markup=back_to_board_keyboard())
+        await callback.answer()
+    except Exception as e:
+        logger.error("Error in show_new_messages for user %s: %s", callback.from_user.username, str(e))
+        await state.clear()
+        await callback.message.answer(lexicon.MSG_UNKNOWING_ERROR,
+                                      reply_markup=await main_menu(callback.from_user.username, service=service))
+        await callback.answer()
+
+
+async def _search_page(service: FencesService, username: str, query: str,
+                       page: int) -> tuple[str, InlineKeyboardMarkup]:
+    hits = await service.search_board(username, query)
+    if not hits:
+        return lexicon.MSG_SEARCH_EMPTY.render(query=query), back_to_board_keyboard()
+    pages = (len(hits) + SEARCH_PAGE_SIZE - 1) // SEARCH_PAGE_SIZE
+    page = min(max(page, 0), pages - 1)
+    shown = hits[page * SEARCH_PAGE_SIZE:(page + 1) * SEARCH_PAGE_SIZE]
+    lines = [lexicon.MSG_SEARCH_RESULTS.render(query=query, count=len(hits))]
+    lines.extend(lexicon.MSG_SEARCH_HIT.render(alias=alias, snippet=snippet) for alias, snippet in shown)
+    return "\n\n".join(lines), search_results_keyboard([alias for alias, _ in shown], page, pages)
+
+
+@router.callback_query(F.data == "view_search")
+async def start_search(callback: CallbackQuery, state: FSMContext, service: FencesService):
+    try:
+        await state.set_state(ViewState.searching)
+        await callback.message.answer(lexicon.MSG_SEARCH_ENTER, reply_markup=back_to_board_keyboard())
+        await callback.answer()
+    except Exception as e:
+        logger.error("Error in start_search for user %s: %s", callback.from_user.username, str(e))
+        await state.clear()
+        await callback.message.answer(lexicon.MSG_UNKNOWING_ERROR,
+                                      reply_markup=await main_menu(callback.from_user.username, service=service))
+        await callback.answer()
+
+
+@router.message(ViewState.searching)
+async def search_messages(msg: Message, state: FSMContext, service: FencesService):
+    try:
+        if not msg.text or not msg.text.strip():
+            await msg.answer(lexicon.MSG_ERROR_EMPTY_TEXT)
+            await msg.answer(lexicon.MSG_SEARCH_ENTER, reply_markup=back_to_board_keyboard())
+            return
+
+        query = msg.text.strip()
+        text, keyboard = await _search_page(service, msg.from_user.username, query, 0)
+        # Запрос остается в данных FSM для перелистывания страниц
+        await state.set_state(None)
+        await state.update_data(search_query=query)
+        logger.info("User %s searched their board", msg.from_user.username)
+        await msg.answer(text, reply_markup=keyboard)
+    except Exception as e:
+        logger.error("Error in search_messages for user %s: %s", msg.from_user.username, str(e))
+        await state.clear()
+        await msg.answer(lexicon.MSG_UNKNOWING_ERROR,
+                         reply_markup=await main_menu(msg.from_user.username, service=service))
+
+
+@router.callback_query(F.data.startswith("search_page:"))
+async def search_page(callback: CallbackQuery, state: FSMContext, service: FencesService):
+    try:
+        query = (await state.get_data()).get("search_query")
+        if not query:
+            await state.set_state(ViewState.searching)
+            await callback.message.edit_text(lexicon.MSG_SEARCH_ENTER, reply_markup=back_to_board_keyboard())
+            await callback.answer()
+            return
+
+        page = int(callback.data.split(":", 1)[1])
+        text, keyboard = await _search_page(service, callback.from_user.username, query, page)
+        await callback.message.edit_text(text, reply_markup=keyboard)
+        await callback.answer()
+    except Exception as e:
+        logger.error("Error in search_page for user %s: %s", callback.from_user.username, str(e))
+        await state.clear()
+        await callback.message.edit_text(lexicon.MSG_UNKNOWING_ERROR,
+                                         reply_markup=await main_menu(callback.from_user.username, service=service))
+        await callback.answer()
+
+
 @router.callback_query(F.data == "download_messages")
 async def download_messages(callback: CallbackQuery, state: FSMContext, service: FencesService):
     try:
         username = callback.from_user.username
         label, _ = await service.get_user_label(username=username)
-        board = await service.get_messages_by_username(username)
-        if not board:
+        summary = await service.get_board_summary(username)
+        if not summary:
             logger.info("User %s has no messages to download", username)
             await callback.message.answer(lexicon.MSG_EMPTY_BOARD)
-            await callback.message.answer(f'{label}, {lexicon.MSG_START}',
+            await callback.message.answer(lexicon.start_greeting(label),
                                           reply_markup=await main_menu(username, service=service))
             await state.clear()
             return
 
-        file_content = prepared_msg_file(board)
-        file_data = file_content.getvalue().encode('utf-8')
-        file = BufferedInputFile(file_data, filename=f"messages_{username}.txt")
+        # Версия выгрузки - количество сообщений: готовый файл или file_id подходят, пока заборчик не изменился
+        version = len(summary)
+        file_id, path = await service.exports.lookup(username, version)
+        filename = f"messages_{username}.txt"
+        if file_id is not None:
+            file = file_id
+        elif path is not None:
+            file = FSInputFile(path, filename=filename)
+        else:
+            board = await service.get_messages_by_username(username)
+            file_content = prepared_msg_file(board)
+            file = BufferedInputFile(file_content.getvalue().encode('utf-8'), filename=filename)
+            file_content.close()
 
-        await callback.message.answer_document(file, caption="Ваши сообщения")
+        sent = await callback.message.answer_document(file, caption="Ваши сообщения")
         await callback.answer()
-        file_content.close()
-        logger.info("User %s downloaded messages file", username)
+        if file_id is None and sent.document is not None:
+            await service.exports.remember(username, sent.document.file_id, version)
+        logger.info("User %s downloaded messages file (%s)", username,
+                    "cached file_id" if file_id else "prerendered file" if path else "rendered on demand")
 
-        await callback.message.answer(lexicon.MSG_NO_EMPTY_BOARD, reply_markup=await user_messages_keyboard(board))
-        await callback.answer()
+        await callback.message.answer(lexicon.MSG_NO_EMPTY_BOARD,
+                                      reply_markup=await user_messages_keyboard(m["sender_alias"] for m in summary))
     except Exception as e:
         logger.error("Error in download_messages for user %s: %s", callback.from_user.username, str(e))
         await state.clear()
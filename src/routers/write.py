@@ -1,7 +1,10 @@
+from uuid import uuid4
+
 from aiogram import Router, F
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message
 
+from src.config import config
 from src.keyboards.general_keyboards import main_menu, message_keyboard, cancel_sending_keyboard
 from src.keyboards.write_keyboards import recipient_keyboard, entry_alias_keyboard, back_keyboard
 from src.lexicon import lexicon
@@ -18,11 +21,13 @@ async def select_recipient(callback: CallbackQuery, state: FSMContext, service:
     try:
         if service.is_expired():
             logger.info("User %s attempted to write, but bot is expired", callback.from_user.username)
-            await callback.message.edit_text(lexicon.MSG_EOL_DATETIME,
+            await callback.message.edit_text(lexicon.MSG_EOL_DATETIME_MSG,
                                              reply_markup=await main_menu(callback.from_user.username, service=service))
             await callback.answer()
             return
         logger.info("User %s started writing process", callback.from_user.username)
+        # id черновика делает сохранение идемпотентным, см. FencesService.save_board
+        await state.update_data(draft_id=uuid4().hex)
         await callback.message.edit_text(lexicon.MSG_SELECT_RECIPIENT,
                                          reply_markup=await recipient_keyboard(service, callback.from_user.username))
         await state.set_state(Wall.choosing_recipient)
@@ -97,7 +102,7 @@ async def enter_message(msg: Message, state: FSMContext, service: FencesService)
         slug = msg.text.strip()
         valid, error = validate_alias(slug)
         if not valid:
-            await msg.answer(f"⚠️ {error}")
+            await msg.answer(lexicon.error(error))
             await msg.answer(lexicon.MSG_WRITE_ALIAS, reply_markup=entry_alias_keyboard())
             logger.warning("Invalid slug: %s from user %s", error, msg.from_user.username)
             return
@@ -132,6 +137,11 @@ async def collect_text(msg: Message, state: FSMContext, service: FencesService):
 
         data = await state.get_data()
         messages = data.get("messages", [])
+        if len(messages) >= config.DRAFT_MAX_PARTS or \
+                sum(map(len, messages)) + len(msg.text) > config.DRAFT_MAX_CHARS:
+            logger.warning("Draft size limit reached for user %s", msg.from_user.username)
+            await msg.answer(lexicon.MSG_DRAFT_TOO_LONG, reply_markup=message_keyboard())
+            return
         messages.append(msg.text)
         await state.update_data(messages=messages)
         await msg.answer(lexicon.MSG_ADDED_CHUNK, reply_markup=message_keyboard())
@@ -149,18 +159,19 @@ async def save_messages(callback: CallbackQuery, state: FSMContext, service: Fen
         parts = data.get("messages", [])
 
         if not parts:
-            await callback.message.answer(lexicon.MSG_EMPTY_MESSAGE)
+            await callback.message.answer(lexicon.MSG_EMPTY_MSG)
             await callback.answer()
             return
 
         success, error = await service.save_board(recipient_label=data["recipient"],
                                                   chunks=parts,
                                                   sender_alias=data["alias"],
-                                                  sender_username=callback.from_user.username)
+                                                  sender_username=callback.from_user.username,
+                                                  draft_id=data.get("draft_id"))
         if not success:
             logger.error("Error saving message for user %s: %s", callback.from_user.username, error)
             await state.clear()
-            await callback.message.answer(f"⚠️ {error}",
+            await callback.message.answer(lexicon.error(error),
                                           reply_markup=await main_menu(callback.from_user.username, service=service))
             await callback.answer()
             return
@@ -169,7 +180,7 @@ async def save_messages(callback: CallbackQuery, state: FSMContext, service: Fen
         label, _ = await service.get_user_label(username=callback.from_user.username)
         await callback.message.edit_text(lexicon.MSG_MESSAGE_SENT)
         await state.clear()
-        await callback.message.answer(f'{label}, {lexicon.MSG_START}',
+        await callback.message.answer(lexicon.start_greeting(label),
                                       reply_markup=await main_menu(callback.from_user.username, service=service))
         await callback.answer()
     except Exception as e:
@@ -197,6 +208,6 @@ async def back_to_typing(callback: CallbackQuery, state: FSMContext):
 async def cancel_sending_messages_confirm(callback: CallbackQuery, state: FSMContext, service: FencesService):
     await state.clear()
     label, _ = await service.get_user_label(username=callback.from_user.username)
-    await callback.message.edit_text(f'{label}, {lexicon.MSG_START}',
+    await callback.message.edit_text(lexicon.start_greeting(label),
                                      reply_markup=await main_menu(callback.from_user.username, service=service))
     await callback.answer()
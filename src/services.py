@@ -1,23 +1,55 @@
-from datetime import datetime
-from typing import List, Dict, Optional, Literal
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List, Dict, Optional, Literal, Sequence
 
-from aiogram import Bot
 from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError, PyMongoError
 
 from src.config import config
 from src.db import models
-from src.db.models import Settings, UserEntry
+from src.db.records import MemberRecord, SettingsSnapshot
 from src.db.repository import FencesRepository
+from src.db.resilience import DEFERRED
+from src.db.snapshot import BoardSnapshot
+from src.lexicon import lexicon
 from src.utils.logger import logger
+from src.utils.media import prepare_broadcast
+from src.utils.search import BoardIndex, BoardIndexCache
+from src.workers.archive import build_archive
+from src.workers.cold_storage import archive_event, is_safe_storage, restore_event
+from src.workers.exports import ExportCache
+from src.workers.notifications import DigestNotifier
+
+ACCESS_DENIED_CACHE_SIZE = 10000
 
 
 class FencesService:
     def __init__(self, repo: FencesRepository):
         self.repo = repo
         self._expired = False
-        self._settings_cache: Optional[Settings] = None
-
-    async def load_settings(self) -> Optional[Settings]:
+        self._settings_cache: Optional[SettingsSnapshot] = None
+        self.broadcast_wakeup = asyncio.Event()
+        self.notifier: Optional[DigestNotifier] = None
+        self.search_indexes = BoardIndexCache()
+        self._stats_cache: Optional[tuple[float, Dict]] = None
+        # Проверка доступа по неизменяемому user.id: известные участники и отказы с временем истечения и ответа
+        self._allowed_ids: set[int] = set()
+        self._denied: Dict[int, list[float]] = {}
+        # Снимок заборчиков после EOL_DATETIME, из которого обслуживаются просмотр и выгрузка
+        self.snapshot: Optional[BoardSnapshot] = None
+        self.exports = ExportCache(repo)
+        # Проверено ли, что мероприятие уже было в холодном архиве (тогда автоматически оно туда не переносится)
+        self._cold_checked = False
+        # Колбэк (event, kind) для синхронизации кэшей между процессами, см. src/sharding.py
+        self.on_change: Optional[Callable[[str, str], None]] = None
+        # Колбэк (event, username) о новом сообщении, если дайджесты собирает другой процесс
+        self.on_letter: Optional[Callable[[str, str], None]] = None
+
+    @property
+    def event(self) -> str:
+        return self.repo.event
+
+    async def load_settings(self) -> Optional[SettingsSnapshot]:
         """
         Метод загрузки настроек. Настройки загружатются из кэша (если он не пустой)
 
@@ -27,7 +59,9 @@ class FencesService:
         try:
             if self._settings_cache is None:
                 settings_dict = await self.repo.get_settings()
-                self._settings_cache = Settings(**settings_dict) if settings_dict else Settings()
+                self._settings_cache = SettingsSnapshot.from_doc(settings_dict, self.event)
+                # В личных чатах chat_id совпадает с id пользователя
+                self._allowed_ids.update(m.chat_id for m in self._settings_cache.members if m.chat_id)
             return self._settings_cache
         except (ConnectionFailure, ServerSelectionTimeoutError, PyMongoError) as e:
             logger.error("Error loading settings: %s", str(e))
@@ -35,14 +69,29 @@ class FencesService:
 
     async def _invalidate_cache(self):
         """
-        Инвалидация кэша настроек
+        Инвалидация кэша настроек (в т.ч. в других процессах)
 
         :return:
         :rtype:
         """
+        self.reset_cache()
+        self._notify_change("settings")
+
+    def reset_cache(self):
+        """
+        Сбросить кэш настроек только в текущем процессе
+        """
         self._settings_cache = None
+        self._allowed_ids.clear()
+        self._denied.clear()
+        # Участники могли измениться - снимок пересоберет monitor_eol
+        self.drop_snapshot()
         logger.info('Settings cache is clear!')
 
+    def _notify_change(self, kind: str):
+        if self.on_change is not None:
+            self.on_change(self.event, kind)
+
     def is_expired(self) -> bool:
         return self._expired
 
@@ -51,6 +100,99 @@ class FencesService:
 
     def mark_active(self):
         self._expired = False
+        self.drop_snapshot()
+        self.exports.invalidate()
+
+    async def prerender_exports(self):
+        """
+        Запустить рендер файлов выгрузки всех заборчиков в пуле процессов (после EOL_DATETIME)
+        """
+        settings = await self.load_settings()
+        if settings:
+            self.exports.start_prerender(settings.by_username, self.get_messages_by_username)
+
+    async def take_snapshot(self):
+        """
+        Снять заборчики мероприятия в память (режим только чтения после EOL_DATETIME)
+        """
+        if self.snapshot is not None:
+            return
+        try:
+            self.snapshot = await BoardSnapshot.build(self.repo, memory_limit=config.SNAPSHOT_MEMORY_LIMIT_MB << 20,
+                                                      directory=config.SNAPSHOT_DIR)
+        except (ConnectionFailure, ServerSelectionTimeoutError, PyMongoError, OSError) as e:
+            logger.error("Error taking snapshot of event '%s': %s", self.event, str(e))
+
+    def drop_snapshot(self):
+        if self.snapshot is not None:
+            self.snapshot.close()
+            self.snapshot = None
+            logger.info("Snapshot of event '%s' dropped", self.event)
+
+    def drop_board_caches(self):
+        """
+        Сбросить все, что построено по заборчикам (после переноса в холодный архив и обратно)
+        """
+        self.drop_snapshot()
+        self.exports.invalidate()
+        self.search_indexes.clear()
+        self._stats_cache = None
+
+    async def archive_to_cold(self) -> tuple[Optional[Dict], Optional[str]]:
+        """
+        Перенести заборчики завершившегося мероприятия в холодный архив
+
+        :return: запись о холодном архиве и ошибка
+        :rtype:
+        """
+        eol = await self.get_eol_datetime()
+        if eol is None or eol > datetime.now():
+            return None, "❌ Мероприятие еще не завершилось"
+        if not is_safe_storage(config.COLD_STORAGE_DIR):
+            logger.error("Cold storage directory %s is not on persistent storage", config.COLD_STORAGE_DIR)
+            return None, "❌ Каталог холодного архива не на постоянном диске: смонтируйте для него том"
+        try:
+            entry = await archive_event(self.repo)
+        except (ConnectionFailure, ServerSelectionTimeoutError, PyMongoError, OSError) as e:
+            logger.error("Error moving event '%s' to cold storage: %s", self.event, str(e))
+            return None, lexicon.MSG_UNKNOWING_ERROR
+        self._cold_checked = True
+        if entry is None:
+            return None, "❌ Архивировать нечего: заборчики пусты или уже в архиве"
+        self.drop_board_caches()
+        self._notify_change("boards")
+        return entry, None
+
+    async def restore_from_cold(self) -> tuple[Optional[int], Optional[str]]:
+        """
+        Вернуть заборчики мероприятия из холодного архива
+
+        :return: количество восстановленных заборчиков и ошибка
+        :rtype:
+        """
+        try:
+            restored = await restore_event(self.repo)
+        except (ConnectionFailure, ServerSelectionTimeoutError, PyMongoError, OSError) as e:
+            logger.error("Error restoring event '%s' from cold storage: %s", self.event, str(e))
+            return None, lexicon.MSG_UNKNOWING_ERROR
+        if restored is None:
+            return None, "❌ Мероприятие не в архиве"
+        self.drop_board_caches()
+        self._notify_change("boards")
+        return restored, None
+
+    async def archive_if_due(self, eol: datetime):
+        """
+        Перенести мероприятие в холодный архив через config.COLD_ARCHIVE_AFTER_DAYS дней после EOL_DATETIME.
+        Мероприятие, которое уже было в архиве (в т.ч. восстановленное), не трогается
+        """
+        if self._cold_checked or not config.COLD_ARCHIVE_AFTER_DAYS:
+            return
+        if datetime.now() < eol + timedelta(days=config.COLD_ARCHIVE_AFTER_DAYS):
+            return
+        if await self.repo.get_cold_entry() is None:
+            await self.archive_to_cold()
+        self._cold_checked = True
 
     async def is_allowed(self, username: str) -> bool:
         """
@@ -65,11 +207,54 @@ class FencesService:
             settings = await self.load_settings()
             if not settings:
                 return False
-            return any(member.username == username for member in settings.members)
+            return username in settings.by_username
         except (ConnectionFailure, ServerSelectionTimeoutError, PyMongoError) as e:
             logger.error("Error checking user allowance for %s: %s", username, str(e))
             return False
 
+    async def is_allowed_user(self, user_id: int, username: Optional[str]) -> bool:
+        """
+        Проверка доступа по id пользователя. Участник проверяется по username один раз, дальше - по id.
+        Отказ запоминается на config.ACCESS_DENY_TTL секунд, чтобы незнакомцы не нагружали проверку
+
+        :param user_id:
+        :type user_id:
+        :param username:
+        :type username:
+        :return:
+        :rtype:
+        """
+        if user_id in self._allowed_ids:
+            return True
+        now = time.monotonic()
+        denied = self._denied.get(user_id)
+        if denied is not None and denied[0] > now:
+            return False
+
+        # Загрузка настроек заполняет _allowed_ids по chat_id участников
+        await self.load_settings()
+        if user_id in self._allowed_ids or await self.is_allowed(username):
+            self._allowed_ids.add(user_id)
+            self._denied.pop(user_id, None)
+            return True
+        if len(self._denied) >= ACCESS_DENIED_CACHE_SIZE:
+            self._denied = {uid: entry for uid, entry in self._denied.items() if entry[0] > now}
+        self._denied[user_id] = [now + config.ACCESS_DENY_TTL, denied[1] if denied else 0.0]
+        return False
+
+    def should_reply_denied(self, user_id: int) -> bool:
+        """
+        Отвечать ли отказом на апдейт user_id: не чаще раза в config.ACCESS_DENY_REPLY_INTERVAL секунд
+        """
+        denied = self._denied.get(user_id)
+        now = time.monotonic()
+        if denied is None:
+            return True
+        if now - denied[1] < config.ACCESS_DENY_REPLY_INTERVAL:
+            return False
+        denied[1] = now
+        return True
+
     async def is_admin(self, username: str) -> bool:
         """
         Метод проверки пользователя на админа
@@ -83,7 +268,8 @@ class FencesService:
             settings = await self.load_settings()
             if not settings:
                 return False
-            return any(member.username == username and member.is_admin for member in settings.members)
+            member = settings.by_username.get(username)
+            return member is not None and member.is_admin
         except (ConnectionFailure, ServerSelectionTimeoutError, PyMongoError) as e:
             logger.error("Error checking admin status for %s: %s", username, str(e))
             return False
@@ -101,20 +287,20 @@ class FencesService:
             settings = await self.load_settings()
             if not settings:
                 logger.error("No settings found for get_user_label")
-                return None, config.MSG_UNKNOWING_ERROR
-            for member in settings.members:
-                if member.username == username:
-                    logger.debug("Found label %s for username %s", member.label, username)
-                    return member.label, None
+                return None, lexicon.MSG_UNKNOWING_ERROR
+            member = settings.by_username.get(username)
+            if member is not None:
+                logger.debug("Found label %s for username %s", member.label, username)
+                return member.label, None
             logger.warning("No label found for username %s", username)
             return None, "❌ Пользователь не найден"
         except (ConnectionFailure, ServerSelectionTimeoutError, PyMongoError) as e:
             logger.error("Error retrieving label for username %s: %s", username, str(e))
-            return None, config.MSG_UNKNOWING_ERROR
+            return None, lexicon.MSG_UNKNOWING_ERROR
 
     async def get_users(self, role: Literal['all', 'admin', 'member'] = 'all',
                         return_field: Literal['username', 'label', 'dict'] = 'username'
-                        ) -> tuple[List[UserEntry] | Dict[str, str], Optional[str]]:
+                        ) -> tuple[List[MemberRecord] | Dict[str, str], Optional[str]]:
         """
         Получить список пользователей
 
@@ -135,7 +321,7 @@ class FencesService:
             settings = await self.load_settings()
             if not settings:
                 logger.error("No settings found for get_users")
-                return [], config.MSG_UNKNOWING_ERROR
+                return [], lexicon.MSG_UNKNOWING_ERROR
             members = settings.members
 
             if role == 'admin':
@@ -150,7 +336,7 @@ class FencesService:
             return [getattr(m, return_field) for m in filtered], None
         except (ConnectionFailure, ServerSelectionTimeoutError, PyMongoError) as e:
             logger.error("Error retrieving users with role %s: %s", role, str(e))
-            return [], config.MSG_UNKNOWING_ERROR
+            return [], lexicon.MSG_UNKNOWING_ERROR
 
     async def check_alias_unique(self, recipient_label: str, alias: str) -> tuple[bool, Optional[str]]:
         """
@@ -171,18 +357,22 @@ class FencesService:
             if not recipient_username:
                 return False, "❌ Получатель не найден"
 
-            messages = await self.get_messages_by_username(recipient_username)
-            if alias in messages:
+            taken = await self.repo.has_message(recipient_username, alias)
+            if taken is None:
+                # Без проверки псевдоним мог бы повториться на заборчике
+                return False, lexicon.MSG_UNKNOWING_ERROR
+            if taken:
                 return False, f"❌ Псевдоним '{alias}' уже используется для сообщений этому получателю. Выбери другой."
             return True, None
         except (ConnectionFailure, ServerSelectionTimeoutError, PyMongoError) as e:
             logger.error("Error checking alias uniqueness for %s: %s", recipient_label, str(e))
-            return False, config.MSG_UNKNOWING_ERROR
+            return False, lexicon.MSG_UNKNOWING_ERROR
 
     async def save_board(self, recipient_label: str, sender_alias: str, chunks: List[str],
-                         sender_username: str | None = None) -> tuple[bool, Optional[str]]:
+                         sender_username: str | None = None, draft_id: str | None = None) -> tuple[bool, Optional[str]]:
         """
-        Сохранить сообщение на заборчике recipient_label
+        Сохранить сообщение на заборчике recipient_label. Повторное сохранение черновика draft_id
+        (двойное нажатие, повторная доставка апдейта) ничего не делает и считается успешным
 
         :param recipient_label:
         :type recipient_label:
@@ -192,10 +382,18 @@ class FencesService:
         :type chunks:
         :param sender_username:
         :type sender_username:
+        :param draft_id: id черновика, выданный в начале написания сообщения
+        :type draft_id:
         :return:
         :rtype:
         """
         try:
+            # Черновик, начатый до дедлайна, не должен попасть мимо снимка заборчиков
+            eol = await self.get_eol_datetime()
+            if eol is not None and datetime.now() >= eol:
+                logger.info("Message from %s rejected: event '%s' is expired", sender_username or "unknown",
+                            self.event)
+                return False, lexicon.MSG_EOL_DATETIME_MSG
             contacts, error = await self.get_users(return_field='dict')
             if error:
                 return False, error
@@ -207,17 +405,36 @@ class FencesService:
             success, error = await self.repo.save_message(recipient_username=recipient_username,
                                                           sender_alias=sender_alias,
                                                           parts=chunks,
-                                                          sender_username=sender_username)
+                                                          sender_username=sender_username,
+                                                          draft_id=draft_id)
             if not success:
                 return False, error
+            if eol is not None and datetime.now() >= eol:
+                # Дедлайн наступил во время записи: снимки, снятые без этого сообщения, пересоберет monitor_eol
+                self.drop_board_caches()
+                self._notify_change("boards")
+            if error != DEFERRED:
+                self.letter_saved(recipient_username)
             logger.info("Message saved for recipient %s from sender %s (alias: %s)", recipient_username,
                         sender_username or "unknown", sender_alias)
             return True, None
         except (ConnectionFailure, ServerSelectionTimeoutError, PyMongoError) as e:
             logger.error("Error saving board for recipient %s: %s", recipient_label, str(e))
-            return False, config.MSG_UNKNOWING_ERROR
+            return False, lexicon.MSG_UNKNOWING_ERROR
 
-    async def get_messages_by_username(self, username: str) -> Dict[str, List[str]]:
+    def letter_saved(self, recipient_username: str):
+        """
+        Учесть новое сообщение в БД на заборчике recipient_username: в дайджесте и, после EOL_DATETIME, в снимке
+        """
+        if self.is_expired():
+            self.drop_board_caches()
+            self._notify_change("boards")
+        if self.notifier is not None:
+            self.notifier.record(recipient_username)
+        elif self.on_letter is not None:
+            self.on_letter(self.event, recipient_username)
+
+    async def get_messages_by_username(self, username: str) -> Dict[str, Sequence[str]]:
         """
         Получить сообщения на заборчике username
         :param username:
@@ -226,11 +443,166 @@ class FencesService:
         :rtype:
         """
         try:
+            if self.snapshot is not None:
+                return self.snapshot.get_messages(username)
             return await self.repo.get_messages(username)
         except (ConnectionFailure, ServerSelectionTimeoutError, PyMongoError) as e:
             logger.error("Error retrieving messages for %s: %s", username, str(e))
             return {}
 
+    async def get_board_summary(self, username: str) -> List[Dict]:
+        """
+        Получить список сообщений на заборчике username без их текста
+
+        :param username:
+        :type username:
+        :return:
+        :rtype:
+        """
+        try:
+            if self.snapshot is not None:
+                return self.snapshot.summary(username)
+            return await self.repo.get_board_summary(username)
+        except (ConnectionFailure, ServerSelectionTimeoutError, PyMongoError) as e:
+            logger.error("Error retrieving board summary for %s: %s", username, str(e))
+            return []
+
+    async def get_message(self, username: str, alias: str) -> Optional[Sequence[str]]:
+        """
+        Получить сообщение от alias на заборчике username
+
+        :param username:
+        :type username:
+        :param alias:
+        :type alias:
+        :return:
+        :rtype:
+        """
+        try:
+            if self.snapshot is not None:
+                return self.snapshot.get_message(username, alias)
+            return await self.repo.get_message(username, alias)
+        except (ConnectionFailure, ServerSelectionTimeoutError, PyMongoError) as e:
+            logger.error("Error retrieving message from %s for %s: %s", alias, username, str(e))
+            return None
+
+    async def get_new_messages(self, username: str) -> List[Dict]:
+        """
+        Получить сообщения на заборчике username, которые он еще не видел в «🆕 Новые»
+
+        :param username:
+        :type username:
+        :return:
+        :rtype:
+        """
+        try:
+            if self.snapshot is not None:
+                return self.snapshot.get_new_messages(username)
+            return await self.repo.get_new_messages(username)
+        except (ConnectionFailure, ServerSelectionTimeoutError, PyMongoError) as e:
+            logger.error("Error retrieving new messages for %s: %s", username, str(e))
+            return []
+
+    async def mark_board_read(self, username: str, read_at: datetime) -> tuple[bool, Optional[str]]:
+        """
+        Отметить сообщения на заборчике username до read_at включительно прочитанными
+
+        :param username:
+        :type username:
+        :param read_at:
+        :type read_at:
+        :return:
+        :rtype:
+        """
+        try:
+            if self.snapshot is not None:
+                self.snapshot.advance_cursor(username, read_at)
+            return await self.repo.advance_read_cursor(username, read_at)
+        except (ConnectionFailure, ServerSelectionTimeoutError, PyMongoError) as e:
+            logger.error("Error updating read cursor for %s: %s", username, str(e))
+            return False, lexicon.MSG_UNKNOWING_ERROR
+
+    async def search_board(self, username: str, query: str) -> List[tuple[str, str]]:
+        """
+        Поиск по сообщениям на заборчике username. Индекс заборчика строится при первом поиске
+        и перестраивается только после появления новых сообщений
+
+        :param username:
+        :type username:
+        :param query:
+        :type query:
+        :return: пары (псевдоним, фрагмент текста)
+        :rtype:
+        """
+        try:
+            if self.snapshot is not None:
+                version = self.snapshot.version(username)
+            else:
+                version = await self.repo.get_board_version(username)
+            if version is None:
+                return []
+            index = self.search_indexes.get(username, version)
+            if index is None:
+                index = BoardIndex(await self.get_messages_by_username(username), version)
+                self.search_indexes.put(username, index)
+                logger.debug("Built search index for board of %s (%d messages)", username, version)
+            return index.search(query)
+        except (ConnectionFailure, ServerSelectionTimeoutError, PyMongoError) as e:
+            logger.error("Error searching board of %s: %s", username, str(e))
+            return []
+
+    async def get_stats(self) -> tuple[Optional[Dict], Optional[str]]:
+        """
+        Статистика мероприятия для админа. Результат кэшируется на config.STATS_CACHE_TTL секунд
+
+        :return: total, recipients и senders (пары псевдоним - количество, по убыванию), empty (заборчики
+            без сообщений), silent (участники, которые еще никому не написали), hourly (час - количество за сутки)
+        :rtype:
+        """
+        try:
+            if self._stats_cache is not None and time.monotonic() - self._stats_cache[0] < config.STATS_CACHE_TTL:
+                return self._stats_cache[1], None
+            settings = await self.load_settings()
+            if not settings:
+                return None, lexicon.MSG_UNKNOWING_ERROR
+            raw = await self.repo.get_board_stats(since=datetime.now() - timedelta(hours=24))
+            if not raw:
+                return None, lexicon.MSG_UNKNOWING_ERROR
+
+            def label_of(username: Optional[str]) -> str:
+                member = settings.by_username.get(username)
+                return member.label if member else (username or "—")
+
+            senders = {doc["_id"]: doc["count"] for doc in raw["senders"]}
+            stats = {
+                "total": sum(doc["count"] for doc in raw["recipients"]),
+                "recipients": [(label_of(doc["username"]), doc["count"]) for doc in raw["recipients"]],
+                "senders": [(label_of(username), count) for username, count in senders.items()],
+                "empty": [label_of(doc["username"]) for doc in raw["recipients"] if not doc["count"]],
+                "silent": [m.label for m in settings.members if m.username not in senders],
+                "hourly": [(doc["_id"], doc["count"]) for doc in raw["hourly"]],
+            }
+            self._stats_cache = (time.monotonic(), stats)
+            return stats, None
+        except (ConnectionFailure, ServerSelectionTimeoutError, PyMongoError) as e:
+            logger.error("Error computing stats: %s", str(e))
+            return None, lexicon.MSG_UNKNOWING_ERROR
+
+    async def build_archive(self, fmt: Optional[str] = None) -> tuple[Optional[str], Optional[str]]:
+        """
+        Собрать ZIP-архив всех заборчиков мероприятия
+
+        :param fmt: txt или json (по умолчанию config.ARCHIVE_FORMAT)
+        :type fmt:
+        :return: путь к архиву и ошибка
+        :rtype:
+        """
+        try:
+            return await build_archive(self.repo, fmt), None
+        except (ConnectionFailure, ServerSelectionTimeoutError, PyMongoError, OSError) as e:
+            logger.error("Error building archive of event '%s': %s", self.repo.event, str(e))
+            return None, lexicon.MSG_UNKNOWING_ERROR
+
     async def add_user(self, username: str, label: str, role: str, chat_id: int = 0) -> tuple[bool, Optional[str]]:
         """
         Добавить нового пользователя
@@ -250,18 +622,15 @@ class FencesService:
             settings = await self.load_settings()
             if not settings:
                 logger.error("No settings found for add_user")
-                return False, config.MSG_UNKNOWING_ERROR
-            usernames = [m.username for m in settings.members]
-            labels = [m.label for m in settings.members]
-
-            if username in usernames:
+                return False, lexicon.MSG_UNKNOWING_ERROR
+            if username in settings.by_username:
                 logger.warning("Attempt to add existing user %s", username)
                 return False, "❌ Такой username уже есть"
-            if label in labels:
+            if label in settings.by_label:
                 logger.warning("Attempt to add user with existing label %s", label)
                 return False, "❌ Такое отображаемое имя уже используется"
 
-            user = models.UserEntry(username=username, label=label, is_admin=(role == "admin"), chat_id=chat_id)
+            user = MemberRecord(username=username, label=label, is_admin=(role == "admin"), chat_id=chat_id)
             success, error = await self.repo.add_member(user)
             if not success:
                 return False, error
@@ -270,7 +639,7 @@ class FencesService:
             return True, None
         except (ConnectionFailure, ServerSelectionTimeoutError, PyMongoError) as e:
             logger.error("Error adding user %s: %s", username, str(e))
-            return False, config.MSG_UNKNOWING_ERROR
+            return False, lexicon.MSG_UNKNOWING_ERROR
 
     async def remove_user(self, alias: str) -> tuple[bool, Optional[str]]:
         """
@@ -288,7 +657,7 @@ class FencesService:
             return True, None
         except (ConnectionFailure, ServerSelectionTimeoutError, PyMongoError) as e:
             logger.error("Error removing user with alias %s: %s", alias, str(e))
-            return False, config.MSG_UNKNOWING_ERROR
+            return False, lexicon.MSG_UNKNOWING_ERROR
 
     async def set_admin_flag(self, admin_flag: bool, username: Optional[str] = None, alias: Optional[str] = None) -> \
             tuple[bool, Optional[str]]:
@@ -317,7 +686,23 @@ class FencesService:
             return True, None
         except (ConnectionFailure, ServerSelectionTimeoutError, PyMongoError) as e:
             logger.error("Error setting admin flag for %s: %s", username or alias, str(e))
-            return False, config.MSG_UNKNOWING_ERROR
+            return False, lexicon.MSG_UNKNOWING_ERROR
+
+    @staticmethod
+    def parse_datetime(user_datetime: str) -> tuple[Optional[datetime], Optional[str]]:
+        """
+        Разобрать дату, введенную админом в формате config.DATETIME_PATTERN
+
+        :param user_datetime:
+        :type user_datetime:
+        :return: кортеж с датой и текстом ошибки при необходимости
+        :rtype:
+        """
+        try:
+            return datetime.strptime(user_datetime.strip(), config.DATETIME_PATTERN), None
+        except ValueError as e:
+            logger.error("Invalid datetime format: %s", str(e))
+            return None, "❌ Некорректный формат. Ожидается: ДД.ММ.ГГГГ ЧЧ:ММ:СС"
 
     async def set_datetime(self, user_datetime: str) -> tuple[bool, Optional[str]]:
         """
@@ -329,18 +714,17 @@ class FencesService:
         :rtype:
         """
         try:
-            parsed = datetime.strptime(user_datetime, config.DATETIME_PATTERN)
+            parsed, error = self.parse_datetime(user_datetime)
+            if error:
+                return False, error
             success, error = await self.repo.set_eol_datetime(parsed)
             if not success:
                 return False, error
             await self._invalidate_cache()
             return True, None
-        except ValueError as e:
-            logger.error("Invalid datetime format: %s", str(e))
-            return False, "❌ Некорректный формат. Ожидается: ДД.ММ.ГГГГ ЧЧ:ММ:СС"
         except (ConnectionFailure, ServerSelectionTimeoutError, PyMongoError) as e:
             logger.error("Error setting datetime: %s", str(e))
-            return False, config.MSG_UNKNOWING_ERROR
+            return False, lexicon.MSG_UNKNOWING_ERROR
 
     async def get_eol_datetime(self) -> Optional[datetime]:
         """
@@ -356,86 +740,78 @@ class FencesService:
             logger.error("Error retrieving EOL datetime: %s", str(e))
             return None
 
-    async def send_bot_direct_message(self, bot: Bot, recipient_label: Optional[str],
-                                      messages: List[Dict]) -> tuple[bool, Optional[str]]:
+    async def enqueue_broadcast(self, recipient_label: Optional[str], messages: List[Dict],
+                                created_by: Optional[str] = None) -> tuple[Optional[str], Optional[str]]:
         """
-        Отправить сообщения от имени бота
+        Поставить сообщения от имени бота в очередь рассылки. Отправкой занимается BroadcastWorker
+
+        :param recipient_label: получатель, None - все пользователи
+        :type recipient_label:
+        :param messages: сообщения, собранные в admin.collect_bot_message
+        :type messages:
+        :param created_by: username админа
+        :type created_by:
+        :return: кортеж с id рассылки и трейсбеком ошибки при необходимости
+        :rtype:
         """
         try:
             contacts, error = await self.get_users(return_field='dict')
             if error:
-                return False, error
-            failed_recipients = []
-
-            async def send_message_to_chat(user_chat_id: int, message_dict: Dict) -> bool:
-                try:
-                    if message_dict["type"] == "text":
-                        await bot.send_message(chat_id=user_chat_id, text=message_dict["content"])
-                    elif message_dict["type"] == "photo":
-                        await bot.send_photo(chat_id=user_chat_id, photo=message_dict["content"],
-                                             caption=message_dict.get("caption"))
-                    elif message_dict["type"] == "video":
-                        await bot.send_video(chat_id=user_chat_id, video=message_dict["content"],
-                                             caption=message_dict.get("caption"))
-                    elif message_dict["type"] == "video_note":
-                        await bot.send_video_note(chat_id=user_chat_id, video_note=message_dict["content"])
-                    elif message_dict["type"] == "audio":
-                        await bot.send_audio(chat_id=user_chat_id, audio=message_dict["content"],
-                                             caption=message_dict.get("caption"))
-                    elif message_dict["type"] == "sticker":
-                        await bot.send_sticker(chat_id=user_chat_id, sticker=message_dict["content"])
-                    elif message_dict["type"] == "document":
-                        await bot.send_document(chat_id=user_chat_id, document=message_dict["content"],
-                                                caption=message_dict.get("caption"))
-                    elif message_dict["type"] == "voice":
-                        await bot.send_voice(chat_id=user_chat_id, voice=message_dict["content"])
-                    else:
-                        logger.warning("Unsupported message type: %s", message_dict["type"])
-                        return False
-                    return True
-                except Exception as e:
-                    logger.error("Failed to send %s message to chat_id %s: %s", message_dict["type"], user_chat_id,
-                                 str(e))
-                    return False
+                return None, error
+
+            _, unsupported = prepare_broadcast(messages)
+            if unsupported:
+                logger.warning("Unsupported message types in broadcast: %s", unsupported)
+                return None, "❌ Неподдерживаемый тип сообщения"
 
             if recipient_label:
                 if recipient_label not in contacts:
                     logger.warning("Recipient %s not found in contacts", recipient_label)
-                    return False, f"❌ Получатель {recipient_label} не найден"
-                chat_id = await self.repo.get_user_chat_id(recipient_label)
+                    return None, f"❌ Получатель {recipient_label} не найден"
+                # Один запрос в БД вместо get_user_chat_id на получателя, как и в BroadcastWorker._process
+                members = await self.repo.get_all_members()
+                chat_id = next((member.get("chat_id") for member in members if member["label"] == recipient_label),
+                               None)
                 if not chat_id or chat_id == 0:
                     logger.warning("No chat_id for recipient %s", recipient_label)
-                    return False, f"❌ Не удалось отправить сообщение пользователю {recipient_label}: chat_id не найден"
-
-                for message in messages:
-                    if not await send_message_to_chat(chat_id, message):
-                        return False, f"❌ Ошибка отправки сообщения пользователю {recipient_label}"
-                logger.info("Sent %d messages to %s (chat_id: %s)", len(messages), recipient_label, chat_id)
-                return True, None
+                    return None, f"❌ Не удалось отправить сообщение пользователю {recipient_label}: chat_id не найден"
+                recipients = [{"label": recipient_label, "username": contacts[recipient_label]}]
             else:
-                chat_ids = await self.repo.get_all_chat_ids()
-                if not chat_ids:
+                if not contacts:
                     logger.warning("No users found for broadcast message")
-                    return False, "❌ Нет пользователей для отправки сообщения"
-
-                for label, username in contacts.items():
-                    chat_id = await self.repo.get_user_chat_id(label)
-                    if not chat_id or chat_id == 0:
-                        failed_recipients.append(label)
-                        logger.warning("No chat_id for recipient %s", label)
-                        continue
-
-                    for message in messages:
-                        if not await send_message_to_chat(chat_id, message):
-                            failed_recipients.append(label)
-                            logger.error("Failed to send message to %s (chat_id: %s)", label, chat_id)
-                            break
-
-                if failed_recipients:
-                    return False, f"❌ Сообщение не отправлено пользователям: {', '.join(failed_recipients)}\n" \
-                                  f"Скорее всего, они еще ни разу не запускали бота 😢"
-                logger.info("Sent %d messages to all users (%d recipients)", len(messages), len(chat_ids))
-                return True, None
+                    return None, "❌ Нет пользователей для отправки сообщения"
+                recipients = [{"label": label, "username": username} for label, username in contacts.items()]
+
+            job = models.BroadcastJob(recipient_label=recipient_label, messages=messages, created_by=created_by,
+                                      created_at=datetime.now())
+            job_id, error = await self.repo.create_broadcast(job, recipients)
+            if error:
+                return None, error
+            self.broadcast_wakeup.set()
+            self._notify_change("broadcast")
+            return job_id, None
         except (ConnectionFailure, ServerSelectionTimeoutError, PyMongoError) as e:
-            logger.error("Error sending bot message to %s: %s", recipient_label or "all users", str(e))
-            return False, config.MSG_UNKNOWING_ERROR
+            logger.error("Error queueing bot message to %s: %s", recipient_label or "all users", str(e))
+            return None, lexicon.MSG_UNKNOWING_ERROR
+
+    async def get_broadcasts_progress(self, limit: int = 5) -> List[dict]:
+        """
+        Прогресс последних рассылок
+        """
+        return await self.repo.get_broadcasts_progress(limit)
+
+    async def get_failed_recipients(self, job_id: str) -> List[dict]:
+        """
+        Получатели рассылки job_id, которым сообщение доставить не удалось
+        """
+        return await self.repo.get_deliveries(job_id, status="failed")
+
+    async def retry_broadcast(self, job_id: str) -> tuple[int, Optional[str]]:
+        """
+        Повторить рассылку job_id только для недоставленных получателей
+        """
+        count, error = await self.repo.retry_failed_deliveries(job_id)
+        if count:
+            self.broadcast_wakeup.set()
+            self._notify_change("broadcast")
+        return count, error
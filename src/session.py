@@ -0,0 +1,102 @@
+"""
+HTTP-сессия для запросов к Bot API: пул соединений с keep-alive и кэшем DNS, таймауты по методам
+и повтор запросов при RetryAfter и ошибках сервера Telegram
+"""
+import asyncio
+import random
+from typing import Dict, Optional
+
+from aiohttp import ClientConnectorError
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.client.telegram import PRODUCTION, TelegramAPIServer
+from aiogram.exceptions import TelegramNetworkError, TelegramRetryAfter, TelegramServerError
+from aiogram.methods import GetUpdates, TelegramMethod
+from aiogram.methods.base import Response, TelegramType
+
+from src.config import config
+from src.utils.logger import logger
+
+# Методы с загрузкой файлов получают увеличенный таймаут
+FILE_METHODS = ("sendDocument", "sendPhoto", "sendVideo", "sendAudio", "sendVoice", "sendVideoNote",
+                "sendAnimation", "sendMediaGroup", "sendSticker")
+
+
+class TunedAiohttpSession(AiohttpSession):
+    """
+    AiohttpSession с настраиваемым пулом соединений и таймаутами по методам Bot API
+    """
+
+    def __init__(self, api: TelegramAPIServer = PRODUCTION, limit: int = 100, keepalive_timeout: float = 30,
+                 dns_ttl: int = 300, timeout: float = 30, method_timeouts: Optional[Dict[str, float]] = None):
+        super().__init__(api=api, limit=limit, timeout=timeout)
+        self._connector_init.update(keepalive_timeout=keepalive_timeout, ttl_dns_cache=dns_ttl, use_dns_cache=True)
+        self.method_timeouts = method_timeouts or {}
+
+    async def make_request(self, bot: Bot, method: TelegramMethod[TelegramType],
+                           timeout: Optional[int] = None) -> TelegramType:
+        if timeout is None:
+            timeout = self.method_timeouts.get(method.__api_method__)
+        return await super().make_request(bot, method, timeout=timeout)
+
+
+class RetryMiddleware(BaseRequestMiddleware):
+    """
+    Повтор запроса: после RetryAfter - через указанное Telegram время, после 5xx и сетевых ошибок - с экспоненциальной
+    задержкой со случайным разбросом. Telegram мог успеть выполнить запрос, завершившийся 5xx или таймаутом,
+    поэтому такие ошибки повторяются только для get-методов, а для остальных (sendMessage, sendMediaGroup...) -
+    только если соединение не удалось установить и запрос не был отправлен.
+    getUpdates не повторяется - у polling своя логика переподключения
+    """
+
+    def __init__(self, attempts: int = 3, base_delay: float = 0.5, max_delay: float = 30):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    @staticmethod
+    def _idempotent(method: TelegramMethod) -> bool:
+        return method.__api_method__.startswith("get")
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def __call__(self, make_request: NextRequestMiddlewareType[TelegramType], bot: Bot,
+                       method: TelegramMethod[TelegramType]) -> Response[TelegramType]:
+        if isinstance(method, GetUpdates):
+            return await make_request(bot, method)
+        attempt = 0
+        while True:
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                if attempt + 1 >= self.attempts or e.retry_after > self.max_delay:
+                    raise
+                delay = e.retry_after + self._backoff(0)
+            except TelegramServerError:
+                if attempt + 1 >= self.attempts or not self._idempotent(method):
+                    raise
+                delay = self._backoff(attempt)
+            except TelegramNetworkError as e:
+                not_sent = isinstance(e.__cause__, ClientConnectorError)
+                if attempt + 1 >= self.attempts or not (not_sent or self._idempotent(method)):
+                    raise
+                delay = self._backoff(attempt)
+            attempt += 1
+            logger.warning("Retrying %s in %.2f s (attempt %d of %d)", method.__api_method__, delay, attempt + 1,
+                           self.attempts)
+            await asyncio.sleep(delay)
+
+
+def create_session() -> TunedAiohttpSession:
+    """
+    Сессия Bot API с параметрами из config
+    """
+    api = TelegramAPIServer.from_base(config.BOT_API_URL) if config.BOT_API_URL else PRODUCTION
+    session = TunedAiohttpSession(api=api, limit=config.BOT_API_POOL_SIZE,
+                                  keepalive_timeout=config.BOT_API_KEEPALIVE, dns_ttl=config.BOT_API_DNS_TTL,
+                                  timeout=config.BOT_API_TIMEOUT,
+                                  method_timeouts={name: config.BOT_API_FILE_TIMEOUT for name in FILE_METHODS})
+    session.middleware(RetryMiddleware(attempts=config.BOT_API_RETRIES, max_delay=config.BOT_API_RETRY_MAX_DELAY))
+    return session
@@ -0,0 +1,148 @@
+"""
+Режим нескольких процессов (config.WORKERS > 1).
+
+Главный процесс (ingress) получает апдейты через long polling и раскладывает их по очередям воркеров
+по id пользователя, поэтому все апдейты одного пользователя, а значит и его FSM-состояние, живут в одном процессе.
+Каждый воркер поднимает свой Dispatcher с теми же роутерами и middleware.
+
+Изменения, влияющие на кэши других процессов (настройки, новые рассылки, расписание), воркер отправляет
+в общую control-очередь, а ingress пересылает их остальным воркерам.
+Рассылки, планировщик и дайджесты о новых сообщениях работают только в воркере 0: остальные воркеры
+отправляют ему через control-очередь получателей сохраненных сообщений.
+"""
+import asyncio
+import json
+import multiprocessing
+from typing import List, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+
+from src.config import config
+from src.utils.logger import logger, setup_logging, start_log_listener
+from src.utils.loop import run
+
+# Сообщения в очередях воркеров: ("update", json апдейта), ("change", event, kind) или ("letter", event, username);
+# None - остановка. В control-очереди: ("change", воркер, event, kind) или ("letter", event, username)
+UPDATE = "update"
+CHANGE = "change"
+LETTER = "letter"
+
+
+def shard_of(update: Update, shards: int) -> int:
+    """
+    Номер воркера для апдейта. Апдейты без пользователя уходят в воркер 0
+    """
+    try:
+        user = getattr(update.event, "from_user", None)
+    except Exception:
+        user = None
+    return user.id % shards if user is not None else 0
+
+
+async def _read(queue: multiprocessing.Queue):
+    return await asyncio.get_running_loop().run_in_executor(None, queue.get)
+
+
+async def _worker(index: int, updates: multiprocessing.Queue, control: multiprocessing.Queue,
+                  logs: multiprocessing.Queue):
+    from src.app import apply_change, build_dispatcher, record_letter
+    from src.bot import create_bot
+
+    setup_logging(logs)
+    bot = create_bot()
+
+    def on_change(event: str, kind: str):
+        control.put((CHANGE, index, event, kind))
+
+    def on_letter(event: str, username: str):
+        control.put((LETTER, event, username))
+
+    dp = await build_dispatcher(bot, primary=index == 0, on_change=on_change,
+                                on_letter=on_letter if index != 0 else None, index=index)
+    tasks = set()
+    logger.info("🚀 Worker %d is running", index)
+    try:
+        while True:
+            item = await _read(updates)
+            if item is None:
+                break
+            if item[0] == CHANGE:
+                apply_change(dp, item[1], item[2])
+                continue
+            if item[0] == LETTER:
+                record_letter(dp, item[1], item[2])
+                continue
+            task = asyncio.create_task(dp.feed_raw_update(bot, json.loads(item[1])))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+    finally:
+        await bot.session.close()
+
+
+def worker_process(index: int, updates: multiprocessing.Queue, control: multiprocessing.Queue,
+                   logs: multiprocessing.Queue):
+    run(_worker(index, updates, control, logs))
+
+
+async def _fan_out_changes(control: multiprocessing.Queue, queues: List[multiprocessing.Queue]):
+    while True:
+        item = await _read(control)
+        if item is None:
+            return
+        if item[0] == LETTER:
+            queues[0].put(item)
+            continue
+        _, origin, event, kind = item
+        for index, queue in enumerate(queues):
+            if index != origin:
+                queue.put((CHANGE, event, kind))
+
+
+async def run_ingress(bot: Bot, shards: int, allowed_updates: Optional[List[str]] = None):
+    """
+    Запустить воркеры и раздавать им апдейты, полученные через getUpdates
+    """
+    ctx = multiprocessing.get_context("spawn")
+    control = ctx.Queue()
+    # Файл логов ротирует только ingress: воркеры присылают ему записи через эту очередь
+    logs = ctx.Queue()
+    listener = start_log_listener(logs)
+    queues = [ctx.Queue() for _ in range(shards)]
+    processes = [ctx.Process(target=worker_process, args=(index, queues[index], control, logs),
+                             name=f"fences-worker-{index}", daemon=True)
+                 for index in range(shards)]
+    for process in processes:
+        process.start()
+    fan_out = asyncio.create_task(_fan_out_changes(control, queues))
+
+    if allowed_updates is None:
+        from src.routers import router
+        dp = Dispatcher()
+        dp.include_router(router)
+        allowed_updates = dp.resolve_used_update_types()
+
+    logger.info("🚀 Ingress is running with %d workers", shards)
+    offset = None
+    try:
+        while True:
+            try:
+                batch = await bot.get_updates(offset=offset, timeout=config.POLLING_TIMEOUT,
+                                              allowed_updates=allowed_updates)
+            except Exception as e:
+                logger.error("Failed to fetch updates: %s", str(e))
+                await asyncio.sleep(1)
+                continue
+            for update in batch:
+                offset = update.update_id + 1
+                raw = update.model_dump_json(exclude_unset=True, by_alias=True)
+                queues[shard_of(update, shards)].put((UPDATE, raw))
+    finally:
+        for queue in queues:
+            queue.put(None)
+        control.put(None)
+        fan_out.cancel()
+        for process in processes:
+            process.join(timeout=10)
+        listener.stop()
+        await bot.session.close()
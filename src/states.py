@@ -13,6 +13,11 @@ class AdminState(StatesGroup):
     bot_message_type = State()
     bot_message_recipient = State()
     bot_message_typing = State()
+    bot_message_schedule = State()
+
+
+class ViewState(StatesGroup):
+    searching = State()
 
 
 class Wall(StatesGroup):
@@ -0,0 +1,71 @@
+from typing import Callable, Dict, Iterator, List, Optional
+
+from aiogram.types import User
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from src.db.repository import FencesRepository
+from src.services import FencesService
+from src.utils.logger import logger
+
+
+class TenantRegistry:
+    """
+    Все мероприятия (заборчики), обслуживаемые одним процессом. У каждого мероприятия свой FencesService
+    со своим кэшем настроек, а репозитории делят один клиент MongoDB
+    """
+
+    def __init__(self, client: AsyncIOMotorClient,
+                 repo_factory: Callable[[AsyncIOMotorClient, str], FencesRepository] = FencesRepository):
+        self.client = client
+        self.repo_factory = repo_factory
+        self.base: Optional[FencesRepository] = None
+        self.services: Dict[str, FencesService] = {}
+        self._selected: Dict[int, str] = {}
+
+    async def init(self, events: List[str]) -> tuple[bool, Optional[str]]:
+        """
+        Инициализировать мероприятия из конфига и все уже существующие в БД
+        """
+        base = self.base = self.repo_factory(self.client, events[0])
+        known = await base.list_events()
+        for event in dict.fromkeys(events + known):
+            repo = base.for_event(event)
+            success, error = await repo.init_db()
+            if not success:
+                return False, error
+            self.services[event] = FencesService(repo)
+            logger.info("Event '%s' is ready", event)
+        return True, None
+
+    def __iter__(self) -> Iterator[FencesService]:
+        return iter(self.services.values())
+
+    @property
+    def default(self) -> FencesService:
+        return next(iter(self.services.values()))
+
+    def get(self, event: str) -> Optional[FencesService]:
+        return self.services.get(event)
+
+    async def events_of(self, username: Optional[str]) -> List[str]:
+        """
+        Мероприятия, в которых участвует username
+        """
+        return [event for event, service in self.services.items() if await service.is_allowed(username)]
+
+    async def resolve(self, user: User) -> FencesService:
+        """
+        Мероприятие пользователя: выбранное через /event, либо первое, в котором он участвует.
+        Незнакомым пользователям достается мероприятие по умолчанию, где им откажет AccessControlMiddleware
+        """
+        selected = self.services.get(self._selected.get(user.id))
+        if selected is not None and await selected.is_allowed_user(user.id, user.username):
+            return selected
+        for event, service in self.services.items():
+            if await service.is_allowed_user(user.id, user.username):
+                self._selected[user.id] = event
+                return service
+        return self.default
+
+    def select(self, user_id: int, event: str):
+        self._selected[user_id] = event
@@ -1,19 +1,47 @@
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Optional
 
 from src.config import config
 
-os.makedirs(config.LOG_DIR, exist_ok=True) if config.LOG_DIR else None
+FORMAT = "[%(asctime)s] %(levelname)s: [%(module)s:%(funcName)s]: %(message)s"
 
 logger = logging.getLogger("bot")
-logger.setLevel(level=config.LOG_LEVEL)
 
-console = logging.StreamHandler()
-console.setFormatter(logging.Formatter("[%(asctime)s] %(levelname)s: [%(module)s:%(funcName)s]: %(message)s"))
 
-file = RotatingFileHandler(config.LOG_FILE, maxBytes=1_000_000, backupCount=3, encoding="utf-8")
-file.setFormatter(logging.Formatter("[%(asctime)s] %(levelname)s: [%(module)s:%(funcName)s]: %(message)s"))
+def setup_logging(queue: Optional[Any] = None):
+    """
+    Настроить логгер бота: консоль и файл config.LOG_FILE с ротацией. Вызывается при старте процесса,
+    повторный вызов ничего не делает
 
-logger.addHandler(console)
-logger.addHandler(file)
+    :param queue: очередь ingress-процесса; воркеры пишут записи в нее, а не в файл напрямую,
+        иначе несколько RotatingFileHandler ротировали бы один файл одновременно
+    :type queue: multiprocessing.Queue
+    """
+    if logger.handlers:
+        return
+    logger.setLevel(level=config.LOG_LEVEL)
+    if queue is not None:
+        logger.addHandler(QueueHandler(queue))
+        return
+    if config.LOG_DIR:
+        os.makedirs(config.LOG_DIR, exist_ok=True)
+
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter(FORMAT))
+
+    file = RotatingFileHandler(config.LOG_FILE, maxBytes=1_000_000, backupCount=3, encoding="utf-8")
+    file.setFormatter(logging.Formatter(FORMAT))
+
+    logger.addHandler(console)
+    logger.addHandler(file)
+
+
+def start_log_listener(queue: Any) -> QueueListener:
+    """
+    Писать записи воркеров из queue обработчиками логгера текущего процесса
+    """
+    listener = QueueListener(queue, *logger.handlers, respect_handler_level=True)
+    listener.start()
+    return listener
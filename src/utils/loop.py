@@ -0,0 +1,149 @@
+"""
+Event loop бота: выбор реализации (asyncio или uvloop) и сторож задержек цикла.
+
+LoopLagWatchdog раз в interval секунд засыпает на interval и меряет, насколько позже проснулся - это задержка
+цикла, она копится в гистограмме. Отдельный поток следит за тем, как давно цикл проходил проверку: если дольше
+threshold, цикл чем-то занят синхронно, и поток снимает стек главного потока в этот момент - это и есть код,
+который блокирует цикл
+"""
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Callable, Coroutine, Deque, Dict, Optional
+
+from src.config import config
+from src.utils.logger import logger
+
+# Верхние границы корзин гистограммы задержек, мс
+LAG_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, float("inf"))
+
+
+def loop_factory(name: Optional[str] = None) -> Optional[Callable[[], asyncio.AbstractEventLoop]]:
+    """
+    Фабрика event loop по имени (по умолчанию config.EVENT_LOOP): None для asyncio, uvloop.new_event_loop
+    для uvloop. Если uvloop не установлен, используется asyncio
+    """
+    name = name or config.EVENT_LOOP
+    if name != "uvloop":
+        return None
+    try:
+        import uvloop
+    except ImportError:
+        logger.warning("uvloop is not installed, falling back to asyncio event loop")
+        return None
+    return uvloop.new_event_loop
+
+
+def run(main: Coroutine[Any, Any, Any], loop: Optional[str] = None) -> Any:
+    """
+    asyncio.run с event loop из config.EVENT_LOOP
+    """
+    with asyncio.Runner(loop_factory=loop_factory(loop)) as runner:
+        return runner.run(main)
+
+
+class LagHistogram:
+    """
+    Гистограмма задержек цикла с корзинами LAG_BUCKETS_MS
+    """
+
+    def __init__(self):
+        self.counts = [0] * len(LAG_BUCKETS_MS)
+        self.total = 0
+        self.max_ms = 0.0
+
+    def add(self, lag_ms: float):
+        for index, bound in enumerate(LAG_BUCKETS_MS):
+            if lag_ms <= bound:
+                self.counts[index] += 1
+                break
+        self.total += 1
+        self.max_ms = max(self.max_ms, lag_ms)
+
+    def percentile(self, q: float) -> float:
+        """
+        Верхняя граница корзины, в которую попадает перцентиль q (0..1)
+        """
+        if not self.total:
+            return 0.0
+        rank = q * self.total
+        seen = 0
+        for count, bound in zip(self.counts, LAG_BUCKETS_MS):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def as_dict(self) -> Dict[str, int]:
+        return {f"<={bound:g}ms" if bound != float("inf") else "inf": count
+                for bound, count in zip(LAG_BUCKETS_MS, self.counts)}
+
+
+class LoopLagWatchdog:
+    """
+    Сторож задержек event loop. Запускается start() внутри работающего цикла
+    """
+
+    def __init__(self, interval: float = 0.05, threshold: float = 0.25, keep: int = 20):
+        self.interval = interval
+        self.threshold = threshold
+        self.histogram = LagHistogram()
+        # Последние зависания: длительность, задача и стек кода, который держал цикл
+        self.stalls: Deque[Dict[str, Any]] = deque(maxlen=keep)
+        self.stall_count = 0
+        self._beat = time.monotonic()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._task = asyncio.create_task(self._measure(), name="loop-lag-watchdog")
+        threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _measure(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = time.perf_counter() - started - self.interval
+            self.histogram.add(max(lag, 0.0) * 1000)
+            self._beat = time.monotonic()
+
+    def _watch(self):
+        reported = None
+        while not self._stop.wait(self.interval):
+            beat = self._beat
+            stalled = time.monotonic() - beat - self.interval
+            if stalled < self.threshold or reported == beat:
+                continue
+            # Одно зависание - одна запись, даже если оно длится много проверок
+            reported = beat
+            self._report(stalled)
+
+    def _report(self, stalled: float):
+        frame = sys._current_frames().get(self._thread_id)
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+        task = asyncio.current_task(self._loop) if self._loop is not None else None
+        stall = {"at": time.time(), "stalled_ms": round(stalled * 1000, 1),
+                 "task": task.get_name() if task is not None else None, "stack": stack}
+        self.stalls.append(stall)
+        self.stall_count += 1
+        logger.warning("Event loop is blocked for %.0f ms in task %s:\n%s", stall["stalled_ms"], stall["task"], stack)
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Состояние для статистики: перцентили и максимум задержки (мс), количество зависаний, гистограмма
+        """
+        return {"p50": self.histogram.percentile(0.5), "p99": self.histogram.percentile(0.99),
+                "max": self.histogram.max_ms, "stalls": self.stall_count, "histogram": self.histogram.as_dict()}
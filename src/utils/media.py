@@ -0,0 +1,87 @@
+from typing import Any, Dict, List, NamedTuple
+
+from aiogram import Bot
+from aiogram.types import InputMediaPhoto, InputMediaVideo
+
+# Telegram принимает в альбом от 2 до 10 элементов
+ALBUM_MIN_SIZE = 2
+ALBUM_MAX_SIZE = 10
+ALBUM_MEDIA = {"photo": InputMediaPhoto, "video": InputMediaVideo}
+
+# type -> (метод Bot, имя аргумента с контентом, поддерживается ли подпись)
+SEND_METHODS: Dict[str, tuple[str, str, bool]] = {
+    "text": ("send_message", "text", False),
+    "photo": ("send_photo", "photo", True),
+    "video": ("send_video", "video", True),
+    "video_note": ("send_video_note", "video_note", False),
+    "audio": ("send_audio", "audio", True),
+    "sticker": ("send_sticker", "sticker", False),
+    "document": ("send_document", "document", True),
+    "voice": ("send_voice", "voice", False),
+}
+
+
+class BroadcastStep(NamedTuple):
+    """
+    Один вызов Bot API, подготовленный для рассылки. Не зависит от получателя,
+    поэтому строится один раз и переиспользуется для всех chat_id
+    """
+    method: str
+    kwargs: Dict[str, Any]
+    label: str
+
+    async def send(self, bot: Bot, chat_id: int):
+        return await getattr(bot, self.method)(chat_id=chat_id, **self.kwargs)
+
+
+def _single_step(message: Dict) -> BroadcastStep:
+    method, field, with_caption = SEND_METHODS[message["type"]]
+    kwargs = {field: message["content"]}
+    if with_caption:
+        kwargs["caption"] = message.get("caption")
+    return BroadcastStep(method=method, kwargs=kwargs, label=message["type"])
+
+
+def _album_steps(run: List[Dict]) -> List[BroadcastStep]:
+    steps = []
+    for start in range(0, len(run), ALBUM_MAX_SIZE):
+        chunk = run[start:start + ALBUM_MAX_SIZE]
+        if len(chunk) < ALBUM_MIN_SIZE:
+            steps.extend(_single_step(m) for m in chunk)
+            continue
+        media = [ALBUM_MEDIA[m["type"]](media=m["content"], caption=m.get("caption")) for m in chunk]
+        steps.append(BroadcastStep(method="send_media_group", kwargs={"media": media},
+                                   label=f"album[{len(media)}]"))
+    return steps
+
+
+def prepare_broadcast(messages: List[Dict]) -> tuple[List[BroadcastStep], List[str]]:
+    """
+    Подготовить сообщения, собранные в admin.collect_bot_message, к рассылке.
+    Подряд идущие фото/видео склеиваются в альбомы (send_media_group), для остальных типов
+    заранее выбирается метод Bot API
+
+    :param messages: список словарей вида {"type": ..., "content": file_id/текст, "caption": ...}
+    :type messages:
+    :return: кортеж со списком шагов рассылки и списком неподдерживаемых типов
+    :rtype:
+    """
+    steps: List[BroadcastStep] = []
+    unsupported: List[str] = []
+    run: List[Dict] = []
+
+    for message in messages:
+        if message["type"] in ALBUM_MEDIA:
+            run.append(message)
+            continue
+        if run:
+            steps.extend(_album_steps(run))
+            run = []
+        if message["type"] not in SEND_METHODS:
+            unsupported.append(message["type"])
+            continue
+        steps.append(_single_step(message))
+
+    if run:
+        steps.extend(_album_steps(run))
+    return steps, unsupported
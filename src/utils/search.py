@@ -0,0 +1,98 @@
+"""
+Поиск по сообщениям на заборчике: инвертированный индекс в памяти процесса, который строится при первом поиске
+по заборчику и перестраивается, когда на нем меняется количество сообщений (message_count)
+"""
+import re
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Set
+
+WORD_RE = re.compile(r"\w+")
+SNIPPET_RADIUS = 60
+INDEX_CACHE_SIZE = 64
+
+
+def tokenize(text: str) -> List[str]:
+    return WORD_RE.findall(text.lower().replace("ё", "е"))
+
+
+class BoardIndex:
+    """
+    Индекс одного заборчика: слово -> псевдонимы отправителей. Слова запроса ищутся по префиксу,
+    поэтому «байдарк» найдет и «байдарке», и «байдарками»
+    """
+    __slots__ = ("version", "_aliases", "_texts", "_postings", "_vocabulary")
+
+    def __init__(self, board: Dict[str, Sequence[str]], version: Optional[int] = None):
+        self.version = version
+        self._aliases = list(board)
+        self._texts = {alias: "\n".join(parts) for alias, parts in board.items()}
+        self._postings: Dict[str, Set[str]] = {}
+        for alias, text in self._texts.items():
+            for token in tokenize(text):
+                self._postings.setdefault(token, set()).add(alias)
+        self._vocabulary = sorted(self._postings)
+
+    def _match(self, prefix: str) -> Set[str]:
+        aliases = set()
+        for i in range(bisect_left(self._vocabulary, prefix), len(self._vocabulary)):
+            token = self._vocabulary[i]
+            if not token.startswith(prefix):
+                break
+            aliases |= self._postings[token]
+        return aliases
+
+    def search(self, query: str) -> List[tuple[str, str]]:
+        """
+        Найти сообщения, содержащие все слова запроса
+
+        :param query:
+        :type query:
+        :return: пары (псевдоним, фрагмент текста) в порядке добавления сообщений
+        :rtype:
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        found = self._match(tokens[0])
+        for token in tokens[1:]:
+            if not found:
+                break
+            found &= self._match(token)
+        return [(alias, self.snippet(alias, tokens[0])) for alias in self._aliases if alias in found]
+
+    def snippet(self, alias: str, token: str) -> str:
+        text = self._texts[alias]
+        lowered = text.lower().replace("ё", "е")
+        if len(lowered) != len(text):
+            text = lowered
+        position = max(lowered.find(token), 0)
+        start, end = max(position - SNIPPET_RADIUS, 0), position + len(token) + SNIPPET_RADIUS
+        fragment = " ".join(text[start:end].split())
+        return ("…" if start > 0 else "") + fragment + ("…" if end < len(text) else "")
+
+
+class BoardIndexCache:
+    """
+    Индексы последних INDEX_CACHE_SIZE заборчиков, по которым искали
+    """
+
+    def __init__(self, size: int = INDEX_CACHE_SIZE):
+        self.size = size
+        self._indexes: "OrderedDict[str, BoardIndex]" = OrderedDict()
+
+    def get(self, username: str, version: Optional[int]) -> Optional[BoardIndex]:
+        index = self._indexes.get(username)
+        if index is None or index.version != version:
+            return None
+        self._indexes.move_to_end(username)
+        return index
+
+    def put(self, username: str, index: BoardIndex):
+        self._indexes[username] = index
+        self._indexes.move_to_end(username)
+        while len(self._indexes) > self.size:
+            self._indexes.popitem(last=False)
+
+    def clear(self):
+        self._indexes.clear()
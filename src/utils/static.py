@@ -1,10 +1,11 @@
 from io import StringIO
-from typing import Dict, List
+from typing import Dict, Sequence
 
 from src.config import config
 
 
-def validate_alias(alias: str, max_bytes: int = config.ALIAS_BYTE_LIMIT) -> tuple[bool, str | None]:
+def validate_alias(alias: str, max_bytes: int | None = None) -> tuple[bool, str | None]:
+    max_bytes = max_bytes or config.ALIAS_BYTE_LIMIT
     alias = alias.strip()
     try:
         encoded = alias.encode("utf-8")
@@ -17,7 +18,7 @@ def validate_alias(alias: str, max_bytes: int = config.ALIAS_BYTE_LIMIT) -> tupl
     return True, None
 
 
-def prepared_msg_file(board: Dict[str, List[str]]) -> StringIO:
+def prepared_msg_file(board: Dict[str, Sequence[str]]) -> StringIO:
     file_content = StringIO()
     for alias, messages in board.items():
         file_content.write(f"{alias}:\n")
@@ -0,0 +1,105 @@
+"""
+Архив всех заборчиков мероприятия одним ZIP-файлом - по файлу на заборчик в формате «📄 Получить файл» (txt)
+или в JSON. Архив пишется по мере чтения курсора: в памяти одновременно только одно сообщение (txt)
+или один заборчик (json). Сжатие и запись на диск идут в отдельном потоке, по заборчику за раз, чтобы
+большой архив не останавливал event loop бота
+"""
+import asyncio
+import json
+import os
+import tempfile
+import zipfile
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from src.config import config
+from src.db.codec import LazyParts
+from src.db.repository import FencesRepository
+from src.utils.logger import logger
+from src.utils.static import prepared_msg_file
+
+ARCHIVE_FORMATS = ("txt", "json")
+
+
+def _board_json(board: Dict[str, Any]) -> bytes:
+    messages = [{"sender_alias": message["sender_alias"],
+                 "sender_username": message.get("sender_username"),
+                 "addition_time": message["addition_time"].isoformat() if message.get("addition_time") else None,
+                 "parts": list(LazyParts.from_doc(message))}
+                for message in board.get("messages", [])]
+    return json.dumps({"event": board.get("event"), "username": board["username"], "messages": messages},
+                      ensure_ascii=False, indent=1).encode("utf-8")
+
+
+def _write_board(archive: zipfile.ZipFile, board: Dict[str, Any], fmt: str):
+    with archive.open(f"{board['username']}.{fmt}", "w") as entry:
+        if fmt == "json":
+            entry.write(_board_json(board))
+        else:
+            for message in board.get("messages", []):
+                block = prepared_msg_file({message["sender_alias"]: LazyParts.from_doc(message)})
+                entry.write(block.getvalue().encode("utf-8"))
+
+
+async def write_archive(repo: FencesRepository, path: str, fmt: str = "txt") -> int:
+    """
+    Записать все заборчики мероприятия в ZIP-архив path. Ошибки БД и файловой системы пробрасываются
+
+    :param repo:
+    :type repo:
+    :param path:
+    :type path:
+    :param fmt: txt или json
+    :type fmt:
+    :return: количество заборчиков в архиве
+    :rtype:
+    """
+    if fmt not in ARCHIVE_FORMATS:
+        raise ValueError(f"Archive format must be one of {ARCHIVE_FORMATS}, got '{fmt}'")
+    boards = 0
+    archive = await asyncio.to_thread(zipfile.ZipFile, path, "w", compression=zipfile.ZIP_DEFLATED)
+    try:
+        async for board in repo.iter_boards():
+            # Архив в каждый момент пишет только один поток, поэтому ZipFile можно передавать между ними
+            await asyncio.to_thread(_write_board, archive, board, fmt)
+            boards += 1
+    finally:
+        await asyncio.to_thread(archive.close)
+    return boards
+
+
+async def build_archive(repo: FencesRepository, fmt: Optional[str] = None, output: Optional[str] = None) -> str:
+    """
+    Собрать архив мероприятия в файл. Пока архив пишется, он лежит рядом под временным именем
+
+    :param repo:
+    :type repo:
+    :param fmt: txt или json (по умолчанию config.ARCHIVE_FORMAT)
+    :type fmt:
+    :param output: путь к архиву или каталог (по умолчанию config.ARCHIVE_DIR, а без него - временный каталог)
+    :type output:
+    :return: путь к готовому архиву
+    :rtype:
+    """
+    fmt = fmt or config.ARCHIVE_FORMAT
+    name = f"fences_{repo.event}_{datetime.now():%Y%m%d_%H%M%S}.zip"
+    if output is None:
+        directory = config.ARCHIVE_DIR or tempfile.gettempdir()
+        os.makedirs(directory, exist_ok=True)
+        output = os.path.join(directory, name)
+    elif os.path.isdir(output):
+        output = os.path.join(output, name)
+    elif os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+
+    tmp_path = f"{output}.part"
+    try:
+        boards = await write_archive(repo, tmp_path, fmt)
+        os.replace(tmp_path, output)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    logger.info("Archived %d boards of event '%s' to %s (%d bytes)", boards, repo.event, output,
+                os.path.getsize(output))
+    return output
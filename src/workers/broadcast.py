@@ -0,0 +1,85 @@
+import asyncio
+from typing import List, Optional
+
+from aiogram import Bot
+
+from src.config import config
+from src.services import FencesService
+from src.utils.logger import logger
+from src.utils.media import BroadcastStep, prepare_broadcast
+from src.utils.rate_limit import TokenBucket
+
+
+class BroadcastWorker:
+    """
+    Фоновая отправка рассылок из очереди fences_bot_broadcasts.
+    Каждому получателю соответствует запись в журнале fences_bot_deliveries, поэтому после рестарта
+    обрабатываются только получатели со статусом pending
+    """
+
+    def __init__(self, service: FencesService, bot: Bot, bucket: Optional[TokenBucket] = None):
+        """
+        :param bucket: общий на все мероприятия лимит запросов к Bot API
+        :type bucket:
+        """
+        self.service = service
+        self.repo = service.repo
+        self.bot = bot
+        self.bucket = bucket or TokenBucket(rate=config.BROADCAST_RATE)
+
+    async def run(self):
+        logger.info("Broadcast worker for event '%s' started", self.service.event)
+        while True:
+            try:
+                jobs = await self.repo.get_active_broadcasts()
+                for job in jobs:
+                    await self._process(job)
+            except Exception as e:
+                logger.exception("Broadcast worker iteration failed: %s", e)
+
+            try:
+                await asyncio.wait_for(self.service.broadcast_wakeup.wait(), timeout=config.BROADCAST_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self.service.broadcast_wakeup.clear()
+
+    async def _process(self, job: dict):
+        job_id = job["_id"]
+        steps, _ = prepare_broadcast(job["messages"])
+        await self.repo.set_broadcast_status(job_id, "running")
+        while True:
+            deliveries = await self.repo.get_deliveries(job_id, status="pending")
+            if not deliveries:
+                done, error = await self.repo.finish_broadcast(job_id)
+                if done:
+                    logger.info("Broadcast %s finished", job_id)
+                if done or error:
+                    return
+                # Повтор недоставленных вернул задание в pending после последней проверки: берем его снова
+                await self.repo.set_broadcast_status(job_id, "running")
+                continue
+            logger.info("Processing broadcast %s: %d pending recipients", job_id, len(deliveries))
+
+            # chat_id берется на момент отправки: при повторе пользователь мог уже запустить бота
+            members = await self.repo.get_all_members()
+            chat_ids = {member["username"]: member.get("chat_id") for member in members}
+
+            for delivery in deliveries:
+                chat_id = chat_ids.get(delivery["username"])
+                if not chat_id:
+                    await self.repo.mark_delivery(delivery["_id"], "failed", error="chat_id не найден")
+                    continue
+                error = await self._send(steps, chat_id)
+                await self.repo.mark_delivery(delivery["_id"], "failed" if error else "sent", chat_id=chat_id,
+                                              error=error)
+
+    async def _send(self, steps: List[BroadcastStep], chat_id: int) -> str | None:
+        for step in steps:
+            await self.bucket.acquire()
+            try:
+                await step.send(self.bot, chat_id)
+            except Exception as e:
+                logger.error("Failed to send %s message to chat_id %s: %s", step.label, chat_id, str(e))
+                return str(e)
+        return None
+
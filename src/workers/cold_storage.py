@@ -0,0 +1,155 @@
+"""
+Холодный архив завершенных мероприятий.
+
+Заборчики мероприятия переносятся из fences_bot_messages в сжатый файл (JSON Lines в gzip, по строке
+на заборчик, типы BSON сохраняются через bson.json_util), а в коллекции fences_bot_cold остается запись
+с путем к файлу и количеством заборчиков и сообщений. Документы заборчиков в БД очищаются, но не удаляются,
+поэтому запись на заборчик работает и после архивации: сообщения, добавленные во время или после архивации,
+остаются в БД. Файл - единственная копия заархивированных сообщений, поэтому архивация отказывается писать
+его в каталог, который пропадет вместе с контейнером (не смонтированный томом). Восстановление возвращает сообщения из файла в БД.
+Сжатие и чтение файла идут в отдельном потоке, по заборчику за раз, чтобы не останавливать event loop бота
+"""
+import asyncio
+import gzip
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional, TextIO
+
+from bson import json_util
+
+from src.config import config
+from src.db.repository import FencesRepository
+from src.utils.logger import logger
+
+COLD_SUFFIX = ".jsonl.gz"
+ARCHIVED = "archived"
+RESTORED = "restored"
+# Файловые системы, содержимое которых теряется при пересоздании контейнера или перезагрузке
+EPHEMERAL_FS = ("overlay", "aufs", "tmpfs")
+
+
+def cold_path(event: str) -> str:
+    return os.path.join(config.COLD_STORAGE_DIR, f"{event}{COLD_SUFFIX}")
+
+
+def is_persistent(path: str) -> bool:
+    """
+    Находится ли path на постоянном диске, а не в слое контейнера или в tmpfs. Без /proc (не Linux)
+    считается, что на постоянном
+    """
+    try:
+        with open("/proc/self/mounts", encoding="utf-8") as f:
+            mounts = [line.split()[1:3] for line in f if line.strip()]
+    except OSError:
+        return True
+    path = os.path.realpath(path)
+    mount_point, fs_type = "", None
+    for point, fs in mounts:
+        point = point.replace("\\040", " ")
+        if (path == point or path.startswith(point.rstrip("/") + "/")) and len(point) >= len(mount_point):
+            mount_point, fs_type = point, fs
+    return fs_type not in EPHEMERAL_FS
+
+
+def is_safe_storage(path: str) -> bool:
+    """
+    Можно ли писать холодный архив в path: каталог на постоянном диске или проверка отключена
+    через COLD_STORAGE_REQUIRE_PERSISTENT (например, tmpfs, который сохраняется другими средствами)
+    """
+    return not config.COLD_STORAGE_REQUIRE_PERSISTENT or is_persistent(path)
+
+
+def _count_lines(path: str) -> int:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return sum(1 for _ in f)
+
+
+def _write_board(f: TextIO, board: Dict[str, Any]):
+    f.write(json_util.dumps(board, json_options=json_util.CANONICAL_JSON_OPTIONS))
+    f.write("\n")
+
+
+def _read_board(f: TextIO) -> Optional[Dict[str, Any]]:
+    line = f.readline()
+    return json_util.loads(line) if line else None
+
+
+async def archive_event(repo: FencesRepository) -> Optional[Dict[str, Any]]:
+    """
+    Перенести заборчики мероприятия в холодный архив. Файл дописывается под временным именем и перечитывается,
+    и только после этого заборчики очищаются в БД. Ошибки БД и файловой системы пробрасываются
+
+    :param repo:
+    :type repo:
+    :return: запись о холодном архиве или None, если на заборчиках нет сообщений или мероприятие уже в архиве
+    :rtype:
+    """
+    existing = await repo.get_cold_entry()
+    if existing is not None and existing.get("status") == ARCHIVED:
+        # Перезапись файла потеряла бы заархивированные сообщения: сначала restore_event
+        logger.warning("Event '%s' is already in cold storage %s", repo.event, existing["path"])
+        return None
+    os.makedirs(config.COLD_STORAGE_DIR, exist_ok=True)
+    if not is_safe_storage(config.COLD_STORAGE_DIR):
+        raise OSError(f"Cold storage directory {config.COLD_STORAGE_DIR} is not on persistent storage")
+    path = cold_path(repo.event)
+    tmp_path = f"{path}.part"
+    boards = messages = 0
+    # Сколько сообщений каждого заборчика попало в файл: очищаются только они
+    archived: Dict[Any, int] = {}
+    try:
+        f = await asyncio.to_thread(gzip.open, tmp_path, "wt", encoding="utf-8")
+        try:
+            async for board in repo.iter_boards():
+                if not board.get("messages"):
+                    continue
+                await asyncio.to_thread(_write_board, f, board)
+                archived[board["_id"]] = len(board["messages"])
+                boards += 1
+                messages += len(board["messages"])
+        finally:
+            await asyncio.to_thread(f.close)
+        if not boards:
+            os.unlink(tmp_path)
+            return None
+        if await asyncio.to_thread(_count_lines, tmp_path) != boards:
+            raise OSError(f"Cold archive {tmp_path} is incomplete")
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+    entry = {"path": path, "boards": boards, "messages": messages, "size": os.path.getsize(path),
+             "status": ARCHIVED, "archived_at": datetime.now()}
+    await repo.set_cold_entry(entry)
+    cleared = await repo.clear_boards(archived)
+    logger.info("Moved %d boards (%d messages) of event '%s' to cold storage %s, %d boards cleared", boards,
+                messages, repo.event, path, cleared)
+    return entry
+
+
+async def restore_event(repo: FencesRepository) -> Optional[int]:
+    """
+    Вернуть заборчики мероприятия из холодного архива в БД. Повторный запуск после сбоя не дублирует сообщения.
+    Ошибки БД и файловой системы пробрасываются
+
+    :param repo:
+    :type repo:
+    :return: количество восстановленных заборчиков или None, если мероприятие не в архиве
+    :rtype:
+    """
+    entry = await repo.get_cold_entry()
+    if entry is None or entry.get("status") != ARCHIVED:
+        return None
+    restored = 0
+    f = await asyncio.to_thread(gzip.open, entry["path"], "rt", encoding="utf-8")
+    try:
+        while (board := await asyncio.to_thread(_read_board, f)) is not None:
+            if await repo.restore_board(board):
+                restored += 1
+    finally:
+        await asyncio.to_thread(f.close)
+    await repo.set_cold_entry({"status": RESTORED, "restored_at": datetime.now()})
+    logger.info("Restored %d boards of event '%s' from cold storage %s", restored, repo.event, entry["path"])
+    return restored
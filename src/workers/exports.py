@@ -0,0 +1,137 @@
+"""
+Готовые файлы выгрузки заборчиков («📄 Получить файл»).
+
+После EOL_DATETIME заборчики больше не меняются, поэтому файлы всех участников рендерятся заранее в пуле процессов
+и лежат на диске. Первый запрос отправляет файл в Telegram, а его file_id сохраняется в БД, так что повторные
+выгрузки - это один send_document без чтения заборчика. Файл и file_id привязаны к количеству сообщений
+на заборчике (версии) и не используются, если заборчик изменился
+"""
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Sequence
+
+from src.config import config
+from src.db.repository import FencesRepository
+from src.utils.logger import logger
+from src.utils.static import prepared_msg_file
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=config.EXPORT_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def reset_pool():
+    """
+    Выбросить пул, в котором упал процесс: следующий get_pool создаст новый
+    """
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def render_export(path: str, board: Dict[str, Sequence[str]]) -> int:
+    """
+    Отрендерить файл выгрузки заборчика в path. Выполняется в процессе пула
+
+    :return: размер файла в байтах
+    :rtype:
+    """
+    content = prepared_msg_file(board).getvalue().encode("utf-8")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+    return len(content)
+
+
+class ExportCache:
+    """
+    Файлы выгрузки и file_id одного мероприятия
+    """
+
+    def __init__(self, repo: FencesRepository):
+        self.repo = repo
+        self._file_ids: Dict[str, tuple[str, int]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def directory(self) -> str:
+        return os.path.join(config.EXPORT_DIR, self.repo.event)
+
+    def path(self, username: str, version: int) -> str:
+        return os.path.join(self.directory, f"{username}.{version}.txt")
+
+    async def lookup(self, username: str, version: int) -> tuple[Optional[str], Optional[str]]:
+        """
+        Найти готовую выгрузку заборчика username с version сообщениями
+
+        :return: file_id в Telegram и путь к файлу на диске (любое из них может быть None)
+        :rtype:
+        """
+        cached = self._file_ids.get(username)
+        if cached is None:
+            cached = await self.repo.get_export_file_id(username)
+            if cached is not None:
+                self._file_ids[username] = cached
+        file_id = cached[0] if cached is not None and cached[1] == version else None
+        path = self.path(username, version)
+        return file_id, path if os.path.exists(path) else None
+
+    async def remember(self, username: str, file_id: str, version: int):
+        self._file_ids[username] = (file_id, version)
+        await self.repo.set_export_file_id(username, file_id, version)
+
+    def invalidate(self):
+        self._file_ids.clear()
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
+
+    def start_prerender(self, usernames: Iterable[str],
+                        load_board: Callable[[str], Awaitable[Dict[str, Sequence[str]]]]):
+        """
+        Запустить фоновый рендер выгрузок (один раз, пока не вызван invalidate)
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self.prerender(list(usernames), load_board))
+
+    async def prerender(self, usernames: list[str], load_board: Callable[[str], Awaitable[Dict[str, Sequence[str]]]]):
+        """
+        Отрендерить выгрузки всех заборчиков в пуле процессов. Уже готовые файлы не перерендериваются
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        loop = asyncio.get_running_loop()
+        pool = get_pool()
+        limit = asyncio.Semaphore(config.EXPORT_WORKERS * 2)
+        rendered = 0
+
+        async def render(username: str):
+            nonlocal rendered
+            async with limit:
+                board = await load_board(username)
+                if not board:
+                    return
+                path = self.path(username, len(board))
+                if os.path.exists(path):
+                    return
+                # В процесс пула уходят обычные списки: LazyParts и mmap снимка не сериализуются
+                await loop.run_in_executor(pool, render_export, path,
+                                           {alias: list(parts) for alias, parts in board.items()})
+                rendered += 1
+
+        results = await asyncio.gather(*(render(username) for username in usernames), return_exceptions=True)
+        if any(isinstance(result, BrokenProcessPool) for result in results):
+            reset_pool()
+        for username, result in zip(usernames, results):
+            if isinstance(result, Exception):
+                logger.error("Failed to render export for %s: %s", username, str(result))
+        logger.info("Rendered %d board exports for event '%s'", rendered, self.repo.event)
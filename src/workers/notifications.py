@@ -0,0 +1,81 @@
+import asyncio
+import time
+from typing import Dict, Optional
+
+from aiogram import Bot
+
+from src.config import config
+from src.db.repository import FencesRepository
+from src.lexicon import lexicon
+from src.utils.logger import logger
+from src.utils.rate_limit import TokenBucket
+
+
+class DigestNotifier:
+    """
+    Уведомления о новых сообщениях на заборчике. События save_message копятся в памяти по получателю,
+    а дайджест уходит, когда для получателя NOTIFY_DEBOUNCE_SECONDS не было новых сообщений
+    (но не позже NOTIFY_MAX_DELAY_SECONDS после первого)
+    """
+
+    def __init__(self, repo: FencesRepository, bot: Bot, bucket: Optional[TokenBucket] = None):
+        self.repo = repo
+        self.bot = bot
+        self.bucket = bucket or TokenBucket(rate=config.NOTIFY_RATE)
+        self._counts: Dict[str, int] = {}
+        self._first: Dict[str, float] = {}
+        self._last: Dict[str, float] = {}
+        self._wakeup = asyncio.Event()
+
+    def record(self, recipient_username: str):
+        """
+        Учесть новое сообщение на заборчике recipient_username
+        """
+        now = time.monotonic()
+        self._counts[recipient_username] = self._counts.get(recipient_username, 0) + 1
+        self._first.setdefault(recipient_username, now)
+        self._last[recipient_username] = now
+        self._wakeup.set()
+
+    def _flush_at(self, username: str) -> float:
+        return min(self._last[username] + config.NOTIFY_DEBOUNCE_SECONDS,
+                   self._first[username] + config.NOTIFY_MAX_DELAY_SECONDS)
+
+    async def run(self):
+        logger.info("Digest notifier for event '%s' started", self.repo.event)
+        while True:
+            self._wakeup.clear()
+            now = time.monotonic()
+            due = [username for username in self._counts if self._flush_at(username) <= now]
+            if due:
+                try:
+                    await self._flush(due)
+                except Exception as e:
+                    logger.exception("Digest flush failed: %s", e)
+                continue
+
+            timeout = min((self._flush_at(username) for username in self._counts), default=None)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=None if timeout is None else timeout - now)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _flush(self, usernames: list[str]):
+        digests = {}
+        for username in usernames:
+            digests[username] = self._counts.pop(username)
+            del self._first[username], self._last[username]
+
+        members = await self.repo.get_all_members()
+        chat_ids = {member["username"]: member.get("chat_id") for member in members}
+        for username, count in digests.items():
+            chat_id = chat_ids.get(username)
+            if not chat_id:
+                logger.debug("No chat_id for %s, digest of %d letters skipped", username, count)
+                continue
+            await self.bucket.acquire()
+            try:
+                await self.bot.send_message(chat_id=chat_id, text=lexicon.MSG_NEW_LETTERS.render(count=count))
+            except Exception as e:
+                logger.error("Failed to send digest to %s (chat_id: %s): %s", username, chat_id, str(e))
+        logger.info("Sent %d letter digests", len(digests))
@@ -0,0 +1,164 @@
+import asyncio
+import heapq
+import itertools
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from src.config import config
+from src.db import models
+from src.lexicon import lexicon
+from src.services import FencesService
+from src.tenants import TenantRegistry
+from src.utils.logger import logger
+
+
+class Scheduler:
+    """
+    Отложенные задания (рассылки и напоминания о дедлайне) из коллекции fences_bot_scheduled.
+    Задания всех мероприятий лежат в одной куче по времени срабатывания, а единственная корутина спит до ближайшего
+    из них, поэтому количество запланированных заданий не влияет на нагрузку в простое.
+    Куча есть только у процесса, в котором запущен run(); остальные процессы читают список заданий из БД
+    """
+
+    def __init__(self, registry: TenantRegistry):
+        self.registry = registry
+        self._heap: List[tuple[datetime, int, Any]] = []
+        self._jobs: Dict[Any, dict] = {}
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._running = False
+        # Колбэк (event, kind) для синхронизации между процессами, см. src/sharding.py
+        self.on_change: Optional[Callable[[str, str], None]] = None
+
+    def _push(self, doc: dict):
+        if not self._running:
+            return
+        self._jobs[doc["_id"]] = doc
+        heapq.heappush(self._heap, (doc["fire_at"], next(self._seq), doc["_id"]))
+        self._wakeup.set()
+
+    async def load(self):
+        """
+        Загрузить несработавшие задания из БД (в т.ч. пропущенные во время простоя - они сработают сразу)
+        """
+        for service in self.registry:
+            for doc in await service.repo.get_pending_scheduled_jobs():
+                self._push(doc)
+        logger.info("Scheduler loaded %d pending jobs", len(self._jobs))
+
+    async def reload(self):
+        """
+        Перечитать задания из БД (после изменений, сделанных другим процессом)
+        """
+        if not self._running:
+            return
+        self._heap.clear()
+        self._jobs.clear()
+        await self.load()
+
+    def _notify_change(self, event: str):
+        if self.on_change is not None:
+            self.on_change(event, "scheduled")
+
+    async def schedule_broadcast(self, service: FencesService, fire_at: datetime, recipient_label: Optional[str],
+                                 messages: List[Dict], created_by: Optional[str] = None) -> tuple[bool, Optional[str]]:
+        """
+        Запланировать рассылку от имени бота на fire_at в мероприятии service
+        """
+        if fire_at <= datetime.now():
+            return False, "❌ Это время уже прошло"
+        job = models.ScheduledJob(kind="broadcast", fire_at=fire_at, created_by=created_by,
+                                  payload={"recipient_label": recipient_label, "messages": messages})
+        doc, error = await service.repo.add_scheduled_job(job)
+        if error:
+            return False, error
+        self._push(doc)
+        self._notify_change(service.event)
+        return True, None
+
+    @staticmethod
+    async def upcoming_for(service: FencesService) -> List[dict]:
+        """
+        Несработавшие задания мероприятия service. Читаются из БД, чтобы список был актуален в любом процессе
+        """
+        docs = await service.repo.get_pending_scheduled_jobs()
+        return sorted(docs, key=lambda doc: doc["fire_at"])
+
+    async def sync_eol_reminders(self, service: FencesService, fire_overdue: bool = False):
+        """
+        Перепланировать напоминания «осталось N часов» под текущий дедлайн мероприятия service
+
+        :param fire_overdue: сначала отправить напоминание, срок которого наступил, пока бот был выключен
+        :type fire_overdue: bool
+        """
+        eol = await service.get_eol_datetime()
+        now = datetime.now()
+        if fire_overdue and eol is not None and eol > now:
+            overdue = [doc for doc in await service.repo.get_pending_scheduled_jobs()
+                       if doc["kind"] == "eol_reminder" and doc["fire_at"] <= now]
+            if overdue:
+                # Из нескольких пропущенных напоминаний актуально только последнее, остальные отменятся ниже
+                await self._fire(max(overdue, key=lambda doc: doc["fire_at"]))
+        reminders = []
+        if eol is not None:
+            reminders = [models.ScheduledJob(kind="eol_reminder", fire_at=eol - timedelta(hours=hours),
+                                             payload={"hours": hours})
+                         for hours in config.EOL_REMINDER_HOURS if eol - timedelta(hours=hours) > now]
+        docs, error = await service.repo.replace_eol_reminders(reminders)
+        if error:
+            logger.error("Failed to reschedule EOL reminders: %s", error)
+            return
+        # Старые напоминания остаются в куче, но без записи в _jobs и будут пропущены
+        for job_id in [job_id for job_id, doc in self._jobs.items()
+                       if doc["kind"] == "eol_reminder" and doc["event"] == service.event]:
+            del self._jobs[job_id]
+        for doc in docs:
+            self._push(doc)
+        self._notify_change(service.event)
+
+    async def run(self):
+        self._running = True
+        await self.load()
+        for service in self.registry:
+            await self.sync_eol_reminders(service, fire_overdue=True)
+        logger.info("Scheduler started")
+        while True:
+            self._wakeup.clear()
+            timeout = None
+            if self._heap:
+                timeout = max(0.0, (self._heap[0][0] - datetime.now()).total_seconds())
+            if timeout is None or timeout > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, _, job_id = heapq.heappop(self._heap)
+            doc = self._jobs.pop(job_id, None)
+            if doc is None:
+                continue
+            try:
+                await self._fire(doc)
+            except Exception as e:
+                logger.exception("Scheduled job %s failed: %s", job_id, e)
+
+    async def _fire(self, doc: dict):
+        payload = doc.get("payload", {})
+        service = self.registry.get(doc["event"])
+        if service is None:
+            logger.error("Scheduled job %s belongs to unknown event '%s'", doc["_id"], doc["event"])
+            return
+        if doc["kind"] == "broadcast":
+            _, error = await service.enqueue_broadcast(payload.get("recipient_label"), payload["messages"],
+                                                            created_by=doc.get("created_by"))
+        elif doc["kind"] == "eol_reminder":
+            text = lexicon.MSG_EOL_REMINDER.render(hours=payload["hours"])
+            _, error = await service.enqueue_broadcast(None, [{"type": "text", "content": text}])
+        else:
+            error = f"unknown job kind {doc['kind']}"
+
+        if error:
+            logger.error("Scheduled %s job %s was not queued: %s", doc["kind"], doc["_id"], error)
+        await service.repo.set_scheduled_job_status(doc["_id"], "fired")
+        logger.info("Fired scheduled %s job %s", doc["kind"], doc["_id"])
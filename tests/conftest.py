@@ -0,0 +1,49 @@
+"""
+Общие фикстуры тестов. MongoDB подменяется mongomock_motor, поэтому тесты не требуют ни сервера, ни .env.
+Асинхронный код запускается через asyncio.run внутри обычных тестов
+"""
+import os
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+os.environ.setdefault("MONGO_INITDB_ROOT_USERNAME", "test")
+os.environ.setdefault("MONGO_INITDB_ROOT_PASSWORD", "test")
+os.environ.setdefault("BOT_TOKEN", "123456:TEST")
+os.environ.setdefault("LOOP_WATCHDOG", "false")
+
+from src.config import load_config  # noqa: E402
+from src.db.repository import FencesRepository  # noqa: E402
+from src.services import FencesService  # noqa: E402
+
+
+@pytest.fixture
+def settings(monkeypatch, tmp_path):
+    """
+    Переопределить настройки: settings(WORKERS=2, ...). Каталоги бота по умолчанию во временном каталоге теста
+    """
+    def apply(**values):
+        for name, value in values.items():
+            monkeypatch.setenv(name, str(value))
+        load_config.cache_clear()
+
+    apply(LOG_FILE=tmp_path / "logs" / "bot.log", OUTBOX_DIR=tmp_path / "outbox", COLD_STORAGE_DIR=tmp_path / "cold",
+          EXPORT_DIR=tmp_path / "exports")
+    yield apply
+    load_config.cache_clear()
+
+
+@pytest.fixture
+def client(settings):
+    return AsyncMongoMockClient()
+
+
+@pytest.fixture
+def repo(client):
+    return FencesRepository(client)
+
+
+@pytest.fixture
+def service(repo):
+    return FencesService(repo)
+
@@ -0,0 +1,11 @@
+from src.db.records import MemberRecord
+from src.db.repository import FencesRepository
+
+
+async def add_members(repo: FencesRepository, *labels: str, chat_id: int = 0):
+    """
+    Инициализировать мероприятие и добавить участников с username = label в нижнем регистре
+    """
+    await repo.init_db()
+    for label in labels:
+        await repo.add_member(MemberRecord(username=label.lower(), label=label, chat_id=chat_id))
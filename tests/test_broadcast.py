@@ -0,0 +1,66 @@
+import asyncio
+
+from src.db.records import MemberRecord
+from src.workers.broadcast import BroadcastWorker
+from tests.helpers import add_members
+
+
+def test_enqueue_resolves_chat_id_with_one_members_query(service, repo, monkeypatch):
+    async def scenario():
+        await add_members(repo, "Anna", "Boris", chat_id=42)
+        monkeypatch.setattr(repo, "get_user_chat_id", None)
+        job_id, error = await service.enqueue_broadcast("Anna", [{"type": "text", "content": "hi"}])
+        assert error is None
+        deliveries = await repo.get_deliveries(job_id)
+        assert [(d["label"], d["status"]) for d in deliveries] == [("Anna", "pending")]
+
+    asyncio.run(scenario())
+
+
+def test_enqueue_refuses_recipient_without_chat_id(service, repo):
+    async def scenario():
+        await add_members(repo, "Anna", chat_id=0)
+        job_id, error = await service.enqueue_broadcast("Anna", [{"type": "text", "content": "hi"}])
+        assert job_id is None and "chat_id" in error
+
+    asyncio.run(scenario())
+
+
+class FlakyBot:
+    """
+    Бот, у которого первая отправка Anna падает, а во время отправки Boris админ повторяет недоставленные
+    """
+
+    def __init__(self, service, job):
+        self.service = service
+        self.job = job
+        self.sent = []
+        self.failed_once = False
+
+    async def send_message(self, chat_id: int, text: str):
+        if chat_id == 1 and not self.failed_once:
+            self.failed_once = True
+            raise RuntimeError("Bad Gateway")
+        if chat_id == 2 and not self.sent:
+            await self.service.retry_broadcast(self.job["id"])
+        self.sent.append(chat_id)
+
+
+def test_retry_during_processing_is_not_overwritten_by_done(service, repo, settings):
+    settings(BROADCAST_RATE=1000)
+
+    async def scenario():
+        await repo.init_db()
+        await repo.add_member(MemberRecord(username="anna", label="Anna", chat_id=1))
+        await repo.add_member(MemberRecord(username="boris", label="Boris", chat_id=2))
+        job_id, _ = await service.enqueue_broadcast(None, [{"type": "text", "content": "hi"}])
+        bot = FlakyBot(service, {"id": job_id})
+        worker = BroadcastWorker(service, bot)
+        for job in await repo.get_active_broadcasts():
+            await worker._process(job)
+
+        assert bot.sent == [2, 1]
+        assert {d["status"] for d in await repo.get_deliveries(job_id)} == {"sent"}
+        assert await repo.get_active_broadcasts() == []
+
+    asyncio.run(scenario())
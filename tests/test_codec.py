@@ -0,0 +1,31 @@
+import pytest
+
+from src.db import codec
+from src.db.codec import LazyParts, decode_parts, encode_parts
+
+
+@pytest.fixture
+def compression(settings):
+    def apply(name: str, threshold: int = 16):
+        settings(MESSAGE_COMPRESSION=name, MESSAGE_COMPRESSION_THRESHOLD=threshold)
+        codec._compressor.cache_clear()
+
+    yield apply
+    codec._compressor.cache_clear()
+
+
+def test_long_message_is_compressed_and_restored(compression):
+    compression("zlib")
+    parts = ["Привет! " * 50, "ещё часть"]
+    stored, name = encode_parts(parts)
+    assert name == codec.ZLIB and not isinstance(stored, list)
+    assert decode_parts(stored, name) == parts
+    assert list(LazyParts.from_doc({"parts": stored, "codec": name})) == parts
+
+
+def test_short_or_uncompressed_message_is_stored_as_is(compression):
+    compression("zlib", threshold=1024)
+    assert encode_parts(["коротко"]) == (["коротко"], None)
+    compression("none")
+    assert encode_parts(["Привет! " * 50]) == (["Привет! " * 50], None)
+    assert LazyParts.from_doc({"parts": ["a", "b"]}) == ["a", "b"]
@@ -0,0 +1,16 @@
+from types import SimpleNamespace
+
+from src.workers import cold_storage
+
+
+def test_persistence_check_can_be_disabled(settings, monkeypatch, tmp_path):
+    monkeypatch.setattr(cold_storage, "is_persistent", lambda path: False)
+    assert not cold_storage.is_safe_storage(str(tmp_path))
+    settings(COLD_STORAGE_REQUIRE_PERSISTENT="false")
+    assert cold_storage.is_safe_storage(str(tmp_path))
+
+
+def test_board_caches_include_search_indexes(service):
+    service.search_indexes.put("anna", SimpleNamespace(version=1))
+    service.drop_board_caches()
+    assert service.search_indexes.get("anna", 1) is None
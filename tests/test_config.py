@@ -0,0 +1,23 @@
+import pytest
+
+from src.config import config
+
+
+def test_credentials_are_checked_only_for_mongo_url(settings, monkeypatch):
+    monkeypatch.delenv("MONGO_INITDB_ROOT_USERNAME")
+    monkeypatch.delenv("MONGO_INITDB_ROOT_PASSWORD")
+    monkeypatch.delenv("MONGO_DB_URL", raising=False)
+    settings(WORKERS=2)
+    assert config.WORKERS == 2
+    assert config.DATETIME_PATTERN == '%d.%m.%Y %H:%M:%S'
+    with pytest.raises(IOError):
+        config.MONGO_DB_URL
+
+    settings(MONGO_DB_URL="mongodb://localhost:27017/fences")
+    assert config.MONGO_DB_URL == "mongodb://localhost:27017/fences"
+
+
+def test_mongo_url_is_built_from_credentials(settings, monkeypatch):
+    monkeypatch.delenv("MONGO_DB_URL", raising=False)
+    settings(MONGO_INITDB_ROOT_USERNAME="bot", MONGO_INITDB_ROOT_PASSWORD="secret", MONGO_HOST="db")
+    assert config.MONGO_DB_URL == "mongodb://bot:secret@db:27017/fences?authSource=admin"
@@ -0,0 +1,48 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.middleware.dedup import UpdateDeduplicationMiddleware
+
+
+class Handler:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.calls = 0
+
+    async def __call__(self, event, data):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("handler crashed")
+        return "handled"
+
+
+def test_repeated_update_is_dropped():
+    async def scenario():
+        middleware = UpdateDeduplicationMiddleware(size=10)
+        handler = Handler()
+        update = SimpleNamespace(update_id=1)
+        assert await middleware(handler, update, {}) == "handled"
+        assert await middleware(handler, update, {}) is None
+        assert (handler.calls, middleware.duplicates) == (1, 1)
+
+    asyncio.run(scenario())
+
+
+def test_update_is_persisted_only_after_it_was_handled(client):
+    async def scenario():
+        collection = client.fences.fences_bot_updates
+        update = SimpleNamespace(update_id=7)
+        with pytest.raises(RuntimeError):
+            await UpdateDeduplicationMiddleware(collection=collection)(Handler(fail=True), update, {})
+        assert await collection.count_documents({}) == 0
+
+        # После перезапуска апдейт, обработка которого оборвалась, обрабатывается снова
+        handler = Handler()
+        assert await UpdateDeduplicationMiddleware(collection=collection)(handler, update, {}) == "handled"
+        assert await collection.count_documents({"_id": 7}) == 1
+        assert await UpdateDeduplicationMiddleware(collection=collection)(handler, update, {}) is None
+        assert handler.calls == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,18 @@
+import asyncio
+
+from tests.helpers import add_members
+
+
+def test_draft_is_saved_once(service, repo):
+    async def scenario():
+        await add_members(repo, "Anna", "Boris")
+        for _ in range(2):
+            success, error = await service.save_board("Anna", "Boris", ["Привет"], sender_username="boris",
+                                                      draft_id="d1")
+            assert (success, error) == (True, None)
+        assert [entry["sender_alias"] for entry in await repo.get_board_summary("anna")] == ["Boris"]
+
+        success, _ = await repo.save_message("nobody", "Boris", ["Привет"], draft_id="d1")
+        assert not success
+
+    asyncio.run(scenario())
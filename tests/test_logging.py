@@ -0,0 +1,27 @@
+import logging
+import queue
+
+from src.utils.logger import logger, setup_logging, start_log_listener
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def test_worker_records_are_written_by_ingress_handlers(monkeypatch):
+    monkeypatch.setattr(logger, "handlers", [])
+    logs = queue.Queue()
+    setup_logging(logs)
+    assert [type(handler).__name__ for handler in logger.handlers] == ["QueueHandler"]
+    logger.warning("from worker %d", 1)
+
+    ingress = ListHandler()
+    monkeypatch.setattr(logger, "handlers", [ingress])
+    listener = start_log_listener(logs)
+    listener.stop()
+    assert [record.getMessage() for record in ingress.records] == ["from worker 1"]
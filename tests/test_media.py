@@ -0,0 +1,31 @@
+from src.utils.media import ALBUM_MAX_SIZE, prepare_broadcast
+
+
+def photo(n: int) -> dict:
+    return {"type": "photo", "content": f"file{n}", "caption": None}
+
+
+def test_consecutive_media_are_grouped_into_albums():
+    messages = [{"type": "text", "content": "hi"}, photo(1), photo(2), {"type": "video", "content": "v"},
+                {"type": "sticker", "content": "s"}]
+    steps, unsupported = prepare_broadcast(messages)
+    assert unsupported == []
+    assert [step.method for step in steps] == ["send_message", "send_media_group", "send_sticker"]
+    assert len(steps[1].kwargs["media"]) == 3
+
+
+def test_long_runs_are_split_and_single_leftover_is_sent_alone():
+    steps, _ = prepare_broadcast([photo(n) for n in range(ALBUM_MAX_SIZE + 1)])
+    assert [step.method for step in steps] == ["send_media_group", "send_photo"]
+    assert len(steps[0].kwargs["media"]) == ALBUM_MAX_SIZE
+    assert steps[1].kwargs == {"photo": f"file{ALBUM_MAX_SIZE}", "caption": None}
+
+
+def test_single_media_is_not_an_album():
+    steps, _ = prepare_broadcast([photo(1), {"type": "text", "content": "t"}, photo(2)])
+    assert [step.method for step in steps] == ["send_photo", "send_message", "send_photo"]
+
+
+def test_unsupported_types_are_reported():
+    _, unsupported = prepare_broadcast([{"type": "poll", "content": "?"}])
+    assert unsupported == ["poll"]
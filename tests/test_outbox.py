@@ -0,0 +1,63 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+from src.db.resilience import (DEFERRED, CommandFailureListener, MongoCircuitBreaker, Outbox, ResilientRepository,
+                               outbox_path)
+from src.lexicon import lexicon
+from src.services import FencesService
+from tests.helpers import add_members
+
+
+def make_repo(client, breaker: MongoCircuitBreaker) -> ResilientRepository:
+    return ResilientRepository(client, breaker=breaker, outbox=Outbox(outbox_path(0)))
+
+
+def test_replayed_letter_is_new_for_recipient_and_reaches_digest(client):
+    async def scenario():
+        breaker = MongoCircuitBreaker(reset_timeout=60)
+        repo = make_repo(client, breaker)
+        service = FencesService(repo)
+        await add_members(repo, "Anna", "Boris")
+        replayed = []
+        repo.on_replayed = lambda event, username: replayed.append((event, username))
+
+        await service.load_settings()
+        breaker.record_failure()
+        assert await service.check_alias_unique("Anna", "Boris") == (False, lexicon.MSG_UNKNOWING_ERROR)
+        assert await repo.save_message("anna", "Boris", ["Привет"], draft_id="d1") == (True, DEFERRED)
+
+        # Получатель успел прочитать заборчик, пока сообщение лежало в журнале
+        breaker._failed_until = 0.0
+        await repo.advance_read_cursor("anna", datetime.now())
+        await asyncio.sleep(0.01)
+        assert await repo.replay_outbox() == 1
+        assert replayed == [(repo.event, "anna")]
+        assert [m["sender_alias"] for m in await repo.get_new_messages("anna")] == ["Boris"]
+        assert repo.outbox.read() == []
+        assert await service.check_alias_unique("Anna", "Boris") != (True, None)
+
+    asyncio.run(scenario())
+
+
+def test_connection_error_in_any_command_opens_circuit():
+    breaker = MongoCircuitBreaker(reset_timeout=60)
+    listener = CommandFailureListener(breaker)
+    listener.failed(SimpleNamespace(failure={"errtype": "OperationFailure", "errmsg": "bad query"}))
+    assert not breaker.is_open
+    listener.failed(SimpleNamespace(failure={"errtype": "AutoReconnect", "errmsg": "connection reset"}))
+    assert breaker.is_open
+
+
+def test_replayed_letter_drops_snapshot_after_deadline(service, repo):
+    async def scenario():
+        await add_members(repo, "Anna", "Boris")
+        service.mark_expired()
+        await service.take_snapshot()
+        assert service.snapshot is not None
+        changes = []
+        service.on_change = lambda event, kind: changes.append(kind)
+        service.letter_saved("anna")
+        assert service.snapshot is None and changes == ["boards"]
+
+    asyncio.run(scenario())
@@ -0,0 +1,61 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from src.db import models
+from src.lexicon import lexicon
+from src.tenants import TenantRegistry
+from src.workers.scheduler import Scheduler
+from tests.helpers import add_members
+
+
+async def make_registry(client) -> TenantRegistry:
+    registry = TenantRegistry(client)
+    success, error = await registry.init(["fest"])
+    assert success, error
+    return registry
+
+
+def test_upcoming_reads_jobs_scheduled_in_another_process(client):
+    async def scenario():
+        registry = await make_registry(client)
+        service = registry.get("fest")
+        primary, other = Scheduler(registry), Scheduler(registry)
+        fire_at = datetime.now() + timedelta(hours=1)
+        success, error = await other.schedule_broadcast(service, fire_at, None, [{"type": "text", "content": "hi"}])
+        assert success, error
+        assert [doc["kind"] for doc in await primary.upcoming_for(service)] == ["broadcast"]
+
+        # Сработавшее в основном процессе задание пропадает из списка в любом процессе
+        job = (await other.upcoming_for(service))[0]
+        await primary._fire(job)
+        assert await other.upcoming_for(service) == []
+
+    asyncio.run(scenario())
+
+
+def test_startup_fires_reminder_that_came_due_while_down(client, settings):
+    settings(EOL_REMINDER_HOURS="24,3")
+
+    async def scenario():
+        registry = await make_registry(client)
+        service = registry.get("fest")
+        await add_members(service.repo, "Anna", chat_id=42)
+        now = datetime.now()
+        success, error = await service.repo.set_eol_datetime(now + timedelta(hours=2))
+        assert success, error
+        service.reset_cache()
+        await service.repo.replace_eol_reminders([
+            models.ScheduledJob(kind="eol_reminder", fire_at=now - timedelta(hours=22), payload={"hours": 24}),
+            models.ScheduledJob(kind="eol_reminder", fire_at=now - timedelta(hours=1), payload={"hours": 3}),
+        ])
+
+        scheduler = Scheduler(registry)
+        scheduler._running = True
+        await scheduler.load()
+        await scheduler.sync_eol_reminders(service, fire_overdue=True)
+
+        broadcasts = await service.repo.db.fences_bot_broadcasts.find().to_list(length=None)
+        assert [job["messages"][0]["content"] for job in broadcasts] == [lexicon.MSG_EOL_REMINDER.render(hours=3)]
+        assert await scheduler.upcoming_for(service) == []
+
+    asyncio.run(scenario())
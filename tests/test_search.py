@@ -0,0 +1,26 @@
+from src.utils.search import BoardIndex, BoardIndexCache
+
+
+BOARD = {
+    "Boris": ["Помнишь, как мы сплавлялись на байдарке?", "Ещё увидимся!"],
+    "Vera": ["Спасибо за байдарки и за ёлку"],
+    "Gleb": ["Просто привет"],
+}
+
+
+def test_search_matches_every_word_by_prefix():
+    index = BoardIndex(BOARD, version=3)
+    assert [alias for alias, _ in index.search("байдарк")] == ["Boris", "Vera"]
+    assert [alias for alias, _ in index.search("байдарк елк")] == ["Vera"]
+    assert index.search("  ") == []
+    alias, snippet = index.search("сплав")[0]
+    assert alias == "Boris" and "сплавлялись" in snippet
+
+
+def test_cache_skips_index_of_another_board_version():
+    cache = BoardIndexCache(size=1)
+    cache.put("anna", BoardIndex(BOARD, version=3))
+    assert cache.get("anna", 3) is not None
+    assert cache.get("anna", 4) is None
+    cache.put("boris", BoardIndex({}, version=0))
+    assert cache.get("anna", 3) is None
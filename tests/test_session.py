@@ -0,0 +1,70 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from aiogram.exceptions import TelegramNetworkError, TelegramRetryAfter, TelegramServerError
+from aiogram.methods import GetChat, SendMessage
+from aiohttp import ClientConnectorError
+
+from src.session import RetryMiddleware
+
+
+class FailingRequest:
+    """
+    make_request, который сначала бросает ошибки из errors, а потом возвращает "ok"
+    """
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def __call__(self, bot, method):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+def connection_refused(method) -> TelegramNetworkError:
+    key = SimpleNamespace(host="api.telegram.org", port=443, ssl=True)
+    error = TelegramNetworkError(method=method, message="connection refused")
+    error.__cause__ = ClientConnectorError(key, ConnectionRefusedError("refused"))
+    return error
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    async def sleep(delay):
+        pass
+
+    monkeypatch.setattr("src.session.asyncio.sleep", sleep)
+
+
+def call(request: FailingRequest, method):
+    return asyncio.run(RetryMiddleware(attempts=3)(request, None, method))
+
+
+def test_send_is_not_retried_after_server_error_or_timeout():
+    method = SendMessage(chat_id=1, text="hi")
+    for error in (TelegramServerError(method=method, message="Bad Gateway"),
+                  TelegramNetworkError(method=method, message="Request timeout error")):
+        request = FailingRequest(error)
+        with pytest.raises(type(error)):
+            call(request, method)
+        assert request.calls == 1
+
+
+def test_send_is_retried_when_it_was_not_delivered_to_telegram():
+    method = SendMessage(chat_id=1, text="hi")
+    request = FailingRequest(TelegramRetryAfter(method=method, message="Too Many Requests", retry_after=1),
+                             connection_refused(method))
+    assert call(request, method) == "ok"
+    assert request.calls == 3
+
+
+def test_get_methods_are_retried_after_server_error():
+    method = GetChat(chat_id=1)
+    request = FailingRequest(TelegramServerError(method=method, message="Bad Gateway"),
+                             TelegramNetworkError(method=method, message="Request timeout error"))
+    assert call(request, method) == "ok"
+    assert request.calls == 3
@@ -0,0 +1,46 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.db.snapshot import BoardSnapshot
+from src.lexicon import lexicon
+from tests.helpers import add_members
+
+
+async def fill_boards(repo):
+    await add_members(repo, "Anna", "Boris")
+    await repo.save_message("anna", "Boris", ["Привет", "Анна"])
+    await repo.save_message("boris", "Anna", ["x" * 100])
+
+
+@pytest.mark.parametrize("memory_limit", [1 << 20, 16])
+def test_snapshot_matches_database(repo, tmp_path, memory_limit):
+    async def scenario():
+        await fill_boards(repo)
+        snapshot = await BoardSnapshot.build(repo, memory_limit=memory_limit, directory=str(tmp_path))
+        try:
+            assert snapshot.get_messages("anna") == {"Boris": ["Привет", "Анна"]}
+            assert snapshot.get_message("boris", "Anna") == ["x" * 100]
+            assert [entry["size"] for entry in snapshot.summary("anna")] == [len("ПриветАнна".encode("utf-8"))]
+            assert bool(os.listdir(tmp_path)) == (memory_limit == 16)
+        finally:
+            snapshot.close()
+        assert os.listdir(tmp_path) == []
+
+    asyncio.run(scenario())
+
+
+def test_save_after_deadline_is_rejected(service, repo):
+    async def scenario():
+        await fill_boards(repo)
+        await repo.set_eol_datetime(datetime.now() - timedelta(minutes=1))
+        service.reset_cache()
+        await service.take_snapshot()
+        success, error = await service.save_board("Anna", "Boris", ["поздно"], sender_username="boris")
+        assert (success, error) == (False, lexicon.MSG_EOL_DATETIME_MSG)
+        assert await service.get_messages_by_username("anna") == {"Boris": ["Привет", "Анна"]}
+        service.drop_snapshot()
+
+    asyncio.run(scenario())
@@ -0,0 +1,35 @@
+import asyncio
+from types import SimpleNamespace
+
+from src.lexicon import lexicon
+from src.middleware.throttling import ThrottlingMiddleware
+
+
+class Chat:
+    def __init__(self):
+        self.answers = []
+
+    async def answer(self, text: str):
+        self.answers.append(text)
+
+
+async def handler(event, data):
+    return "handled"
+
+
+def test_flood_is_dropped_and_user_is_warned_once():
+    async def scenario():
+        middleware = ThrottlingMiddleware(limits={"message": (0.001, 2)})
+        chat = Chat()
+        event = SimpleNamespace(event_type="message", callback_query=None, message=chat)
+        data = {"event_from_user": SimpleNamespace(id=1, username="anna")}
+        results = [await middleware(handler, event, data) for _ in range(4)]
+        assert results == ["handled", "handled", None, None]
+        assert middleware.rejected == 2
+        assert chat.answers == [lexicon.MSG_THROTTLED]
+
+        # Корзины разных пользователей независимы
+        other = {"event_from_user": SimpleNamespace(id=2, username="boris")}
+        assert await middleware(handler, event, other) == "handled"
+
+    asyncio.run(scenario())